@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+
+from api.v1.parse import process_document
+from models.document import DocumentInput
+from models.job import ParseJobInput, ParseJobStatus
+from services.job_queue import get_job_queue
+from core.logging import get_logger
+
+router = APIRouter()
+log = get_logger()
+
+
+def _status(job: dict) -> ParseJobStatus:
+    return ParseJobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        deduplicated=job.get("deduplicated"),
+        result=job["result"],
+        error=job["error"],
+        callback_status=job["callback_status"],
+    )
+
+
+async def run_parse_job(payload: dict) -> dict:
+    """Job-worker entry point: same pipeline and response as /parse/document.
+
+    Download/OCR failures and empty texts raise, so the worker retries them
+    (JOBS_MAX_ATTEMPTS) instead of storing an empty result as done. No
+    request deadline applies: nobody is waiting on the job, and a partial
+    result would be stored as its final answer.
+    """
+    response = await process_document(DocumentInput(**payload), raise_errors=True)
+    return response.dict()
+
+
+@router.post("/parse/jobs", response_model=ParseJobStatus, status_code=202)
+def submit_parse_job(payload: ParseJobInput):
+    """Queue a document for parsing and return its job id immediately."""
+    document = {
+        "document_id": payload.document_id,
+        "file_url": str(payload.file_url) if payload.file_url else None,
+        "storage_path": payload.storage_path,
+        "hint": payload.hint,
+    }
+    callback_url = str(payload.callback_url) if payload.callback_url else None
+    job = get_job_queue().enqueue(document, callback_url)
+    status = _status(job)
+    if job["status"] == "done":
+        # same document already parsed: answer like a finished job
+        return JSONResponse(status_code=200, content=status.dict())
+    return status
+
+
+@router.get("/parse/jobs/{job_id}", response_model=ParseJobStatus)
+def get_parse_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _status(job)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from core.executor import executor_stats
+from services.ocr_cache import cache_stats
+
+router = APIRouter()
+
+
+@router.get('/metrics/ocr')
+async def ocr_metrics():
+    """Per-worker OCR counters (cache hits/misses, executor queue depth, ...)."""
+    return {"cache": cache_stats(), "executor": executor_stats()}
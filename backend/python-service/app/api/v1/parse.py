@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
 import re
+import time
 from models.document import DocumentInput
 from models.extraction import ExtractionResponse, Field
 from services.classifier import classify_document
-from services.ocr_service import ocr_from_url
+from services.ocr_cache import record_lookup
+from services.ocr_service import ocr_document, ocr_header_band
 from services.bl_parser import (
     pick_best_bl,
     extract_containers,
@@ -11,7 +17,12 @@ from services.bl_parser import (
     extract_weight,
 )
 from services.confidence import final_confidence
+from services.ocr_layout import DocumentLayout
 from utils.hashing import hash_text
+from core.config import Settings
+from core.executor import ExecutorBusy, get_executor
+from core.http import DocumentTooLarge, download as fetch_document
+from core.storage import StorageNotConfigured, get_storage
 from core.logging import get_logger
 
 router = APIRouter()
@@ -37,170 +48,414 @@ def _extract_after(text: str, key: str, limit: int = 240) -> str | None:
     return m.group(1).strip()[:limit]
 
 
-# ---------------------------------------------------------
-# Route
-# ---------------------------------------------------------
-@router.post("/parse/document", response_model=ExtractionResponse)
-async def parse_document(payload: DocumentInput):
-    try:
-        # -------------------------------------------------
-        # 0️⃣ HINT NORMALISATION
-        # -------------------------------------------------
-        hint_raw = (payload.hint or "").strip()
-        hint = hint_raw.lower()
-
-        BL_HINTS = {
-            "bill_of_lading",
-            "bill-of-lading",
-            "bill of lading",
-            "billoflading",
-            "bl",
-            "b/l",
-        }
+def _field_after(text: str, layout: Optional[DocumentLayout], key: str, limit: int = 240) -> str | None:
+    """`_extract_after`, falling back to the OCR word layout: the value printed
+    right of the label, else in the box below it (form-style BLs)."""
+    value = _extract_after(text, key, limit)
+    if value or layout is None:
+        return value
+    value = layout.value_right_of(key) or layout.value_below(key)
+    return value.strip()[:limit].upper() if value else None
+
 
-        is_bl_hint = hint in BL_HINTS
+class NoTextExtracted(RuntimeError):
+    """Download/OCR gave no text; raised instead of an empty result for
+    callers that retry (`process_document(raise_errors=True)`)."""
 
+
+def _deadline_at(deadline_ms: Optional[int]) -> Optional[float]:
+    """Absolute OCR deadline from the caller's remaining budget (ms)."""
+    if deadline_ms is None or deadline_ms <= 0:
+        return None
+    margin_ms = Settings().DEADLINE_MARGIN_MS
+    return time.time() + max(0, deadline_ms - margin_ms) / 1000.0
+
+
+def _full_ocr(data: bytes, content_type: str, deadline_at: Optional[float]) -> dict:
+    # the cache lookup is counted by the API process (_ocr_in_executor)
+    doc = ocr_document(data, content_type=content_type, deadline_at=deadline_at, count_cache=False)
+    return {
+        "text": doc.get("text") or "",
+        "mode": "full",
+        "partial": bool(doc.get("partial")),
+        "skipped_pages": doc.get("skipped_pages") or [],
+        "layout": doc.get("layout") or [],
+        "cached": doc.get("cached"),
+    }
+
+
+def _ocr_fast_bl(
+    data: bytes, content_type: str, document_id: str, deadline_at: Optional[float] = None
+) -> dict:
+    """
+    Fast BL mode: OCR the header band of page 1 first and keep it when the
+    BL number found there is high-confidence; otherwise OCR the whole
+    document (reusing the downloaded bytes). A kept band is partial: the
+    other fields are only searched in the band.
+
+    Returns {"text", "mode", "partial", "skipped_pages", "layout", "cached",
+    "band_cached"} like `_run_ocr`.
+    """
+    band = ocr_header_band(data, content_type, deadline_at, count_cache=False)
+    band_cached = band["cached"] if band else None
+    if band and band["text"]:
+        quick = pick_best_bl(band["text"])
+        confidence = quick.get("confidence") if isinstance(quick, dict) else None
         log.info(
-            "parse.start",
+            "ocr.fast_bl",
             extra={
-                "document_id": payload.document_id,
-                "hint": hint_raw,
-                "is_bl_hint": is_bl_hint,
+                "document_id": document_id,
+                "bl": quick.get("bl_number") if isinstance(quick, dict) else quick,
+                "confidence": confidence,
+                "cached": band_cached,
             },
         )
+        if confidence == "high":
+            return {
+                "text": band["text"], "mode": "fast_bl", "partial": True, "skipped_pages": [], "layout": [],
+                "cached": None, "band_cached": band_cached,
+            }
 
-        # -------------------------------------------------
-        # 1️⃣ OCR (SEULEMENT SI BL)
-        # -------------------------------------------------
-        if not is_bl_hint:
-            inferred = classify_document(hint_raw, "")
-            log.info(
-                "parse.skip_ocr",
-                extra={
-                    "document_id": payload.document_id,
-                    "inferred_type": inferred,
-                },
-            )
-            return ExtractionResponse(
-                document_type=inferred,
-                fields=[],
-                raw_text_hash="",
-                raw_text_snippet="",
-                extraction=None,
-            )
+    return {**_full_ocr(data, content_type, deadline_at), "band_cached": band_cached}
 
-        try:
-            ocr_text = ocr_from_url(payload.file_url) or ""
-        except Exception as e:
-            log.exception("ocr.failed", extra={"url": payload.file_url})
-            ocr_text = ""
 
-        if not ocr_text.strip():
-            log.warning("ocr.empty", extra={"document_id": payload.document_id})
+async def _fetch(payload: DocumentInput) -> tuple[bytes, str]:
+    """Download the document from storage_path (direct bucket read) or file_url."""
+    if payload.storage_path:
+        return await get_storage().download(payload.storage_path)
+    return await fetch_document(str(payload.file_url))
+
 
+def _run_ocr(
+    data: bytes, content_type: str, document_id: str, deadline_at: Optional[float] = None
+) -> dict:
+    """
+    CPU-bound OCR of downloaded bytes (runs in the bounded executor).
+
+    Returns {"text": normalized text, "mode": "full"|"fast_bl",
+    "partial": bool, "skipped_pages": [int], "layout": [PageLayout dict],
+    "cached": bool|None (OCR cache lookup, not yet counted), and in fast BL
+    mode "band_cached" (same, for the header-band lookup)}.
+    """
+    if Settings().OCR_FAST_BL:
+        return _ocr_fast_bl(data, content_type, document_id, deadline_at)
+    return _full_ocr(data, content_type, deadline_at)
+
+
+async def _ocr_in_executor(
+    data: bytes, content_type: str, document_id: str, deadline_at: Optional[float] = None
+) -> dict:
+    """`_run_ocr` in the bounded executor; its OCR cache lookup is counted
+    here, in the API process that serves /metrics/ocr."""
+    ocr = await get_executor().submit(_run_ocr, data, content_type, document_id, deadline_at)
+    record_lookup(ocr.get("band_cached"))
+    record_lookup(ocr.get("cached"))
+    return ocr
+
+
+# ---------------------------------------------------------
+# Pipeline (shared by the sync route and the job worker)
+# ---------------------------------------------------------
+async def process_document(
+    payload: DocumentInput, deadline_at: Optional[float] = None, raise_errors: bool = False
+) -> ExtractionResponse:
+    """
+    Download, OCR and parse one document.
+
+    With `deadline_at` (epoch seconds) the download and OCR stop when the
+    budget runs out and whatever was read is parsed: extraction.status is
+    then "partial" and extraction.skipped_pages lists the pages not OCRed.
+
+    Raises ExecutorBusy when the OCR executor is saturated, DocumentTooLarge
+    past DOWNLOAD_MAX_MB and StorageNotConfigured for a storage_path without
+    Supabase settings; other download/OCR failures degrade to an empty text
+    (BL_HINT_BUT_NOT_DETECTED). With `raise_errors` (the job worker) those
+    failures are raised instead, and so is an empty OCR text
+    (NoTextExtracted), so the job is retried rather than stored as done.
+    """
+    # -------------------------------------------------
+    # 0️⃣ HINT NORMALISATION
+    # -------------------------------------------------
+    hint_raw = (payload.hint or "").strip()
+    hint = hint_raw.lower()
+
+    BL_HINTS = {
+        "bill_of_lading",
+        "bill-of-lading",
+        "bill of lading",
+        "billoflading",
+        "bl",
+        "b/l",
+    }
+
+    is_bl_hint = hint in BL_HINTS
+
+    log.info(
+        "parse.start",
+        extra={
+            "document_id": payload.document_id,
+            "hint": hint_raw,
+            "is_bl_hint": is_bl_hint,
+        },
+    )
+
+    # -------------------------------------------------
+    # 1️⃣ OCR (SEULEMENT SI BL)
+    # -------------------------------------------------
+    if not is_bl_hint:
+        inferred = classify_document(hint_raw, "")
         log.info(
-            "ocr.done",
+            "parse.skip_ocr",
             extra={
                 "document_id": payload.document_id,
-                "text_len": len(ocr_text),
-                "preview": ocr_text[:400],
+                "inferred_type": inferred,
             },
         )
+        return ExtractionResponse(
+            document_type=inferred,
+            fields=[],
+            raw_text_hash="",
+            raw_text_snippet="",
+            extraction=None,
+        )
 
-        # ⚠️ CRITIQUE :
-        # ocr_service retourne DÉJÀ un texte normalisé (UPPERCASE, lignes propres)
-        text = ocr_text
+    ocr_mode = "full"
+    partial = False
+    skipped_pages: list[int] = []
+    layout = None
+    try:
+        # download on the event loop (pooled async client), OCR in the
+        # bounded executor (fails fast when saturated)
+        timeout = None if deadline_at is None else max(0.0, deadline_at - time.time())
+        data, content_type = await asyncio.wait_for(_fetch(payload), timeout)
+        ocr = await _ocr_in_executor(data, content_type, payload.document_id, deadline_at)
+        ocr_text, ocr_mode = ocr["text"], ocr["mode"]
+        partial, skipped_pages = ocr["partial"], ocr["skipped_pages"]
+        # word boxes come from adaptive passes (image_to_data) only: the
+        # default exhaustive cascade reads plain text and has none
+        if Settings().OCR_PSM_MODE == "adaptive":
+            layout = DocumentLayout.from_dicts(ocr.get("layout"))
+    except (ExecutorBusy, DocumentTooLarge, StorageNotConfigured):
+        raise
+    except asyncio.TimeoutError:
+        log.warning("download.deadline", extra={"document_id": payload.document_id})
+        if raise_errors:
+            raise
+        ocr_text, partial = "", True
+    except Exception as e:
+        log.exception("ocr.failed", extra={"url": payload.file_url, "storage_path": payload.storage_path})
+        if raise_errors:
+            raise
+        ocr_text = ""
 
-        # -------------------------------------------------
-        # 2️⃣ BL DETECTION (SOURCE DE VÉRITÉ UNIQUE)
-        # -------------------------------------------------
-        bl_value = pick_best_bl(text)
-        # Backwards-compat: pick_best_bl may return a dict {bl_number, confidence, reason}
-        bl_result = None
-        if isinstance(bl_value, dict):
-            bl_result = bl_value
-            bl_value = bl_value.get('bl_number')
-        fields: list[Field] = []
-        extraction = None
-        doc_type = "BL"
-
-        if bl_value:
-            # compute final confidence using existing service; pass string candidate
-            conf = final_confidence(text, bl_value, ["BL", "B/L", "BILL"])
-            fields.append(Field(key="bl_number", value=bl_value, confidence=conf))
-            # attach reason from new parser if available
-            if bl_result and 'reason' in bl_result:
-                log.info('bl.parser_reason', extra={'reason': bl_result.get('reason')})
-
-            log.info(
-                "bl.detected",
-                extra={
-                    "document_id": payload.document_id,
-                    "bl": bl_value,
-                    "confidence": conf,
-                },
-            )
-
-            # -------------------------------------------------
-            # 3️⃣ EXTRACTION BL DÉTAILLÉE
-            # -------------------------------------------------
-            extraction = {
-                "status": "parsed",
-                "bl_detected": True,
-                "bl_number": bl_value,
-                "bl_score": conf,
-                "vessel": _extract_after(text, "VESSEL"),
-                "voyage": _extract_after(text, "VOYAGE NO")
-                or _extract_after(text, "VOYAGE"),
-                "shipper": _extract_after(text, "SHIPPER"),
-                "consignee": _extract_after(text, "CONSIGNEE"),
-                "containers": extract_containers(text),
-                "seals": extract_seals(text),
-                "weight": extract_weight(text),
-            }
+    if not ocr_text.strip():
+        log.warning("ocr.empty", extra={"document_id": payload.document_id})
+        if raise_errors:
+            # OCR swallows poppler/Tesseract crashes into an empty text
+            raise NoTextExtracted(f"no text extracted from document {payload.document_id}")
 
-            # Date extraction (soft)
-            m_date = re.search(
-                r"\b(\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{4}/\d{2}/\d{2})\b",
-                text,
-            )
-            if m_date:
-                extraction["shipped_on_board_date"] = m_date.group(1)
-
-        else:
-            # BL hint but no BL detected → soft failure
-            extraction = {
-                "status": "parsed",
-                "bl_detected": False,
-                "reason": "BL_HINT_BUT_NOT_DETECTED",
-            }
-            log.warning(
-                "bl.not_detected",
-                extra={"document_id": payload.document_id},
-            )
+    log.info(
+        "ocr.done",
+        extra={
+            "document_id": payload.document_id,
+            "text_len": len(ocr_text),
+            "ocr_mode": ocr_mode,
+            "partial": partial,
+            "skipped_pages": skipped_pages,
+            "preview": ocr_text[:400],
+        },
+    )
 
-        # -------------------------------------------------
-        # 4️⃣ RESPONSE
-        # -------------------------------------------------
-        response = ExtractionResponse(
-            document_type=doc_type,
-            fields=fields,
-            raw_text_hash=hash_text(text),
-            raw_text_snippet=text[:800],
-            extraction=extraction,
-        )
+    # ⚠️ CRITIQUE :
+    # ocr_service retourne DÉJÀ un texte normalisé (UPPERCASE, lignes propres)
+    text = ocr_text
+
+    # -------------------------------------------------
+    # 2️⃣ BL DETECTION (SOURCE DE VÉRITÉ UNIQUE)
+    # -------------------------------------------------
+    bl_value = pick_best_bl(text, layout=layout)
+    # Backwards-compat: pick_best_bl may return a dict {bl_number, confidence, reason}
+    bl_result = None
+    if isinstance(bl_value, dict):
+        bl_result = bl_value
+        bl_value = bl_value.get('bl_number')
+    fields: list[Field] = []
+    extraction = None
+    doc_type = "BL"
+
+    if bl_value:
+        # compute final confidence using existing service; pass string candidate
+        conf = final_confidence(text, bl_value, ["BL", "B/L", "BILL"])
+        fields.append(Field(key="bl_number", value=bl_value, confidence=conf))
+        # attach reason from new parser if available
+        if bl_result and 'reason' in bl_result:
+            log.info('bl.parser_reason', extra={'reason': bl_result.get('reason')})
 
         log.info(
-            "parse.done",
+            "bl.detected",
             extra={
                 "document_id": payload.document_id,
                 "bl": bl_value,
-                "fields": [f.dict() for f in fields],
+                "confidence": conf,
             },
         )
 
-        return response
+        # -------------------------------------------------
+        # 3️⃣ EXTRACTION BL DÉTAILLÉE
+        # -------------------------------------------------
+        extraction = {
+            "status": "partial" if partial else "parsed",
+            "bl_detected": True,
+            "bl_number": bl_value,
+            "bl_score": conf,
+            "ocr_mode": ocr_mode,
+            "vessel": _field_after(text, layout, "VESSEL"),
+            "voyage": _field_after(text, layout, "VOYAGE NO")
+            or _field_after(text, layout, "VOYAGE"),
+            "shipper": _field_after(text, layout, "SHIPPER"),
+            "consignee": _field_after(text, layout, "CONSIGNEE"),
+            "containers": extract_containers(text),
+            "seals": extract_seals(text),
+            "weight": extract_weight(text),
+        }
+
+        # Date extraction (soft)
+        m_date = re.search(
+            r"\b(\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{4}/\d{2}/\d{2})\b",
+            text,
+        )
+        if m_date:
+            extraction["shipped_on_board_date"] = m_date.group(1)
+
+    else:
+        # BL hint but no BL detected → soft failure
+        extraction = {
+            "status": "partial" if partial else "parsed",
+            "bl_detected": False,
+            "reason": "BL_HINT_BUT_NOT_DETECTED",
+            "ocr_mode": ocr_mode,
+        }
+        log.warning(
+            "bl.not_detected",
+            extra={"document_id": payload.document_id},
+        )
+
+    if partial:
+        # tell the caller what was not read: the pages past the deadline or,
+        # in fast_bl mode, everything below the header band of page 1
+        extraction["skipped_pages"] = skipped_pages
+        if ocr_mode == "fast_bl":
+            extraction["ocr_scope"] = "header_band"
+
+    # -------------------------------------------------
+    # 4️⃣ RESPONSE
+    # -------------------------------------------------
+    response = ExtractionResponse(
+        document_type=doc_type,
+        fields=fields,
+        raw_text_hash=hash_text(text),
+        raw_text_snippet=text[:800],
+        extraction=extraction,
+    )
+
+    log.info(
+        "parse.done",
+        extra={
+            "document_id": payload.document_id,
+            "bl": bl_value,
+            "fields": [f.dict() for f in fields],
+        },
+    )
 
+    return response
+
+
+# ---------------------------------------------------------
+# Route
+# ---------------------------------------------------------
+@router.post("/parse/document", response_model=ExtractionResponse)
+async def parse_document(
+    payload: DocumentInput,
+    x_deadline_ms: Optional[int] = Header(None, description="Caller's remaining time budget in ms"),
+):
+    try:
+        return await process_document(payload, _deadline_at(x_deadline_ms))
+    except ExecutorBusy as e:
+        log.warning("parse.busy", extra={"document_id": payload.document_id, "retry_after": e.retry_after})
+        raise HTTPException(
+            status_code=503,
+            detail="OCR capacity exhausted, retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except DocumentTooLarge as e:
+        log.warning("download.too_large", extra={"document_id": payload.document_id, "error": str(e)})
+        raise HTTPException(status_code=413, detail="Document too large")
+    except StorageNotConfigured:
+        log.error("storage.not_configured", extra={"document_id": payload.document_id})
+        raise HTTPException(status_code=500, detail="Document storage is not configured")
     except Exception:
         log.exception("parse.unhandled_exception")
         raise HTTPException(status_code=500, detail="Document parsing failed")
+
+
+async def _parse_batch_item(
+    index: int, payload: DocumentInput, slots: asyncio.Semaphore, deadline_at: Optional[float] = None
+) -> dict:
+    """One NDJSON line: {index, document_id, status, result | error}."""
+    line = {"index": index, "document_id": payload.document_id}
+    try:
+        async with slots:
+            response = await process_document(payload, deadline_at)
+        line.update(status=200, result=response.dict())
+    except ExecutorBusy as e:
+        line.update(status=503, error="OCR capacity exhausted, retry later", retry_after=e.retry_after)
+    except DocumentTooLarge:
+        line.update(status=413, error="Document too large")
+    except StorageNotConfigured:
+        log.error("storage.not_configured", extra={"document_id": payload.document_id})
+        line.update(status=500, error="Document storage is not configured")
+    except Exception:
+        log.exception("parse.batch.item_failed", extra={"document_id": payload.document_id})
+        line.update(status=500, error="Document parsing failed")
+    return line
+
+
+@router.post("/parse/documents")
+async def parse_documents(
+    payload: list[DocumentInput],
+    x_deadline_ms: Optional[int] = Header(None, description="Caller's remaining time budget in ms"),
+):
+    """
+    Parse several documents in one call.
+
+    Documents are downloaded concurrently and fanned out to the OCR
+    executor; results are streamed back as NDJSON, one line per document
+    in completion order (use `index` / `document_id` to match them).
+    """
+    max_docs = Settings().BATCH_MAX_DOCUMENTS
+    if len(payload) > max_docs:
+        raise HTTPException(status_code=413, detail=f"At most {max_docs} documents per batch")
+
+    # keep one document downloading while the others occupy the OCR slots,
+    # without pushing a whole batch into the shared wait queue
+    slots = asyncio.Semaphore(get_executor().max_workers + 1)
+    deadline_at = _deadline_at(x_deadline_ms)
+    log.info("parse.batch.start", extra={"documents": len(payload)})
+
+    async def stream():
+        tasks = [
+            asyncio.ensure_future(_parse_batch_item(i, doc, slots, deadline_at))
+            for i, doc in enumerate(payload)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                yield json.dumps(line, default=str) + "\n"
+        finally:
+            # client went away: do not start OCR for nobody. Jobs already in
+            # the pool run to completion and keep their executor slot.
+            for task in tasks:
+                task.cancel()
+            log.info("parse.batch.done", extra={"documents": len(payload)})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
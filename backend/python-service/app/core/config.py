@@ -1,5 +1,7 @@
 import os
+import tempfile
 from dataclasses import dataclass
+from typing import List
 
 @dataclass
 class Settings:
@@ -8,6 +10,86 @@ class Settings:
     LOG_LEVEL: str = os.environ.get('LOG_LEVEL', 'INFO')
     TEMPLATE_DIR: str = os.environ.get('TEMPLATE_DIR', 'templates')
 
+    # OCR
+    # Number of processes used to OCR the pages of a scanned PDF in parallel.
+    # 1 keeps the historical sequential behaviour.
+    OCR_PAGE_WORKERS: int = int(os.environ.get('OCR_PAGE_WORKERS', '1'))
+    # Pages rasterized at once on the sequential path (bounds peak memory).
+    OCR_RASTER_WINDOW: int = int(os.environ.get('OCR_RASTER_WINDOW', '1'))
+    # Tesseract backend: 'tesserocr' keeps warm in-process engines per worker,
+    # 'pytesseract' spawns a tesseract process per call, 'auto' prefers tesserocr.
+    OCR_BACKEND: str = os.environ.get('OCR_BACKEND', 'auto')
+    # 'exhaustive' runs every PSM on grayscale + binarized images (historical);
+    # 'adaptive' stops at the first pass whose mean word confidence is good enough.
+    OCR_PSM_MODE: str = os.environ.get('OCR_PSM_MODE', 'exhaustive').lower()
+    OCR_MIN_CONFIDENCE: float = float(os.environ.get('OCR_MIN_CONFIDENCE', '80'))
+    OCR_BINARIZE_BELOW: float = float(os.environ.get('OCR_BINARIZE_BELOW', '60'))
+    # Page preprocessing shared by all PSM passes: 'basic' (autocontrast + fixed
+    # threshold, historical), 'otsu' or 'adaptive' (NumPy: border removal,
+    # deskew, Otsu / local-mean threshold, despeckle).
+    OCR_PREPROCESS: str = os.environ.get('OCR_PREPROCESS', 'basic').lower()
+    # Resolution ladder: pages are rasterized at the first dpi and re-rendered at
+    # the next level only when mean word confidence < OCR_ESCALATE_BELOW (or no
+    # confident BL number was found). A single level disables the ladder.
+    OCR_DPI_LADDER: str = os.environ.get('OCR_DPI_LADDER', '300')
+    OCR_ESCALATE_BELOW: float = float(os.environ.get('OCR_ESCALATE_BELOW', '70'))
+    # PDF pages whose text layer scores below this (services/text_quality.py:
+    # printable ratio x dictionary / label evidence, 0..1) are OCRed; the others
+    # keep their text layer (decided per page, so mixed PDFs work).
+    OCR_TEXT_MIN_QUALITY: float = float(os.environ.get('OCR_TEXT_MIN_QUALITY', '0.5'))
+    # PDF text-layer extractor: 'pypdf2' (historical), 'pdfplumber' or
+    # 'pdftotext' (poppler, fastest); 'auto' prefers pdftotext when installed.
+    # pdftotext -layout orders text differently: opt-in until it is checked
+    # against the sample documents.
+    TEXT_LAYER_BACKEND: str = os.environ.get('TEXT_LAYER_BACKEND', 'pypdf2')
+    # Pages that are one embedded scan image (JPEG/CCITT/Flate) are OCRed from
+    # that image at its native resolution instead of being rendered by poppler.
+    OCR_EMBEDDED_IMAGES: bool = os.environ.get('OCR_EMBEDDED_IMAGES', 'true').lower() in ('1', 'true', 'yes')
+    # Fast BL mode: OCR only the top band of page 1 first and skip full-document
+    # OCR when pick_best_bl is confident about the number found there.
+    OCR_FAST_BL: bool = os.environ.get('OCR_FAST_BL', 'false').lower() in ('1', 'true', 'yes')
+    OCR_FAST_BL_BAND: float = float(os.environ.get('OCR_FAST_BL_BAND', '0.3'))
+    # On-disk OCR result cache (empty OCR_CACHE_DIR disables it).
+    OCR_CACHE_DIR: str = os.environ.get('OCR_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ocr-cache'))
+    OCR_CACHE_MAX_MB: float = float(os.environ.get('OCR_CACHE_MAX_MB', '256'))
+
+    # Parse/OCR executor: OCR_CONCURRENCY jobs at once (0 = one per CPU) in a
+    # 'process' or 'thread' pool, OCR_QUEUE_MAX more waiting; beyond that 503.
+    OCR_CONCURRENCY: int = int(os.environ.get('OCR_CONCURRENCY', '0'))
+    OCR_QUEUE_MAX: int = int(os.environ.get('OCR_QUEUE_MAX', '8'))
+    OCR_EXECUTOR: str = os.environ.get('OCR_EXECUTOR', 'process').lower()
+
+    # Async parse jobs (SQLite queue; mount JOBS_DB_PATH on a volume to keep
+    # jobs across container restarts). JOBS_WORKERS=0 disables the consumer.
+    JOBS_DB_PATH: str = os.environ.get('JOBS_DB_PATH', os.path.join(tempfile.gettempdir(), 'parse-jobs.sqlite3'))
+    JOBS_WORKERS: int = int(os.environ.get('JOBS_WORKERS', '1'))
+    JOBS_MAX_ATTEMPTS: int = int(os.environ.get('JOBS_MAX_ATTEMPTS', '3'))
+    # a failed job waits JOBS_RETRY_BACKOFF_S x 2^(attempt-1) before its retry
+    JOBS_RETRY_BACKOFF_S: float = float(os.environ.get('JOBS_RETRY_BACKOFF_S', '5'))
+    JOBS_LEASE_S: float = float(os.environ.get('JOBS_LEASE_S', '120'))
+    JOBS_POLL_S: float = float(os.environ.get('JOBS_POLL_S', '1'))
+
+    # Subtracted from the X-Deadline-Ms budget to leave time for parsing and the response
+    DEADLINE_MARGIN_MS: int = int(os.environ.get('DEADLINE_MARGIN_MS', '500'))
+    # Max documents accepted by POST /parse/documents
+    BATCH_MAX_DOCUMENTS: int = int(os.environ.get('BATCH_MAX_DOCUMENTS', '50'))
+
+    # Supabase storage (direct reads for DocumentInput.storage_path)
+    SUPABASE_URL: str = os.environ.get('SUPABASE_URL', '')
+    SUPABASE_SERVICE_ROLE_KEY: str = os.environ.get('SUPABASE_SERVICE_ROLE_KEY', '')
+    SUPABASE_DOCUMENTS_BUCKET: str = os.environ.get('SUPABASE_DOCUMENTS_BUCKET', 'documents')
+
+    # Document download (pooled keep-alive client, streamed with a size cutoff)
+    DOWNLOAD_TIMEOUT_S: float = float(os.environ.get('DOWNLOAD_TIMEOUT_S', '20'))
+    DOWNLOAD_MAX_MB: float = float(os.environ.get('DOWNLOAD_MAX_MB', '50'))
+    HTTP_MAX_CONNECTIONS: int = int(os.environ.get('HTTP_MAX_CONNECTIONS', '20'))
+
+    @property
+    def ocr_dpi_levels(self) -> List[int]:
+        levels = sorted({int(x) for x in self.OCR_DPI_LADDER.replace(' ', '').split(',') if x})
+        return levels or [300]
+
+
 def get_settings() -> Settings:
     if not os.environ.get('PYTHON_SERVICE_API_KEY'):
         raise RuntimeError("PYTHON_SERVICE_API_KEY is not set")
@@ -0,0 +1,144 @@
+# core/executor.py
+"""Bounded executor with admission control for parse/OCR work.
+
+At most OCR_CONCURRENCY jobs run at once (in a dedicated process pool by
+default) and at most OCR_QUEUE_MAX more may wait for a slot. Past that,
+`submit` fails fast with `ExecutorBusy`, which the routes turn into a 503 +
+Retry-After, instead of letting every request slow down until all of them
+miss the caller's timeout.
+
+Counters are tracked on the event loop; `stats()` is exposed by
+GET /api/v1/metrics/ocr.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from core.config import Settings
+from core.logging import get_logger
+
+log = get_logger('core.executor')
+
+
+class ExecutorBusy(Exception):
+    """All slots and queue positions are taken."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'OCR executor saturated, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int, max_queue: int, mode: str = 'process'):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.mode = mode
+        if mode == 'thread':
+            self._pool: Executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ocr')
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._avg_seconds: Optional[float] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives belong to one loop; rebuild when idle on a new one
+        loop = asyncio.get_running_loop()
+        if self._slots is None or (self._slots_loop is not loop and not (self.queued or self.in_flight)):
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue position frees up."""
+        avg = self._avg_seconds or 5.0
+        waves = (self.queued + self.in_flight) / self.max_workers
+        return int(min(120, max(1, math.ceil(avg * max(1.0, waves)))))
+
+    async def submit(self, fn: Callable, *args):
+        """Run fn(*args) in the pool, or raise ExecutorBusy when saturated."""
+        slots = self._semaphore()
+        if slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy(self.retry_after())
+
+        self.queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        started = time.monotonic()
+
+        def finished(future: Optional[asyncio.Future] = None) -> None:
+            elapsed = time.monotonic() - started
+            self._avg_seconds = elapsed if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * elapsed
+            self.in_flight -= 1
+            self.completed += 1
+            slots.release()
+            if future is not None and not future.cancelled():
+                future.exception()  # retrieved even when nobody awaits it any more
+
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        except BaseException:
+            finished()
+            raise
+        # pool work cannot be cancelled: the slot is held until it really
+        # ends, not released when the awaiting task is cancelled
+        future.add_done_callback(finished)
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_seconds': round(self._avg_seconds, 3) if self._avg_seconds is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[BoundedExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> BoundedExecutor:
+    """Process-wide executor, created from settings on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            settings = Settings()
+            workers = settings.OCR_CONCURRENCY or (os.cpu_count() or 1)
+            _executor = BoundedExecutor(workers, settings.OCR_QUEUE_MAX, settings.OCR_EXECUTOR)
+            log.info('executor.start', extra=_executor.stats())
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = None
+
+
+def executor_stats() -> dict:
+    if _executor is None:
+        return {'started': False}
+    return {'started': True, **_executor.stats()}
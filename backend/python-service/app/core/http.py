@@ -0,0 +1,96 @@
+# core/http.py
+"""Shared async HTTP client for document downloads.
+
+One keep-alive `httpx.AsyncClient` per event loop is reused by every request
+of the worker (connection pooling, no per-download TLS handshake);
+`close_async_client` closes them all. Downloads are streamed and abort as
+soon as the body exceeds DOWNLOAD_MAX_MB.
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from core.config import Settings
+from core.logging import get_logger
+
+log = get_logger('core.http')
+
+
+class DocumentTooLarge(ValueError):
+    """The remote document is larger than DOWNLOAD_MAX_MB."""
+
+
+# pooled clients by event loop (a client's connections belong to its loop)
+_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        # clients of finished loops cannot be closed any more: drop them
+        for gone in [l for l in _clients if l.is_closed()]:
+            del _clients[gone]
+        settings = Settings()
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.DOWNLOAD_TIMEOUT_S),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+            ),
+            follow_redirects=True,
+        )
+    return client
+
+
+async def close_async_client() -> None:
+    """Close every pooled client: the running loop's one here, the others
+    on their own loop when it is still running."""
+    loop = asyncio.get_running_loop()
+    pending = []
+    for owner, client in list(_clients.items()):
+        if client.is_closed:
+            continue
+        if owner is loop:
+            await client.aclose()
+        elif owner.is_running():
+            pending.append(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), owner)))
+    _clients.clear()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def download(
+    url: str,
+    *,
+    max_bytes: Optional[int] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    headers: Optional[dict] = None,
+) -> Tuple[bytes, str]:
+    """Stream `url` into memory; returns (bytes, content_type).
+
+    Raises DocumentTooLarge past `max_bytes` (default DOWNLOAD_MAX_MB) and
+    httpx.HTTPError on transport / HTTP status errors.
+    """
+    if max_bytes is None:
+        max_bytes = int(Settings().DOWNLOAD_MAX_MB * 1024 * 1024)
+    client = client or get_async_client()
+
+    async with client.stream('GET', url, headers=headers) as resp:
+        resp.raise_for_status()
+        declared = resp.headers.get('content-length')
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise DocumentTooLarge(f'document is {declared} bytes (limit {max_bytes})')
+
+        chunks = []
+        size = 0
+        async for chunk in resp.aiter_bytes():
+            size += len(chunk)
+            if size > max_bytes:
+                raise DocumentTooLarge(f'document exceeds {max_bytes} bytes')
+            chunks.append(chunk)
+
+    log.debug('http.download.done', extra={'bytes': size})
+    return b''.join(chunks), resp.headers.get('content-type', '')
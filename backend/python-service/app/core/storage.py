@@ -0,0 +1,96 @@
+# core/storage.py
+"""Direct reads from the Supabase documents bucket.
+
+Instead of receiving a signed URL and fetching it over public HTTP, the
+parse path can take a storage object path and download it straight from
+the Storage REST API with the service-role key, through the pooled
+keep-alive client of core.http (same streaming + size cutoff).
+
+The parse path no longer signs URLs. core.supabase.create_signed_url
+(used by scripts/test_parse_request.py to build `file_url`s) still does,
+through the cache below, which keeps each URL until shortly before it
+expires so the same object does not get a new signature per call.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from core.config import Settings
+from core.http import download
+from core.logging import get_logger
+
+log = get_logger('core.storage')
+
+
+class StorageNotConfigured(RuntimeError):
+    """SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY are not set."""
+
+
+class SignedUrlCache:
+    """(bucket, path, expires) -> signed URL, dropped `margin_s` before expiry."""
+
+    def __init__(self, max_entries: int = 1024, margin_s: float = 60.0):
+        self.max_entries = max_entries
+        self.margin_s = margin_s
+        self._entries: "OrderedDict[tuple, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket: str, path: str, expires: int) -> Optional[str]:
+        key = (bucket, path, expires)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            url, valid_until = entry
+            if time.time() >= valid_until:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return url
+
+    def put(self, bucket: str, path: str, expires: int, url: str) -> None:
+        # keep it for at most 90% of its lifetime and never past expiry - margin
+        valid_for = min(expires * 0.9, expires - self.margin_s)
+        if valid_for <= 0:
+            return
+        with self._lock:
+            self._entries[(bucket, path, expires)] = (url, time.time() + valid_for)
+            self._entries.move_to_end((bucket, path, expires))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+signed_url_cache = SignedUrlCache()
+
+
+class StorageClient:
+    def __init__(self, base_url: str, service_key: str, bucket: str):
+        self.base_url = base_url.rstrip('/')
+        self.service_key = service_key
+        self.bucket = bucket
+
+    @property
+    def _headers(self) -> dict:
+        return {'Authorization': f'Bearer {self.service_key}', 'apikey': self.service_key}
+
+    def _url(self, kind: str, path: str) -> str:
+        return f'{self.base_url}/storage/v1/object/{kind}{self.bucket}/{quote(path.lstrip("/"))}'
+
+    async def download(self, path: str, client: Optional[httpx.AsyncClient] = None) -> Tuple[bytes, str]:
+        """Download an object of the bucket; returns (bytes, content_type)."""
+        data, content_type = await download(
+            self._url('authenticated/', path), client=client, headers=self._headers
+        )
+        log.debug('storage.download.done', extra={'path': path, 'bytes': len(data)})
+        return data, content_type
+
+
+def get_storage() -> StorageClient:
+    settings = Settings()
+    if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_ROLE_KEY:
+        raise StorageNotConfigured('SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required for storage_path')
+    return StorageClient(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY, settings.SUPABASE_DOCUMENTS_BUCKET)
@@ -8,6 +8,7 @@ except Exception:
     create_client = None
 
 from core.logging import get_logger
+from core.storage import signed_url_cache
 
 log = get_logger('core.supabase')
 
@@ -50,7 +51,13 @@ def _check_bucket_access() -> None:
 
 
 def create_signed_url(file_path: str, expires: int = 3600) -> str:
-    """Create a signed URL for an object in the configured documents bucket."""
+    """Create a signed URL for an object in the configured documents bucket.
+
+    URLs are cached until shortly before they expire.
+    """
+    cached = signed_url_cache.get(BUCKET, file_path, expires)
+    if cached:
+        return cached
     try:
         result = supabase.storage.from_(BUCKET).create_signed_url(file_path, expires)
 
@@ -59,6 +66,7 @@ def create_signed_url(file_path: str, expires: int = 3600) -> str:
             if isinstance(data, dict):
                 for k in ('signed_url', 'signedURL', 'signedUrl'):
                     if data.get(k):
+                        signed_url_cache.put(BUCKET, file_path, expires, data[k])
                         return data[k]
 
         raise RuntimeError(f'Unexpected signed URL response: {result}')
@@ -21,11 +21,19 @@ if BASE_DIR not in sys.path:
 # ------------------------------------------------------------------
 # Imports AFTER env is loaded
 # ------------------------------------------------------------------
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from core.config import Settings
+from core.executor import shutdown_executor
+from core.http import close_async_client
 from core.logging import configure_logging
 from api.v1.router import router as api_router
+from api.v1.jobs import run_parse_job
+from services.job_queue import get_job_queue
+from services.job_worker import start_job_workers, stop_job_workers
+from services.ocr_service import shutdown_page_pool
 
 # ------------------------------------------------------------------
 # Init
@@ -61,7 +69,17 @@ except Exception as e:
 # ------------------------------------------------------------------
 # FastAPI app
 # ------------------------------------------------------------------
-app = FastAPI(title=settings.APP_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_job_workers(get_job_queue(), run_parse_job)
+    yield
+    await stop_job_workers()
+    await close_async_client()
+    shutdown_executor()
+    shutdown_page_pool()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/health")
@@ -1,11 +1,14 @@
 # models/document.py
-from pydantic import BaseModel, HttpUrl, Field, validator
+from pydantic import BaseModel, HttpUrl, Field, root_validator, validator
 from typing import Optional
 
 
 class DocumentInput(BaseModel):
     document_id: str = Field(..., min_length=3)
-    file_url: HttpUrl
+    # Either a URL to fetch, or an object path in the Supabase documents
+    # bucket (read directly with the service-role key).
+    file_url: Optional[HttpUrl] = None
+    storage_path: Optional[str] = Field(None, min_length=1, max_length=1024)
     hint: Optional[str] = Field(None, max_length=50)
 
     @validator("document_id")
@@ -19,3 +22,9 @@ class DocumentInput(BaseModel):
         if v:
             return v.strip().upper()
         return v
+
+    @root_validator(skip_on_failure=True)
+    def one_source(cls, values):
+        if bool(values.get("file_url")) == bool(values.get("storage_path")):
+            raise ValueError("exactly one of file_url or storage_path is required")
+        return values
@@ -0,0 +1,21 @@
+# models/job.py
+from pydantic import BaseModel, HttpUrl
+from typing import Optional
+
+from models.document import DocumentInput
+from models.extraction import ExtractionResponse
+
+
+class ParseJobInput(DocumentInput):
+    # Optional URL receiving {job_id, status, result, error} once the job ends
+    callback_url: Optional[HttpUrl] = None
+
+
+class ParseJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued | running | done | failed
+    attempts: int = 0
+    deduplicated: Optional[bool] = None
+    result: Optional[ExtractionResponse] = None
+    error: Optional[str] = None
+    callback_status: Optional[str] = None
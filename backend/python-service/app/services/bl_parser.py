@@ -1,7 +1,13 @@
 # services/bl_parser.py
 import re
-from typing import List, Optional
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from core.logging import get_logger
+from services.document_index import DocumentIndex
+from services.keyword_scanner import KeywordScanner
+from services.ocr_layout import DocumentLayout
+from services.pattern_set import PatternSet
 
 log = get_logger()
 
@@ -9,27 +15,28 @@ log = get_logger()
 # BL CONTEXT DETECTION
 # =========================
 
+_LOOKS_LIKE_BL_PATTERNS = [
+    r"bill\s*of\s*lading",  # Normal spacing
+    r"billoflading",  # Compacted from OCR-spaced text (B I L L   O F   L A D I N G)
+    r"b\s*[/|]?\s*l",
+    r"bl\s*(no|number)?",
+    r"blno",  # Compacted BL NO
+    r"ocean\s*bill",
+    r"oceanbill",  # Compacted
+    r"house\s*bill",
+    r"housebill",  # Compacted
+    r"master\s*bill",
+    r"masterbill",  # Compacted
+]
+# any(...) over the list is one search for the alternation
+_LOOKS_LIKE_BL_RX = re.compile("|".join(f"(?:{p})" for p in _LOOKS_LIKE_BL_PATTERNS))
+
+
 def looks_like_bl(text: str) -> bool:
     if not text:
         return False
 
-    T = text.lower()
-
-    patterns = [
-        r"bill\s*of\s*lading",  # Normal spacing
-        r"billoflading",  # Compacted from OCR-spaced text (B I L L   O F   L A D I N G)
-        r"b\s*[/|]?\s*l",
-        r"bl\s*(no|number)?",
-        r"blno",  # Compacted BL NO
-        r"ocean\s*bill",
-        r"oceanbill",  # Compacted
-        r"house\s*bill",
-        r"housebill",  # Compacted
-        r"master\s*bill",
-        r"masterbill",  # Compacted
-    ]
-
-    return any(re.search(p, T) for p in patterns)
+    return _LOOKS_LIKE_BL_RX.search(text.lower()) is not None
 
 
 # =========================
@@ -39,6 +46,8 @@ def looks_like_bl(text: str) -> bool:
 BL_LABEL_TOKEN_RE = r"(?:B\s*[/\\|I1L]?\s*L|BL|BIL|BILL\s+OF\s+LADING|BILLOFLADING)"
 BL_LABEL_QUALIFIER_RE = r"(?:NO|N[O0]|N°|NUMBER|NUM|REF|REFERENCE)"
 BL_VALUE_RE = r"([A-Z0-9][A-Z0-9\-_/\.]{5,24})"
+# every alternative starts with "B": DocumentIndex.search tries only those offsets
+_BL_LABEL_TOKEN_RX = re.compile(BL_LABEL_TOKEN_RE, re.IGNORECASE)
 
 BL_REGEXES = [
     # ========================================
@@ -85,110 +94,288 @@ BL_REGEXES = [
 # Split regex sets: first block are explicit labelled patterns, remainder are format/fallback patterns
 EXPLICIT_BL_REGEXES = BL_REGEXES[:8]
 
+# Token immediately after a BL label/qualifier pair (extract_explicit_bl_label_values)
+BL_LABEL_VALUE_REGEXES = [
+    rf"\b{BL_LABEL_TOKEN_RE}\s*\.?\s*{BL_LABEL_QUALIFIER_RE}\s*[:#,\-\.\s]*{BL_VALUE_RE}",
+    rf"\bBL\s*{BL_LABEL_QUALIFIER_RE}\s*[:#,\-\.\s]*{BL_VALUE_RE}",
+    rf"\b{BL_LABEL_TOKEN_RE}\s*[:#,\-\.\s]+{BL_VALUE_RE}",
+]
+
+# Every labelled pattern in one scan of the uppercased text; matches carry
+# their pattern id (label_value_<n>, explicit_bl_<n>). All of them start with
+# B (B/L, BILL), O, H or M (OCEAN / HOUSE / MASTER BILL).
+EXPLICIT_PATTERNS = PatternSet(
+    [(f"label_value_{i}", rx) for i, rx in enumerate(BL_LABEL_VALUE_REGEXES)]
+    + [(f"explicit_bl_{i}", rx) for i, rx in enumerate(EXPLICIT_BL_REGEXES)],
+    first_chars="BOHM",
+)
+# Format/fallback patterns, also matched on the uppercased text
+_FORMAT_BL_RXS = [re.compile(rx) for rx in BL_REGEXES[len(EXPLICIT_BL_REGEXES):]]
+
+_NON_ALNUM_RX = re.compile(r"[^A-Z0-9]")
+
 
 def _clean(c: str) -> str:
-    return re.sub(r"[^A-Z0-9]", "", c.upper())
+    return _NON_ALNUM_RX.sub("", c.upper())
+
+
+# =========================
+# CANDIDATE RECORDS
+# =========================
+
+# Where a candidate comes from, in pick_best_bl merge priority
+SOURCE_REPAIRED = 'repaired'  # SCAC and digits rejoined (repair_broken_candidates)
+SOURCE_EXPLICIT = 'explicit'  # value of a labelled pattern (B/L No., BILL OF LADING NO, ...)
+SOURCE_FORMAT = 'format'      # carrier/number format pattern, no label
+SOURCE_TOKEN = 'token'        # any 6-20 char token (extract_bl_candidates)
+
+
+class Candidate:
+    """One B/L candidate of a document, with where and how it was found.
+
+    - `value`: the normalized token, by which candidates are merged and scored;
+    - `raw`: the text it was first extracted from (e.g. "MEDU-1234567",
+      "MAEU\\n262802788");
+    - `spans`: the distinct (start, end) of its extractions, ascending, as
+      offsets in the uppercased text (`DocumentIndex.upper`) the context
+      lookups use;
+    - `sources`: the SOURCE_* extractors that produced it, first one first;
+    - `structurally_invalid`, `false_positive`, `iso6346`, `format_terms`:
+      document-independent facts about `value`, computed on first use and
+      kept, so the extraction filters and both scoring stages of
+      pick_best_bl share them.
+
+    Thousands are built per document: a record holds tuples and shares the
+    value string as `raw` when the token was extracted as it is.
+    """
+
+    __slots__ = ("value", "raw", "spans", "sources",
+                 "_structurally_invalid", "_false_positive", "_iso6346", "_format_terms")
+
+    def __init__(self, value: str, raw: str, source: str, span: Optional[Tuple[int, int]] = None):
+        self.value = value
+        self.raw = value if raw == value else raw
+        self.spans = (span,) if span is not None else ()
+        self.sources = (source,)
+        self._structurally_invalid = None
+        self._false_positive = None
+        self._iso6346 = None
+        self._format_terms = None
+
+    @property
+    def source(self) -> str:
+        return self.sources[0]
+
+    @property
+    def structurally_invalid(self) -> bool:
+        if self._structurally_invalid is None:
+            self._structurally_invalid = is_structurally_invalid_bl(self.value)
+        return self._structurally_invalid
+
+    @property
+    def false_positive(self) -> bool:
+        if self._false_positive is None:
+            self._false_positive = is_false_positive(self.value)
+        return self._false_positive
+
+    @property
+    def iso6346(self) -> bool:
+        if self._iso6346 is None:
+            self._iso6346 = is_iso6346(self.value)
+        return self._iso6346
+
+    @property
+    def format_terms(self) -> Tuple[int, Tuple[str, ...]]:
+        if self._format_terms is None:
+            self._format_terms = _format_terms(self.value)
+        return self._format_terms
+
+    def add_span(self, span: Tuple[int, int]) -> None:
+        spans = self.spans
+        i = bisect_left(spans, span)
+        if i == len(spans) or spans[i] != span:
+            self.spans = spans[:i] + (span,) + spans[i:]
+
+    def merge(self, other: "Candidate") -> None:
+        """Fold in another extraction of the same value."""
+        for span in other.spans:
+            self.add_span(span)
+        for source in other.sources:
+            if source not in self.sources:
+                self.sources += (source,)
+        if self._structurally_invalid is None:
+            self._structurally_invalid = other._structurally_invalid
+        if self._false_positive is None:
+            self._false_positive = other._false_positive
+        if self._iso6346 is None:
+            self._iso6346 = other._iso6346
+        if self._format_terms is None:
+            self._format_terms = other._format_terms
+
+    def __repr__(self) -> str:
+        return f"Candidate({self.value!r}, {self.source!r}, spans={self.spans!r})"
+
+
+def merge_candidates(*groups: Iterable[Candidate]) -> List[Candidate]:
+    """Candidates of all `groups`, one per value in first-seen order, each
+    holding the spans and sources of every extraction of its value."""
+    merged: Dict[str, Candidate] = {}
+    for group in groups:
+        for c in group:
+            if not c.value:
+                continue
+            known = merged.get(c.value)
+            if known is None:
+                merged[c.value] = c
+            else:
+                known.merge(c)
+    return list(merged.values())
+
+
+def _values(candidates: Iterable[Candidate]) -> List[str]:
+    return [c.value for c in candidates]
+
+
+def _label_value_candidates(matches) -> List[Candidate]:
+    found: Dict[str, Candidate] = {}
+    for m in sorted((m for m in matches if m.id.startswith('label_value_')), key=lambda m: m.index):
+        cleaned = _clean(m.value)
+        known = found.get(cleaned)
+        # the value group closes every label pattern
+        span = (m.end - len(m.value), m.end)
+        if known is not None:
+            known.add_span(span)
+            continue
+        c = Candidate(cleaned, m.value, SOURCE_EXPLICIT, span)
+        if (
+            6 <= len(cleaned) <= 20
+            and not c.structurally_invalid
+            and not c.false_positive
+        ):
+            found[cleaned] = c
+
+    log.info('extract_explicit_bl_label_values.found', extra={'count': len(found), 'samples': list(found)[:5]})
+    return list(found.values())
 
 
-def extract_explicit_bl_label_values(text: str) -> List[str]:
+def extract_explicit_bl_label_values(text: str, matches=None) -> List[str]:
     """Extract values that immediately follow an explicit BL label.
 
     OCR often mutates "B/L No." into forms like "BIL No", "B|L N0,"
     or "B / L No". This pass is intentionally narrow: it only returns
     the token immediately after a BL label/qualifier pair.
+    `matches` is the EXPLICIT_PATTERNS scan of the text when the caller
+    already has it.
     """
-    found = []
-    seen = set()
     if not text:
-        return found
+        return []
+    if matches is None:
+        matches = EXPLICIT_PATTERNS.scan(text.upper())
+    return _values(_label_value_candidates(matches))
 
-    patterns = [
-        rf"\b{BL_LABEL_TOKEN_RE}\s*\.?\s*{BL_LABEL_QUALIFIER_RE}\s*[:#,\-\.\s]*{BL_VALUE_RE}",
-        rf"\bBL\s*{BL_LABEL_QUALIFIER_RE}\s*[:#,\-\.\s]*{BL_VALUE_RE}",
-        rf"\b{BL_LABEL_TOKEN_RE}\s*[:#,\-\.\s]+{BL_VALUE_RE}",
-    ]
 
-    for rx in patterns:
-        for m in re.finditer(rx, text, flags=re.IGNORECASE):
-            value = m.group(1)
-            cleaned = _clean(value)
-            if (
-                6 <= len(cleaned) <= 20
-                and not is_structurally_invalid_bl(cleaned)
-                and not is_false_positive(cleaned)
-                and cleaned not in seen
-            ):
-                seen.add(cleaned)
-                found.append(cleaned)
+def extract_bl_numbers(text: str, only_explicit: bool = False) -> List[str]:
+    return _values(extract_bl_number_records(text, only_explicit))
 
-    log.info('extract_explicit_bl_label_values.found', extra={'count': len(found), 'samples': found[:5]})
-    return found
 
+def extract_bl_number_records(text, only_explicit: bool = False) -> List[Candidate]:
+    """extract_bl_numbers as Candidate records. `text` may be the shared
+    DocumentIndex of the document (index_document)."""
+    doc = index_document(text)
+    log.info('extract_bl_numbers.start', extra={'text_len': len(doc.text)})
 
-def extract_bl_numbers(text: str, only_explicit: bool = False) -> List[str]:
-    found = []
-    seen = set()
-    log.info('extract_bl_numbers.start', extra={'text_len': len(text or '')})
-
-    for v in extract_explicit_bl_label_values(text):
-        if v not in seen:
-            seen.add(v)
-            found.append(v)
-
-    regexes = EXPLICIT_BL_REGEXES if only_explicit else BL_REGEXES
-    for rx in regexes:
-        for m in re.findall(rx, text or "", flags=re.IGNORECASE):
-            val = m[-1] if isinstance(m, tuple) else m
-            if not val:
-                continue
-            v = _clean(val)
-            # Ignore obvious container numbers (ISO 6346) so we don't mistake
-            # them for BL numbers
-            if is_iso6346(v):
-                log.info('extract_bl_numbers.container_like', extra={'value': v})
-                # do not hard-reject here; leave decision to scoring
-
-            # Skip if the token appears inside a container-list section
-            if is_within_container_section(text, v):
-                log.info('extract_bl_numbers.within_container_section', extra={'value': v})
-                # do not hard-reject here; leave decision to scoring
-
-            # structural and false-positive filter
-            if is_structurally_invalid_bl(v):
-                log.info('extract_bl_numbers.filtered_structural', extra={'value': v})
-                continue
-            if is_false_positive(v):
-                log.info('extract_bl_numbers.filtered_false_positive', extra={'value': v})
-                continue
-            if 6 <= len(v) <= 20 and v not in seen:
-                seen.add(v)
-                found.append(v)
+    # one scan yields both the label values and the explicit pattern matches
+    matches = EXPLICIT_PATTERNS.scan(doc.upper)
+    found: Dict[str, Candidate] = {c.value: c for c in _label_value_candidates(matches)}
 
-    log.info('extract_bl_numbers.found', extra={'count': len(found), 'samples': found[:5]})
-    return found
+    values = [
+        Candidate(_clean(m.value), m.value, SOURCE_EXPLICIT, (m.end - len(m.value), m.end))
+        for m in sorted((m for m in matches if m.id.startswith('explicit_bl_')), key=lambda m: m.index)
+    ]
+    if not only_explicit:
+        for rx in _FORMAT_BL_RXS:
+            values.extend(Candidate(_clean(m.group(0)), m.group(0), SOURCE_FORMAT, m.span()) for m in rx.finditer(doc.upper))
+    doc.locate(c.value for c in values)
+    rejected = set()
+    for c in values:
+        v = c.value
+        if not c.raw or v in rejected:
+            continue
+        known = found.get(v)
+        if known is not None:
+            known.merge(c)
+            continue
+        # Ignore obvious container numbers (ISO 6346) so we don't mistake
+        # them for BL numbers
+        if c.iso6346:
+            log.info('extract_bl_numbers.container_like', extra={'value': v})
+            # do not hard-reject here; leave decision to scoring
+
+        # Skip if the token appears inside a container-list section
+        if is_within_container_section(doc, v):
+            log.info('extract_bl_numbers.within_container_section', extra={'value': v})
+            # do not hard-reject here; leave decision to scoring
+
+        # structural and false-positive filter
+        if c.structurally_invalid:
+            log.info('extract_bl_numbers.filtered_structural', extra={'value': v})
+            rejected.add(v)
+            continue
+        if c.false_positive:
+            log.info('extract_bl_numbers.filtered_false_positive', extra={'value': v})
+            rejected.add(v)
+            continue
+        if 6 <= len(v) <= 20:
+            found[v] = c
+        else:
+            rejected.add(v)
+
+    log.info('extract_bl_numbers.found', extra={'count': len(found), 'samples': list(found)[:5]})
+    return list(found.values())
 
 
 # =========================
 # FALLBACK CANDIDATES
 # =========================
 
+_CANDIDATE_TOKEN_RX = re.compile(r"\b[A-Z0-9\-_/]{6,20}\b", re.IGNORECASE)
+
+
 def extract_bl_candidates(text: str) -> List[str]:
-    candidates = []
+    return _values(extract_bl_candidate_records(text))
+
+
+def extract_bl_candidate_records(text) -> List[Candidate]:
+    """extract_bl_candidates as Candidate records. `text` may be the
+    shared DocumentIndex of the document (index_document)."""
+    doc = index_document(text)
+    found: Dict[str, Candidate] = {}
+    rejected = set()
     # text must be normalized by the caller; do not re-normalize here
-    for m in re.finditer(r"\b[A-Z0-9\-_/]{6,20}\b", text or "", flags=re.IGNORECASE):
+    for m in _CANDIDATE_TOKEN_RX.finditer(doc.text):
         c = _clean(m.group(0))
-        if 6 <= len(c) <= 20:
-            # structural filter: skip obvious non-BL tokens
-            if is_structurally_invalid_bl(c):
-                log.info('extract_bl_candidates.filtered_structural', extra={'value': c})
-                continue
-            if is_false_positive(c):
-                log.info('extract_bl_candidates.filtered_false_positive', extra={'value': c})
-                continue
-            candidates.append(c)
+        if c in rejected or not 6 <= len(c) <= 20:
+            continue
+        start, end = doc.upper_offset(m.start()), doc.upper_offset(m.end())
+        known = found.get(c)
+        if known is not None:
+            known.add_span((start, end))
+            continue
+        candidate = Candidate(c, m.group(0), SOURCE_TOKEN, (start, end))
+        # structural filter: skip obvious non-BL tokens
+        if candidate.structurally_invalid:
+            log.info('extract_bl_candidates.filtered_structural', extra={'value': c})
+            rejected.add(c)
+            continue
+        if candidate.false_positive:
+            log.info('extract_bl_candidates.filtered_false_positive', extra={'value': c})
+            rejected.add(c)
+            continue
+        found[c] = candidate
+    return list(found.values())
 
-    seen = set()
-    return [c for c in candidates if not (c in seen or seen.add(c))]
+
+_YEAR_RX = re.compile(r'^(19|20)\d{2}$')
 
 
 def is_false_positive(c: str) -> bool:
@@ -208,7 +395,7 @@ def is_false_positive(c: str) -> bool:
         return True
     
     # Dates: 4-digit years (1900-2099)
-    if re.match(r'^(19|20)\d{2}$', c):
+    if _YEAR_RX.match(c):
         return True
     
     # Dates: 6-digit dates (YYMMDD, MMDDYY patterns - very common false positive)
@@ -230,6 +417,13 @@ def is_false_positive(c: str) -> bool:
 # -------------------------
 # OCR reconstruction & scoring helpers
 # -------------------------
+_SHORT_TOKEN_RX = re.compile(r'^[A-Za-z0-9\-_/]+$')
+_SPACED_DIGITS_RX = re.compile(r'(?<=\d)\s+(?=\d)')
+_INNER_PUNCT_RX = re.compile(r'(?<=[A-Za-z0-9])[\.,](?=[A-Za-z0-9])')
+_DASH_RUN_RX = re.compile(r'[-]{2,}')
+_SLASH_RUN_RX = re.compile(r'[/]{2,}')
+
+
 def _ocr_reconstruct(text: str) -> str:
     """
     Conservative OCR reconstruction:
@@ -248,7 +442,7 @@ def _ocr_reconstruct(text: str) -> str:
         ln = lines[i].strip()
         if i + 1 < len(lines):
             nxt = lines[i+1].strip()
-            if ln and nxt and len(ln) <= 4 and len(nxt) <= 6 and re.match(r'^[A-Za-z0-9\-_/]+$', ln) and re.match(r'^[A-Za-z0-9\-_/]+$', nxt):
+            if ln and nxt and len(ln) <= 4 and len(nxt) <= 6 and _SHORT_TOKEN_RX.match(ln) and _SHORT_TOKEN_RX.match(nxt):
                 out_lines.append(ln + nxt)
                 i += 2
                 continue
@@ -256,13 +450,21 @@ def _ocr_reconstruct(text: str) -> str:
         i += 1
 
     s2 = ' '.join([l for l in out_lines if l])
-    s2 = re.sub(r'(?<=\d)\s+(?=\d)', '', s2)
-    s2 = re.sub(r'(?<=[A-Za-z0-9])[\.,](?=[A-Za-z0-9])', '', s2)
-    s2 = re.sub(r'[-]{2,}', '-', s2)
-    s2 = re.sub(r'[/]{2,}', '/', s2)
+    s2 = _SPACED_DIGITS_RX.sub('', s2)
+    s2 = _INNER_PUNCT_RX.sub('', s2)
+    s2 = _DASH_RUN_RX.sub('-', s2)
+    s2 = _SLASH_RUN_RX.sub('/', s2)
     return s2
 
 
+_TOKEN_JUNK_RX = re.compile(r'[^A-Z0-9\-_/]')
+
+
+@lru_cache(maxsize=None)
+def _token_rx(min_len: int, max_len: int):
+    return re.compile(r"[A-Za-z0-9][A-Za-z0-9\-_/]{%d,%d}" % (min_len-1, max_len-1))
+
+
 def _generate_candidates(text: str, min_len: int = 6, max_len: int = 20) -> List[str]:
     """
     Permissive candidate extraction: tokens of letters/digits and -_/ chars.
@@ -270,12 +472,11 @@ def _generate_candidates(text: str, min_len: int = 6, max_len: int = 20) -> List
     """
     if not text:
         return []
-    token_rx = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-_/]{%d,%d}" % (min_len-1, max_len-1))
     seen = set(); out = []
-    for m in token_rx.finditer(text):
+    for m in _token_rx(min_len, max_len).finditer(text):
         tok = m.group(0).upper().strip('-_/')
-        tok = re.sub(r'[^A-Z0-9\-_/]', '', tok)
-        norm = re.sub(r'[^A-Z0-9]', '', tok)
+        tok = _TOKEN_JUNK_RX.sub('', tok)
+        norm = _NON_ALNUM_RX.sub('', tok)
         if not (min_len <= len(norm) <= max_len):
             continue
         if tok in seen:
@@ -284,36 +485,46 @@ def _generate_candidates(text: str, min_len: int = 6, max_len: int = 20) -> List
     return out
 
 
-def _detect_context_score(text: str, token: str) -> int:
-    """Score proximity to BL keywords (explainable buckets)."""
+_BL_CONTEXT_RX = re.compile(r'\bB\s*[/\\-]?\s*L\b|BILL\s+OF\s+LADING|BL\s*(NO|NUMBER|REF|REFERENCE)')
+_BL_REFERENCE_RX = re.compile(r'\bBL\s+REF|REFERENCE|REF\b')
+_BL_TITLE_RX = re.compile(r'\bBILL\s+OF\s+LADING|B\/L|OCEAN\s+BILL|HOUSE\s+BILL')
+_WEIGHT_OR_SEAL_RX = re.compile(r'\bKG\b|\bKGS\b|\bTONS?\b|\bWEIGHT\b|\bSEAL\b')
+_ALPHA_RX = re.compile(r'[A-Z]')
+_DIGIT_RX = re.compile(r'\d')
+
+
+def _detect_context_score(text, token: str) -> int:
+    """Score proximity to BL keywords (explainable buckets).
+
+    `text` may be a DocumentIndex shared across candidates."""
     score = 0
     if not text or not token:
         return 0
-    T = text.upper(); token_u = token.upper()
-    pos = T.find(token_u)
-    if pos == -1:
+    doc = index_document(text)
+    span = doc.window(token, 80, 80)
+    if span is None:
         return 0
-    window = T[max(0, pos-80): pos + len(token_u) + 80]
-    if re.search(r'\bB\s*[/\\-]?\s*L\b|BILL\s+OF\s+LADING|BL\s*(NO|NUMBER|REF|REFERENCE)', window):
+    window = doc.upper[span[0]: span[1]]
+    if _BL_CONTEXT_RX.search(window):
         score += 60
-    elif re.search(r'\bBL\s+REF|REFERENCE|REF\b', window):
+    elif _BL_REFERENCE_RX.search(window):
         score += 30
-    if re.search(r'\bBILL\s+OF\s+LADING|B\/L|OCEAN\s+BILL|HOUSE\s+BILL', T):
+    if doc.memo('bl_title', lambda: bool(_BL_TITLE_RX.search(doc.upper))):
         score += 15
     return score
 
 
-def _score_candidate(token: str, text: str) -> (float, List[str]):
-    """Explainable scoring for a candidate token."""
+def _score_candidate(token: str, text) -> (float, List[str]):
+    """Explainable scoring for a candidate token (`text` may be a DocumentIndex)."""
     reasons = []; base = 0.0
-    raw = re.sub(r'[^A-Z0-9]', '', token.upper()); L = len(raw)
+    raw = _NON_ALNUM_RX.sub('', token.upper()); L = len(raw)
     if 6 <= L <= 12:
         base += 0.20; reasons.append('valid_length')
     elif 13 <= L <= 20:
         base += 0.05; reasons.append('long_but_possible')
     else:
         reasons.append('invalid_length')
-    has_alpha = bool(re.search(r'[A-Z]', raw)); has_digit = bool(re.search(r'\d', raw))
+    has_alpha = bool(_ALPHA_RX.search(raw)); has_digit = bool(_DIGIT_RX.search(raw))
     if has_alpha and has_digit:
         base += 0.20; reasons.append('alpha_numeric')
     elif has_digit and not has_alpha:
@@ -326,16 +537,16 @@ def _score_candidate(token: str, text: str) -> (float, List[str]):
     except Exception:
         pass
     # local weight/seal penalty
-    txt_up = text.upper()
-    idx = txt_up.find(token.upper())
-    local = txt_up[max(0, idx-40): idx + len(token) + 40] if idx != -1 else ''
-    if re.search(r'\bKG\b|\bKGS\b|\bTONS?\b|\bWEIGHT\b|\bSEAL\b', local):
+    doc = index_document(text)
+    span = doc.window(token, 40, 40)
+    local = doc.upper[span[0]: span[1]] if span else ''
+    if _WEIGHT_OR_SEAL_RX.search(local):
         reasons.append('near_weight_or_seal'); base -= 0.4
-    ctx = _detect_context_score(text, token)
+    ctx = _detect_context_score(doc, token)
     if ctx >= 60: reasons.append('near_bl_keyword')
     elif ctx >= 30: reasons.append('near_bl_reference')
     base += (ctx / 200.0)
-    occurrences = len(re.findall(re.escape(token), text, flags=re.IGNORECASE))
+    occurrences = doc.count(token, case_sensitive=False)
     if occurrences == 1:
         base += 0.10; reasons.append('unique')
     else:
@@ -346,11 +557,15 @@ def _score_candidate(token: str, text: str) -> (float, List[str]):
 
 
 
+_ISO_CONTAINER_RX = re.compile(r'\b([A-Z]{4}\d{7})\b', re.IGNORECASE)
+_CONTAINER_LIKE_RX = re.compile(r'\b([A-Z0-9]{4,12}[-_ ]?[0-9]{4,8})\b', re.IGNORECASE)
+
+
 def extract_containers(text: str) -> List[str]:
     """Extract container numbers like HASU5143253 or MSKU1234567."""
     containers = []
     # ISO container: 4 letters + 7 digits (validate check digit)
-    for m in re.finditer(r'\b([A-Z]{4}\d{7})\b', text or '', flags=re.IGNORECASE):
+    for m in _ISO_CONTAINER_RX.finditer(text or ''):
         cand = m.group(1).upper()
         if is_iso6346(cand):
             containers.append(cand)
@@ -358,7 +573,7 @@ def extract_containers(text: str) -> List[str]:
             log.info('extract_containers.invalid_iso', extra={'candidate': cand})
 
     # fallback patterns e.g. HASU5143253 or with separators - validate ISO6346
-    for m in re.finditer(r'\b([A-Z0-9]{4,12}[-_ ]?[0-9]{4,8})\b', text or '', flags=re.IGNORECASE):
+    for m in _CONTAINER_LIKE_RX.finditer(text or ''):
         c = m.group(1).replace(' ', '').replace('-', '').replace('_', '').upper()
         # prefer ISO-validated containers only
         if len(c) == 11 and is_iso6346(c):
@@ -374,19 +589,21 @@ def extract_containers(text: str) -> List[str]:
     return out
 
 
-def is_within_container_section(text: str, token: str, lookback: int = 200) -> bool:
+def is_within_container_section(text, token: str, lookback: int = 200) -> bool:
     """Return True if token occurs in a region likely labeled as container numbers.
 
     We search backwards from the token occurrence up to `lookback` characters to
     find headings like 'container', 'container numbers', 'container no', etc.
+    `text` may be a DocumentIndex shared across candidates.
     """
-    idx = (text or '').find(token)
+    doc = index_document(text)
+    idx = doc.first(token)
     if idx == -1:
         return False
-    start = max(0, idx - lookback)
-    context = (text or '')[start:idx].lower()
-    indicators = ['container', 'container no', 'container numbers', 'container nos', 'containers']
-    return any(ind in context for ind in indicators)
+    return doc.contains_class('container_section', idx - lookback, idx)
+
+
+_ISO6346_RX = re.compile(r'^([A-Z]{4})(\d{6})(\d)$')
 
 
 def is_iso6346(c: str) -> bool:
@@ -400,7 +617,7 @@ def is_iso6346(c: str) -> bool:
     """
     if not c or len(c) != 11:
         return False
-    m = re.match(r'^([A-Z]{4})(\d{6})(\d)$', c)
+    m = _ISO6346_RX.match(c)
     if not m:
         return False
     owner = m.group(1)
@@ -432,139 +649,75 @@ def is_iso6346(c: str) -> bool:
     return computed == check_digit
 
 
-def has_explicit_bl_label_near(text: str, token: str, window: int = 80) -> bool:
-    T = (text or '').upper()
-    tok = token.upper()
-    idx = T.find(tok)
-    if idx == -1:
-        return False
+# The context helpers below take the document text or a DocumentIndex built
+# once per document (pick_best_bl shares one across all candidates); they
+# look at the first occurrence of the token, case-insensitively.
 
-    start = max(0, idx - window)
-    end = min(len(T), idx + len(tok) + window)
-    context = T[start:end]
+def has_explicit_bl_label_near(text, token: str, window: int = 80) -> bool:
+    doc = index_document(text)
+    span = doc.window(token, window, window)
+    if span is None:
+        return False
 
     # ⚠️ UNIQUEMENT les labels BL légitimes
-    labels = [
-        "BILL OF LADING",
-        "BILLOFLADING",
-        "B/L",
-        "BIL NO",
-        "BIL N0",
-        "BL NO",
-        "BL N0",
-        "BL NUMBER",
-        "BLNO",
-        "OCEAN BILL",
-        "HOUSE BILL",
-        "MASTER BILL",
-    ]
-
-    if any(lbl in context for lbl in labels):
+    if doc.contains_class('explicit_bl_label', *span):
         return True
 
-    return bool(re.search(rf"{BL_LABEL_TOKEN_RE}\s*\.?\s*(?:{BL_LABEL_QUALIFIER_RE})?", context, flags=re.IGNORECASE))
+    # the qualifier is optional: a bare BL label token is enough
+    return doc.search(_BL_LABEL_TOKEN_RX, *span, anchor="B")
 
 
-def is_in_forbidden_bl_context(text: str, token: str, window: int = 80) -> bool:
-    T = (text or '').upper()
-    tok = token.upper()
-    idx = T.find(tok)
+def is_in_forbidden_bl_context(text, token: str, window: int = 80) -> bool:
+    doc = index_document(text)
+    idx = doc.first(token)
     if idx == -1:
         return False
-
-    start = max(0, idx - window)
-    context = T[start:idx]
-
-    forbidden = [
-        "SEAL",
-        "SEAL NO",
-        "CARRIER",
-        "CARRIER SEAL",
-        "CONTAINER",
-        "BOOKING",
-        "IMO",
-        "VOYAGE",
-    ]
-
-    return any(f in context for f in forbidden)
+    return doc.contains_class('forbidden_bl', idx - window, idx)
 
 
-def is_seal_number_context(text: str, token: str, window: int = 80) -> bool:
-    T = (text or '').upper()
-    tok = token.upper()
-    idx = T.find(tok)
-    if idx == -1:
-        return False
-    context = T[max(0, idx - window): idx + window]
-    return any(k in context for k in [
-        'SEAL',
-        'SEAL NUMBER',
-        'CARRIER',
-        'CONTAINER NUMBERS'
-    ])
-
-
-def is_tax_or_fiscal_context(text: str, token: str, window: int = 80) -> bool:
-    T = (text or '').upper()
-    tok = token.upper()
-    idx = T.find(tok)
+def is_seal_number_context(text, token: str, window: int = 80) -> bool:
+    doc = index_document(text)
+    idx = doc.first(token)
     if idx == -1:
         return False
+    return doc.contains_class('seal', idx - window, idx + window)
 
-    context = T[max(0, idx - window): idx + window]
 
-    forbidden = [
-        'TAX ID',
-        'VAT',
-        'NIF',
-        'TIN',
-        'FISCAL',
-        'CUSTOMER CODE',
-        'REGISTRATION NO',
-    ]
-
-    return any(f in context for f in forbidden)
+def is_tax_or_fiscal_context(text, token: str, window: int = 80) -> bool:
+    doc = index_document(text)
+    idx = doc.first(token)
+    if idx == -1:
+        return False
+    return doc.contains_class('tax_or_fiscal', idx - window, idx + window)
 
 
-def is_in_port_or_voyage_context(text: str, token: str, window: int = 80) -> bool:
+def is_in_port_or_voyage_context(text, token: str, window: int = 80) -> bool:
     """Return True if token appears near port/voyage labels (false positive context)."""
     if not text or not token:
         return False
-    
-    T = text.upper()
-    tok = token.upper()
-    idx = T.find(tok)
+    doc = index_document(text)
+    idx = doc.first(token)
     if idx == -1:
         return False
-    
-    # Check context before the token
-    start = max(0, idx - window)
-    context = T[start:idx]
-    
-    # Forbidden contexts (port, voyage, vessel identifiers)
-    forbidden = [
-        'PORT OF LOADING',
-        'PORT OF DISCHARGE',
-        'VOYAGE NO',
-        'VESSEL',
-        'IMO NO',
-        'SERVICE CONTRACT',
-        'SVC CONTRACT',
-    ]
-    
-    return any(f in context for f in forbidden)
+    # Check context before the token (port, voyage, vessel identifiers)
+    return doc.contains_class('port_or_voyage', idx - window, idx)
+
+
+_SEAL_LABEL_RX = re.compile(r'\bSEAL\b[:#\-\s]*([A-Z0-9\-_/]{3,20})', re.IGNORECASE)
+_SEAL_LIKE_RX = re.compile(r'\b([A-Z]{2,4}[-_]?[A-Z0-9]{4,12})\b', re.IGNORECASE)
 
 
 def extract_seals(text: str) -> List[str]:
     """Extract seal numbers with common prefixes or adjacent to the word 'Seal'."""
     seals = []
-    for m in re.finditer(r'\bSEAL\b[:#\-\s]*([A-Z0-9\-_/]{3,20})', text or '', flags=re.IGNORECASE):
+    for m in _SEAL_LABEL_RX.finditer(text or ''):
         seals.append(m.group(1).upper())
 
     # generic tokens that may be seals — only accept if surrounding context suggests a Seal
-    for m in re.finditer(r'\b([A-Z]{2,4}[-_]?[A-Z0-9]{4,12})\b', text or '', flags=re.IGNORECASE):
+    doc = index_document(text)
+    for m in _SEAL_LIKE_RX.finditer(text or ''):
         token = m.group(1).upper()
-        if is_seal_number_context(text, token):
+        if is_seal_number_context(doc, token):
             seals.append(token)
 
     seen = set(); out = []
@@ -576,14 +729,18 @@ def extract_seals(text: str) -> List[str]:
     return out
 
 
+_WEIGHT_RX = re.compile(r'([0-9]{1,3}(?:[0-9\,\.\s]{0,15})?)\s*(KGS|KG|KILOGRAMS?)', re.IGNORECASE)
+_ASCII_DIGIT_RX = re.compile(r'[0-9]')
+
+
 def extract_weight(text: str) -> Optional[str]:
     # match patterns like '18000.000 KGS' or '18,000 KGS' or '18000 KGS'
-    m = re.search(r'([0-9]{1,3}(?:[0-9\,\.\s]{0,15})?)\s*(KGS|KG|KILOGRAMS?)', text or '', flags=re.IGNORECASE)
+    m = _WEIGHT_RX.search(text or '')
     if m:
         return m.group(0).replace('\n', ' ').strip()
     for line in (text or '').split('\n'):
         if 'KGS' in line.upper() or 'KG' in line.upper():
-            if re.search(r'[0-9]', line):
+            if _ASCII_DIGIT_RX.search(line):
                 return line.strip()
     log.info('extract_weight.found', extra={'value': m.group(0).replace('\n', ' ').strip()}) if m else log.info('extract_weight.none')
     return None
@@ -623,26 +780,78 @@ BOOKING_LABELS = [
     'BOOKING NUMBER',
 ]
 
+# Label vocabularies of the context checks, one class per check. They are
+# compiled into a single Aho-Corasick automaton: a DocumentIndex finds every
+# keyword of every class in one pass over the document, then each check is
+# an interval query on the hits of its class. Adding keywords does not make
+# the checks slower. (BLACKLIST is an exact-token test, not a label search.)
+LABEL_CLASSES = {
+    # has_explicit_bl_label_near
+    'explicit_bl_label': [
+        'BILL OF LADING', 'BILLOFLADING', 'B/L', 'BIL NO', 'BIL N0', 'BL NO', 'BL N0', 'BL NUMBER', 'BLNO',
+        'OCEAN BILL', 'HOUSE BILL', 'MASTER BILL',
+    ],
+    # candidate_near_bl_keyword
+    'bl_keyword': [
+        'BILL OF LADING', 'BILLOFLADING', 'B/L', 'BIL NO', 'BIL N0', 'BL NO', 'BL N0', 'BLNO', 'B L',
+        'OCEAN BILL', 'HOUSE BILL', 'MASTER BILL',
+    ],
+    # is_in_forbidden_bl_context (before the token)
+    'forbidden_bl': ['SEAL', 'SEAL NO', 'CARRIER', 'CARRIER SEAL', 'CONTAINER', 'BOOKING', 'IMO', 'VOYAGE'],
+    # is_seal_number_context
+    'seal': ['SEAL', 'SEAL NUMBER', 'CARRIER', 'CONTAINER NUMBERS'],
+    # is_tax_or_fiscal_context
+    'tax_or_fiscal': ['TAX ID', 'VAT', 'NIF', 'TIN', 'FISCAL', 'CUSTOMER CODE', 'REGISTRATION NO'],
+    # is_in_port_or_voyage_context (before the token)
+    'port_or_voyage': [
+        'PORT OF LOADING', 'PORT OF DISCHARGE', 'VOYAGE NO', 'VESSEL', 'IMO NO', 'SERVICE CONTRACT', 'SVC CONTRACT',
+    ],
+    # is_within_container_section (before the token)
+    'container_section': ['CONTAINER', 'CONTAINER NO', 'CONTAINER NUMBERS', 'CONTAINER NOS', 'CONTAINERS'],
+    # pick_best_bl
+    'bl_labels': BL_LABELS,
+    'booking_labels': BOOKING_LABELS,
+    'draft_bl': ['DRAFT BILL', 'DRAFT B/L', 'FINAL BL WILL BE READY'],
+    'draft_context': DRAFT_CONTEXT,
+    'bl_no_phrases': ['B/L NO', 'BILL OF LADING NO'],
+}
+
+LABEL_SCANNER = KeywordScanner(LABEL_CLASSES)
+
 MIN_SCORE = 45
 MIN_MARGIN = 5
+# Cascade scoring (pick_best_bl): candidates are first ranked on an upper
+# bound of their score, then only the best CASCADE_TOP_K at a time get the
+# exact context checks, which search the document. None scores every
+# candidate.
+CASCADE_TOP_K = 40
 
 
 # ===================== FONCTION PRINCIPALE =====================
 
-def candidate_near_phrase(text: str, token: str, phrase: str, window: int = 60) -> bool:
+def index_document(text) -> DocumentIndex:
+    """DocumentIndex over `text` with the parser's label scanner, to share
+    across the context helpers of all candidates of one document; `text`
+    itself when it already is an index."""
+    doc = DocumentIndex.coerce(text, LABEL_SCANNER)
+    if doc.scanner is None:
+        doc.scanner = LABEL_SCANNER  # index built without one: label classes need it
+    return doc
+
+
+def _near_class(doc: DocumentIndex, token: str, name: str, window: int) -> bool:
+    """Whether a label of class `name` occurs within `window` chars of `token`."""
+    span = doc.window(token, window, window)
+    return span is not None and doc.contains_class(name, *span)
+
+
+def candidate_near_phrase(text, token: str, phrase: str, window: int = 60) -> bool:
     """Return True if `phrase` occurs within `window` chars of `token` in `text`."""
     if not text or not token or not phrase:
         return False
-    T = (text or '').upper()
-    tok = token.upper()
-    ph = phrase.upper()
-    idx = T.find(tok)
-    if idx == -1:
-        return False
-    start = max(0, idx - window)
-    end = min(len(T), idx + len(tok) + window)
-    context = T[start:end]
-    return ph in context
+    doc = index_document(text)
+    span = doc.window(token, window, window)
+    return span is not None and doc.contains(phrase.upper(), *span)
 
 
 def is_structurally_invalid_bl(token: str) -> bool:
@@ -658,7 +867,7 @@ def is_structurally_invalid_bl(token: str) -> bool:
         return True
 
     # normalize (keep only letters+digits for structural checks)
-    t = re.sub(r'[^A-Z0-9]', '', token.upper())
+    t = _NON_ALNUM_RX.sub('', token.upper())
 
     # length check
     if len(t) < 6 or len(t) > 20:
@@ -706,24 +915,30 @@ def pick_best_bl_v2(text: str) -> Optional[dict]:
         if not text:
             return None
         reconstructed = _ocr_reconstruct(text)
+        # one index for the extractors and every context lookup
+        doc = index_document(reconstructed)
         # candidate pool
-        candidates = extract_bl_numbers(reconstructed, only_explicit=False) + extract_bl_candidates(reconstructed)
+        candidates = _values(extract_bl_number_records(doc)) + _values(extract_bl_candidate_records(doc))
+        known = set(candidates)
         # add permissive candidates
         for c in _generate_candidates(reconstructed):
-            if c not in candidates:
+            if c not in known:
+                known.add(c)
                 candidates.append(c)
 
         # include repaired tokens if helper available
         try:
             for r in repair_broken_candidates(text):
-                if r and r not in candidates:
+                if r and r not in known:
+                    known.add(r)
                     candidates.append(r)
         except Exception:
             pass
 
+        doc.locate(candidates)
         scored = []
         for c in candidates:
-            s, reasons = _score_candidate(c, reconstructed)
+            s, reasons = _score_candidate(c, doc)
             scored.append({'candidate': c, 'score': s, 'reasons': reasons})
 
         scored.sort(key=lambda x: x['score'], reverse=True)
@@ -750,6 +965,17 @@ def pick_best_bl_v2(text: str) -> Optional[dict]:
         return None
 
 
+# Common carrier SCACs (expand as needed)
+KNOWN_SCACS = ['MAEU', 'MEDU', 'MSCU', 'CMAU', 'COSU', 'HLCU', 'ONEY', 'SEGU']
+# SCAC as standalone token (word boundary or on its own line), in list order
+_SCAC_RXS = [(scac, re.compile(rf'\b{scac}\b')) for scac in KNOWN_SCACS]
+_DIGITS_LINE_RX = re.compile(r'^\d{6,15}$')
+_WIDE_GAP_RX = re.compile(r'\s{2,}')
+_TRAILING_SCAC_RX = re.compile(r'([A-Z]{4})$')
+_LEADING_DIGITS_RX = re.compile(r'^(\d{6,15})')
+_LINE_RX = re.compile(r'[^\n]+')
+
+
 def detect_scac(text: str) -> Optional[str]:
     """Detect a global SCAC prefix in the document, even if isolated on its own line.
     
@@ -762,12 +988,8 @@ def detect_scac(text: str) -> Optional[str]:
     # Extended header zone to catch SCAC appearing early in document
     header = (text or '')[:1200].upper()
     
-    # Common carrier SCACs (expand as needed)
-    KNOWN_SCACS = ['MAEU', 'MEDU', 'MSCU', 'CMAU', 'COSU', 'HLCU', 'ONEY', 'SEGU']
-    
-    for scac in KNOWN_SCACS:
-        # Match SCAC as standalone token (word boundary or on its own line)
-        if re.search(rf'\b{scac}\b', header):
+    for scac, rx in _SCAC_RXS:
+        if rx.search(header):
             log.info('detect_scac.found', extra={'scac': scac})
             return scac
     
@@ -782,18 +1004,51 @@ def repair_broken_candidates(text: str) -> List[str]:
         262802788
     Should become: MAEU262802788
     """
-    repaired = []
+    return _values(repair_broken_candidate_records(text))
+
+
+def _wide_gap_pieces(line: str) -> List[Tuple[int, str]]:
+    """(offset, piece) of `line` split on runs of 2+ spaces."""
+    out, pos = [], 0
+    for gap in _WIDE_GAP_RX.finditer(line):
+        out.append((pos, line[pos:gap.start()]))
+        pos = gap.end()
+    out.append((pos, line[pos:]))
+    return out
+
+
+def repair_broken_candidate_records(text) -> List[Candidate]:
+    """repair_broken_candidates as Candidate records, spanning from the SCAC
+    to the end of the digits. `text` may be the shared DocumentIndex of the
+    document (index_document)."""
+    repaired: Dict[str, Candidate] = {}
     if not text:
-        return repaired
-    lines = [l.strip() for l in text.split('\n') if l.strip()]
-    KNOWN_SCACS = ['MAEU', 'MEDU', 'MSCU', 'CMAU', 'COSU', 'HLCU', 'ONEY', 'SEGU']
+        return []
+    doc = index_document(text)
+    text = doc.text
+
+    def found(value: str, start: int, end: int) -> None:
+        span = (doc.upper_offset(start), doc.upper_offset(end))
+        if value in repaired:
+            repaired[value].add_span(span)
+        else:
+            repaired[value] = Candidate(value, text[start:end], SOURCE_REPAIRED, span)
+
+    # (offset, line) of the non-blank lines, stripped
+    lines = []
+    for m in _LINE_RX.finditer(text):
+        raw_line = m.group(0)
+        stripped = raw_line.strip()
+        if stripped:
+            lines.append((m.start() + len(raw_line) - len(raw_line.lstrip()), stripped))
     for i in range(len(lines) - 1):
-        current = lines[i].upper().strip()
-        next_line = lines[i + 1].upper().strip()
+        (at, line), (next_at, next_raw) = lines[i], lines[i + 1]
+        current = line.upper()
+        next_line = next_raw.upper()
         # Case 1: Current line is exactly a SCAC, next line is 6-15 digits
-        if current in KNOWN_SCACS and re.match(r'^\d{6,15}$', next_line):
+        if current in KNOWN_SCACS and _DIGITS_LINE_RX.match(next_line):
             reconstructed = current + next_line
-            repaired.append(reconstructed)
+            found(reconstructed, at, next_at + len(next_raw))
             log.info('repair_broken_candidates.scac_digits', extra={
                 'scac': current,
                 'digits': next_line,
@@ -802,97 +1057,124 @@ def repair_broken_candidates(text: str) -> List[str]:
         
         # 🆕 Case 2: SCAC and digits on SAME line but separated by spaces/tabs
         # Example: "MAEU          262802788"
-        tokens = re.split(r'\s{2,}', current)
-        if len(tokens) >= 2:
-            for j in range(len(tokens) - 1):
-                if tokens[j] in KNOWN_SCACS and re.match(r'^\d{6,15}$', tokens[j+1]):
-                    reconstructed = tokens[j] + tokens[j+1]
-                    repaired.append(reconstructed)
+        pieces = _wide_gap_pieces(line)
+        if len(pieces) >= 2:
+            for j in range(len(pieces) - 1):
+                (start, scac), (digits_at, digits) = pieces[j], pieces[j + 1]
+                scac, digits = scac.upper(), digits.upper()
+                if scac in KNOWN_SCACS and _DIGITS_LINE_RX.match(digits):
+                    reconstructed = scac + digits
+                    found(reconstructed, at + start, at + digits_at + len(digits))
                     log.info('repair_broken_candidates.same_line', extra={
-                        'scac': tokens[j],
-                        'digits': tokens[j+1],
+                        'scac': scac,
+                        'digits': digits,
                         'result': reconstructed,
                     })
         # Case 2: Current line ends with SCAC, next line starts with digits
-        scac_match = re.search(r'([A-Z]{4})$', current)
+        scac_match = _TRAILING_SCAC_RX.search(current)
         if scac_match:
             scac = scac_match.group(1)
             if scac in KNOWN_SCACS:
-                digit_match = re.match(r'^(\d{6,15})', next_line)
+                digit_match = _LEADING_DIGITS_RX.match(next_line)
                 if digit_match:
                     reconstructed = scac + digit_match.group(1)
-                    repaired.append(reconstructed)
+                    found(reconstructed, at + len(line) - len(scac), next_at + digit_match.end())
                     log.info('repair_broken_candidates.trailing_scac', extra={
                         'scac': scac,
                         'digits': digit_match.group(1),
                         'result': reconstructed,
                     })
-    # Deduplicate preserving order
-    seen = set()
-    out = []
-    for r in repaired:
-        if r not in seen:
-            seen.add(r)
-            out.append(r)
-    return out
+    return list(repaired.values())
 
 
-    
+# score_token formats, strongest first
+_STRONG_FORMAT_RX = re.compile(r'^[A-Z]{2,4}\d{6,15}$')
+_FORMAT_WITH_SEP_RX = re.compile(r'^[A-Z]{2,4}[-_/]\d{6,15}$')
+_FALLBACK_FORMAT_RX = re.compile(r'^[A-Z]{2,6}\d{5,15}$')
+# footer "B/L: <token>" label, matched on the uppercased text
+_FOOTER_BL_LABEL_RX = re.compile(r'B/L\s*:\s*')
+
+
+def _format_terms(token: str) -> Tuple[int, Tuple[str, ...]]:
+    """(points, reasons) of the pick_best_bl terms that depend on the token
+    alone: format, letters with digits, carrier prefix, length."""
+    score = 0
+    reasons = []
+    # 🔥 formats
+    if _STRONG_FORMAT_RX.match(token):
+        score += 35
+        reasons.append('strong_format')
+    elif _FORMAT_WITH_SEP_RX.match(token):
+        score += 25
+        reasons.append('format_with_sep')
+    elif _FALLBACK_FORMAT_RX.match(token):
+        score += 15
+        reasons.append('fallback_alpha_digits')
 
+    # 🔥 alpha + digits
+    if any(c.isalpha() for c in token) and any(c.isdigit() for c in token):
+        score += 5
+        reasons.append('alpha_digits')
 
-def pick_best_bl(text: str) -> Optional[str]:
+    # Business rule: boost common carrier prefixes (MSC-like series)
+    if token.upper().startswith(('MEDU', 'MSCU')):
+        score += 20
+        reasons.append('msc_prefix')
+
+    # 🔥 longueur idéale
+    if 8 <= len(token) <= 20:
+        score += 5
+        reasons.append('good_length')
+    return score, tuple(reasons)
+
+
+def pick_best_bl(text: str, layout=None, top_k: Optional[int] = CASCADE_TOP_K) -> Optional[str]:
     # Strict JSON output function: returns dict {bl_number, confidence, reason}
+    # `layout` (DocumentLayout or ocr_document()["layout"]) adds geometric
+    # label checks: a value right of / below a label on the page counts as
+    # labelled even when OCR line order separates them in the text.
+    # `top_k`: see CASCADE_TOP_K.
     if not text:
         return {'bl_number': None, 'confidence': 'low', 'reason': 'empty_text'}
 
     # assume caller provides normalized text; do not normalize here
     text_len = len(text)
     header_zone = text[: int(text_len * 0.25)]
+    layout = DocumentLayout.coerce(layout)
+    # one index for every context lookup of every candidate
+    doc = index_document(text)
 
     log.info('pick_best_bl.start', extra={'text_len': text_len})
 
     # 🆕 ÉTAPE 1 : Reconstruction SCAC + numéro
-    repaired = repair_broken_candidates(text)
+    # (Candidate records: each knows its sources and where it was found)
+    repaired = repair_broken_candidate_records(doc)
 
     # explicit: only labelled patterns (B/L, BILL OF LADING, BL NO, etc.)
-    explicit = extract_bl_numbers(text, only_explicit=True)
-    candidates = extract_bl_candidates(text)
+    explicit = extract_bl_number_records(doc, only_explicit=True)
+    candidates = extract_bl_candidate_records(doc)
 
     # 🆕 DEBUG : Afficher tous les candidats bruts
     log.warning('pick_best_bl.debug_candidates', extra={
-        'repaired': repaired,
-        'explicit': explicit[:10],
-        'candidates': candidates[:10]
+        'repaired': _values(repaired),
+        'explicit': _values(explicit[:10]),
+        'candidates': _values(candidates[:10])
     })
 
-    # 🆕 ÉTAPE 3 : Fusion avec priorité aux candidats reconstruits
-    merged, seen = [], set()
-    # Priorité 1 : candidats reconstruits (SCAC + digits)
-    for c in repaired:
-        if c and c not in seen:
-            seen.add(c)
-            merged.append(c)
-    # Priorité 2 : candidats explicites
-    for c in explicit:
-        if c and c not in seen:
-            seen.add(c)
-            merged.append(c)
-    # Priorité 3 : autres candidats
-    for c in candidates:
-        if c and c not in seen:
-            seen.add(c)
-            merged.append(c)
+    # 🆕 ÉTAPE 3 : Fusion avec priorité aux candidats reconstruits,
+    # puis explicites, puis les autres (sources et positions cumulées)
+    merged = merge_candidates(repaired, explicit, candidates)
 
     if not merged:
         return {'bl_number': None, 'confidence': 'low', 'reason': 'no_candidates'}
 
     # ===================== STRUCTURAL FILTER (absolu, avant scoring) =====================
     filtered = []
-    for t in merged:
-        if is_structurally_invalid_bl(t):
-            log.info('pick_best_bl.structural_reject', extra={'token': t})
+    for c in merged:
+        if c.structurally_invalid:
+            log.info('pick_best_bl.structural_reject', extra={'token': c.value})
             continue
-        filtered.append(t)
+        filtered.append(c)
     merged = filtered
 
     # do not perform absolute rejections here for seal/container proximity;
@@ -909,39 +1191,59 @@ def pick_best_bl(text: str) -> Optional[str]:
         return any(ch.isdigit() for ch in token)
 
     def is_draft_context(token: str) -> bool:
-        return any(
-            candidate_near_phrase(text, token, ctx, window=50)
-            for ctx in [
-                'DRAFT BILL',
-                'DRAFT B/L',
-                'FINAL BL WILL BE READY'
-            ]
-        )
+        return _near_class(doc, token, 'draft_bl', window=50)
 
     def is_booking_number(token: str) -> bool:
-        return any(
-            candidate_near_phrase(text, token, lbl, window=100)
-            for lbl in BOOKING_LABELS
+        return _near_class(doc, token, 'booking_labels', window=100) or bool(
+            layout and layout.is_labelled(token, BOOKING_LABELS)
         )
 
     def has_explicit_bl_label(token: str) -> bool:
-        return any(
-            candidate_near_phrase(text, token, lbl, window=120)
-            for lbl in BL_LABELS
+        return _near_class(doc, token, 'bl_labels', window=120) or bool(
+            layout and layout.is_labelled(token, BL_LABELS)
         )
 
+    def has_footer_bl_label(token: str) -> bool:
+        # 'B/L: TOKEN': the offsets where a label ends are found once, then
+        # each candidate is a startswith check at those offsets
+        ends = doc.memo('footer_bl_label_ends', lambda: [m.end() for m in _FOOTER_BL_LABEL_RX.finditer(doc.upper)])
+        t = token.upper()
+        return any(doc.upper.startswith(t, e) for e in ends)
+
     # ===================== SCORING =====================
 
-    def score_token(token: str):
+    # upper-casing kept every offset: positions in doc.upper are positions in text
+    same_offsets = len(doc.upper) == text_len
+
+    def in_header_zone(token: str, bound: bool) -> bool:
+        if not bound:
+            return token in header_zone
+        if not same_offsets:
+            return True
+        # an occurrence inside header_zone is one of the uppercased text too
+        first = doc.first(token)
+        return first != -1 and first + len(token) <= len(header_zone)
+
+    def frequency(token: str, bound: bool) -> int:
+        if not bound:
+            return doc.count(token)
+        # no lower than the case-sensitive count
+        return doc.count(token, case_sensitive=False) if same_offsets else 5
+
+    def score_token(candidate: Candidate, bound: bool = False):
+        """(score, reasons). With `bound`, the two checks that rescan the text
+        (header zone, frequency) are replaced by index lookups that can only
+        over-estimate them: the score is then an upper bound of the real one."""
+        token = candidate.value
         score = 0
         reasons = []
 
         # BLOCK: tax/fiscal identifiers must never be accepted as BLs
-        if is_tax_or_fiscal_context(text, token):
+        if is_tax_or_fiscal_context(doc, token):
             return -999, ['tax_or_fiscal_identifier']
 
         # 🆕 BLOCK: port/voyage context (nouveau filtre absolu)
-        if is_in_port_or_voyage_context(text, token):
+        if is_in_port_or_voyage_context(doc, token):
             return -999, ['port_or_voyage_context']
 
         if not token or is_blacklisted(token):
@@ -950,7 +1252,7 @@ def pick_best_bl(text: str) -> Optional[str]:
         if not has_digits(token):
             return -999, ['no_digits']
 
-        if is_iso6346(token):
+        if candidate.iso6346:
             return -999, ['iso_container']
 
         # Numeric-only tokens are only valid when explicitly labeled or
@@ -960,94 +1262,67 @@ def pick_best_bl(text: str) -> Optional[str]:
             if len(token) < 8 or len(token) > 15:
                 return -999, ['numeric_invalid_length']
             # 🆕 Si numérique ET pas reconstruit → pénalité forte
-            if token not in repaired:
+            if SOURCE_REPAIRED not in candidate.sources:
                 # orphan numeric tokens (not part of a reconstructed SCAC+digits)
                 score -= 50
                 reasons.append('numeric_orphan_penalty')
-            if not (has_explicit_bl_label(token) or candidate_near_bl_keyword(text, token, window=120)):
+            if not (has_explicit_bl_label(token) or candidate_near_bl_keyword(doc, token, window=120)):
                 return -999, ['numeric_no_bl_context']
 
+        # If explicit BL label exists nearby, prefer it and avoid heavy penalties
+        explicit_label_present = has_explicit_bl_label(token)
+
         # NOTE: do not reject tokens solely because the document is marked DRAFT.
         # The draft context is still detectable via `is_draft_context()` but
         # we treat it as a soft signal rather than an absolute rejection.
 
         # 🔥 explicite
-        if token in explicit:
+        if SOURCE_EXPLICIT in candidate.sources:
             score += 60
             reasons.append('explicit_match')
 
         # 🔥 libellé BL exact
-        if has_explicit_bl_label(token):
+        if explicit_label_present:
             score += 40
             reasons.append('explicit_bl_label')
 
-        # If explicit BL label exists nearby, prefer it and avoid heavy penalties
-        explicit_label_present = has_explicit_bl_label(token)
-
         # 🔥 Boost massif pour "B/L No." explicite
-        if candidate_near_phrase(text, token, 'B/L NO', window=30):
+        if candidate_near_phrase(doc, token, 'B/L NO', window=30):
             score += 100
             reasons.append('explicit_bl_no_label')
 
         # Strong boost for exact "BILL OF LADING NO" nearby (also high)
-        if candidate_near_phrase(text, token, 'BILL OF LADING NO', window=30):
+        if candidate_near_phrase(doc, token, 'BILL OF LADING NO', window=30):
             score += 100
             reasons.append('bill_of_lading_no_boost')
 
         # 🔥 proximité BL
-        if candidate_near_bl_keyword(text, token, window=150):
+        if candidate_near_bl_keyword(doc, token, window=150):
             score += 25
             reasons.append('near_bl_keyword')
 
-        # 🔥 formats
-        if re.match(r'^[A-Z]{2,4}\d{6,15}$', token):
-            score += 35
-            reasons.append('strong_format')
-        elif re.match(r'^[A-Z]{2,4}[-_/]\d{6,15}$', token):
-            score += 25
-            reasons.append('format_with_sep')
-        elif re.match(r'^[A-Z]{2,6}\d{5,15}$', token):
-            score += 15
-            reasons.append('fallback_alpha_digits')
-
-        # 🔥 alpha + digits
-        if any(c.isalpha() for c in token) and any(c.isdigit() for c in token):
-            score += 5
-            reasons.append('alpha_digits')
-
-        # Business rule: boost common carrier prefixes (MSC-like series)
-        try:
-            if token.upper().startswith(('MEDU', 'MSCU')):
-                score += 20
-                reasons.append('msc_prefix')
-        except Exception:
-            pass
-
-        # 🔥 longueur idéale
-        if 8 <= len(token) <= 20:
-            score += 5
-            reasons.append('good_length')
+        # 🔥 formats, alpha + digits, préfixe transporteur, longueur
+        points, format_reasons = candidate.format_terms
+        score += points
+        reasons.extend(format_reasons)
 
         # 🔥 header
-        if token in header_zone:
+        if in_header_zone(token, bound):
             score += 20
             reasons.append('header_zone')
 
         # 🆕 Boost massif pour candidats reconstruits SCAC + digits
-        if token in repaired:
+        if SOURCE_REPAIRED in candidate.sources:
             score += 70
             reasons.append('reconstructed_scac_digits')
 
         # Footer label pattern: B/L: TOKEN
-        try:
-            if re.search(rf'B/L\s*:\s*{re.escape(token)}', text, flags=re.IGNORECASE):
-                score += 60
-                reasons.append('footer_bl_label')
-        except re.error:
-            pass
+        if has_footer_bl_label(token):
+            score += 60
+            reasons.append('footer_bl_label')
 
         # 🔥 fréquence
-        freq = text.count(token)
+        freq = frequency(token, bound)
         if freq > 1:
             score += min(5, freq)
             reasons.append(f'freq_{freq}')
@@ -1057,15 +1332,15 @@ def pick_best_bl(text: str) -> Optional[str]:
             score -= 30
             reasons.append('booking_penalty')
 
-        if is_seal_number_context(text, token) and not explicit_label_present:
+        if is_seal_number_context(doc, token) and not explicit_label_present:
             score -= 40
             reasons.append('seal_context_penalty')
 
-        if is_within_container_section(text, token) and not explicit_label_present:
+        if is_within_container_section(doc, token) and not explicit_label_present:
             score -= 40
             reasons.append('container_section_penalty')
 
-        if is_in_forbidden_bl_context(text, token) and not explicit_label_present:
+        if is_in_forbidden_bl_context(doc, token) and not explicit_label_present:
             score -= 30
             reasons.append('forbidden_context_penalty')
 
@@ -1073,22 +1348,63 @@ def pick_best_bl(text: str) -> Optional[str]:
 
     # ===================== FILTRAGE FINAL =====================
 
-    scored = []
-    for t in merged:
-        if is_false_positive(t):
+    # Candidates are ranked by (score, length, merge order), the order of
+    # the final sort. Stage one computes an upper bound of every score from
+    # index lookups only (score_token(bound=True)); stage two scores them
+    # exactly in bound order, top_k at a time, until no unscored candidate
+    # can change the outcome below.
+    doc.locate(_values(merged))
+    pending = []
+    for i, c in enumerate(merged):
+        if c.false_positive:
             # still drop clear false-positives (dates, short numeric tokens)
             continue
-
-        s, reasons = score_token(t)
-        if s >= 0:
-            scored.append((t, s, reasons))
+        bound, reasons = score_token(c, bound=True)
+        if bound >= 0:
+            labelled = 'explicit_match' in reasons or has_explicit_bl_label(c.value)
+            pending.append(((bound, len(c.value), -i), (i, c, labelled)))
+
+    def settled(pending, ranked) -> bool:
+        # exact keys never exceed bounds, so the leader is final once its key
+        # beats every pending bound; likewise for the margin and for the
+        # labelled fallback of the ambiguous case
+        if not pending:
+            return True
+        top_bound = pending[0][0]
+        if not ranked or ranked[0][0] < top_bound:
+            return False
+        best, second = ranked[0][0][0], (ranked[1][0][0] if len(ranked) > 1 else -999)
+        if best >= MIN_SCORE and best - second >= MIN_MARGIN:
+            # clear so far: final unless a pending one may come within the margin
+            return top_bound[0] <= best - MIN_MARGIN
+        # ambiguous whatever comes next: the best labelled candidate decides
+        labelled_bounds = [b for b, (_, _, labelled) in pending if labelled]
+        best_labelled = next((k for k, (_, _, _, labelled) in ranked if labelled), None)
+        return not labelled_bounds or (best_labelled is not None and best_labelled > labelled_bounds[0])
+
+    total = len(pending)
+    pending.sort(key=lambda p: p[0], reverse=True)
+    ranked = []  # (key, (candidate, score, reasons, labelled)), best first
+    while not settled(pending, ranked):
+        n = top_k or len(pending)
+        batch, pending = pending[:n], pending[n:]
+        for _, (i, c, labelled) in batch:
+            s, reasons = score_token(c)
+            if s >= 0:
+                ranked.append(((s, len(c.value), -i), (c, s, reasons, labelled)))
+        ranked.sort(key=lambda r: r[0], reverse=True)
+    scored = [(c, s, reasons) for _, (c, s, reasons, _) in ranked]
+    if pending:
+        log.info('pick_best_bl.cascade', extra={'candidates': total, 'scored': total - len(pending)})
 
     if not scored:
         return {'bl_number': None, 'confidence': 'low', 'reason': 'no_valid_candidates'}
 
-    scored.sort(key=lambda x: (x[1], len(x[0])), reverse=True)
+    def trace(c: Candidate, s, r) -> dict:
+        return {'token': c.value, 'score': s, 'reasons': r, 'source': c.source, 'spans': c.spans[:3]}
 
-    best_token, best_score, best_reasons = scored[0]
+    best, best_score, best_reasons = scored[0]
+    best_token = best.value
     second_score = scored[1][1] if len(scored) > 1 else -999
 
     if best_score < MIN_SCORE or (best_score - second_score) < MIN_MARGIN:
@@ -1100,21 +1416,19 @@ def pick_best_bl(text: str) -> Optional[str]:
                 'best_score': best_score,
                 'second_score': second_score,
                 'margin': best_score - second_score,
-                'candidates': [
-                    {'token': t, 'score': s, 'reasons': r}
-                    for t, s, r in scored[:5]
-                ]
+                'candidates': [trace(*entry) for entry in scored[:5]]
             }
         )
 
         # filter to labelled candidates only
-        labelled = [ (t,s,r) for (t,s,r) in scored if ('explicit_match' in r) or has_explicit_bl_label(t) ]
+        labelled = [ (c,s,r) for (c,s,r) in scored if ('explicit_match' in r) or has_explicit_bl_label(c.value) ]
         if not labelled:
             return {'bl_number': None, 'confidence': 'low', 'reason': 'ambiguous_no_explicit_label'}
 
         # pick highest scoring labelled candidate
         labelled.sort(key=lambda x: x[1], reverse=True)
-        best_token, best_score, best_reasons = labelled[0]
+        best, best_score, best_reasons = labelled[0]
+        best_token = best.value
         best_reasons = list(best_reasons) if isinstance(best_reasons, list) else [best_reasons]
         best_reasons.append('resolved_by_label')
         log.info('pick_best_bl.resolved_by_label', extra={'token': best_token, 'score': best_score})
@@ -1152,10 +1466,7 @@ def pick_best_bl(text: str) -> Optional[str]:
             'value': final_token,
             'score': best_score,
             'reasons': best_reasons,
-            'candidates': [
-                {'token': t, 'score': s, 'reasons': r}
-                for t, s, r in scored
-            ],
+            'candidates': [trace(*entry) for entry in scored],
         }
     )
 
@@ -1204,17 +1515,12 @@ def pick_best_bl_v2_simple(text: str) -> Optional[str]:
 # Provide a convenient alias matching the requested simple name
 pick_best_bl_v2_plain = pick_best_bl_v2_simple
 
-def candidate_near_bl_keyword(text: str, token: str, window: int = 60) -> bool:
+def candidate_near_bl_keyword(text, token: str, window: int = 60) -> bool:
     """Return True if token occurs within `window` chars of a BL keyword."""
-    T = (text or '').lower()
-    tok = token.lower()
-    idx = T.find(tok)
-    if idx == -1:
+    doc = index_document(text)
+    span = doc.window(token, window, window)
+    if span is None:
         return False
-    start = max(0, idx - window)
-    end = min(len(T), idx + len(tok) + window)
-    context = T[start:end]
-    keywords = ['bill of lading', 'billoflading', 'b/l', 'bil no', 'bil n0', 'bl no', 'bl n0', 'blno', 'b l', 'ocean bill', 'house bill', 'master bill']
-    if any(k in context for k in keywords):
+    if doc.contains_class('bl_keyword', *span):
         return True
-    return bool(re.search(BL_LABEL_TOKEN_RE, context, flags=re.IGNORECASE))
+    return doc.search(_BL_LABEL_TOKEN_RX, *span, anchor="B")
@@ -1,8 +1,24 @@
 # services/classifier.py
 from typing import Optional
 from core.logging import get_logger
+from services.keyword_scanner import KeywordScanner
 import re
 
+# maritime context words, each worth a weak BL signal; found in one pass
+BL_WEAK_KEYWORDS = [
+    "CONSIGNEE",
+    "SHIPPER",
+    "PORT OF LOADING",
+    "PORT OF DISCHARGE",
+    "VESSEL",
+    "VOYAGE",
+    "CONTAINER",
+    "SEAL",
+    "GROSS WEIGHT",
+    "NET WEIGHT",
+]
+_WEAK_SCANNER = KeywordScanner({"bl_weak": BL_WEAK_KEYWORDS})
+
 
 def classify_document(hint: Optional[str], text_or_filename: str) -> str:
     """
@@ -63,21 +79,9 @@ def classify_document(hint: Optional[str], text_or_filename: str) -> str:
     # -------------------------------------------------
     # 4️⃣ SIGNAUX BL FAIBLES (contexte maritime)
     # -------------------------------------------------
-    BL_WEAK_KEYWORDS = [
-        "CONSIGNEE",
-        "SHIPPER",
-        "PORT OF LOADING",
-        "PORT OF DISCHARGE",
-        "VESSEL",
-        "VOYAGE",
-        "CONTAINER",
-        "SEAL",
-        "GROSS WEIGHT",
-        "NET WEIGHT",
-    ]
-
+    weak_hits = _WEAK_SCANNER.scan(T)
     for k in BL_WEAK_KEYWORDS:
-        if k in T:
+        if weak_hits[k]:
             bl_score += 0.5
 
     # -------------------------------------------------
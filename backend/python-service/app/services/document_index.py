@@ -0,0 +1,183 @@
+# services/document_index.py
+"""Per-document lookup index for the bl_parser context helpers.
+
+The helpers ("is there a SEAL label within 80 chars before this token?")
+used to uppercase the whole text and `find` the token on every call, and
+`pick_best_bl` calls a dozen of them per candidate. A `DocumentIndex` is
+built once per document and answers them without rescanning:
+
+- `upper`: the uppercased text (helpers compare case-insensitively);
+- `positions(s)`: every start offset of `s` in `upper`, computed on first
+  use and cached, for candidate tokens and label keywords alike;
+- `contains(keyword, start, end)`: whether `keyword` lies entirely inside
+  `upper[start:end]` (a bisect over its positions instead of slicing);
+- `contains_class(name, start, end)`: the same for any keyword of a label
+  class of the index's KeywordScanner. The scanner finds every keyword of
+  every class in one pass, on first use; a class query is then a bisect
+  over the merged hits of the class;
+- `search(rx, start, end, anchor)`: whether a regex matches inside a window,
+  trying only the offsets of its leading literal;
+- `memo(key, compute)`: document-level facts shared by every candidate
+  (e.g. "does the document mention BILL OF LADING at all");
+- `locate(tokens)`: the positions of many tokens collected up front by one
+  keyword-scanner pass over the text, instead of one `find` sweep per token
+  on first use (pick_best_bl locates all its candidates at once);
+- `upper_offset(i)`: the offset in `upper` of offset `i` of the text, for
+  matches found on the text itself.
+
+Helpers accept either the text or an index (`DocumentIndex.coerce`), so
+callers that hold only a string keep working unchanged.
+"""
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from services.keyword_scanner import KeywordScanner
+
+
+def _find_all(haystack: str, needle: str) -> List[int]:
+    """Start offsets of every (overlapping) occurrence of `needle`."""
+    out = []
+    i = haystack.find(needle)
+    while i != -1:
+        out.append(i)
+        i = haystack.find(needle, i + 1)
+    return out
+
+
+class DocumentIndex:
+    """Uppercased text plus cached occurrence positions of tokens and keywords."""
+
+    __slots__ = ("text", "upper", "scanner", "_scanned", "_positions", "_classes", "_counts", "_memo")
+
+    def __init__(self, text: Optional[str], scanner: Optional[KeywordScanner] = None):
+        self.text = text or ""
+        self.upper = self.text.upper()
+        self.scanner = scanner
+        self._scanned = False
+        self._positions: Dict[str, List[int]] = {}
+        self._classes: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._counts: Dict[str, int] = {}
+        self._memo: Dict[str, Any] = {}
+
+    @classmethod
+    def coerce(cls, text, scanner: Optional[KeywordScanner] = None) -> "DocumentIndex":
+        """`text` itself when it already is an index, else a new index over it."""
+        if isinstance(text, cls):
+            return text
+        return cls(text, scanner)
+
+    def __len__(self) -> int:
+        return len(self.upper)
+
+    def positions(self, s: str) -> List[int]:
+        """Every start offset of `s` (case-insensitive), ascending."""
+        s = s.upper()
+        found = self._positions.get(s)
+        if found is None and self.scanner is not None and not self._scanned and s in self.scanner.keywords:
+            self._scan()
+            found = self._positions.get(s)
+        if found is None:
+            found = _find_all(self.upper, s) if s else [0]
+            self._positions[s] = found
+        return found
+
+    def locate(self, tokens: Iterable[str]) -> None:
+        """Collect the positions of all `tokens` (case-insensitive) with one
+        pass of a KeywordScanner built over them; later `positions` calls
+        for them are dictionary lookups."""
+        todo = {t.upper() for t in tokens if t} - self._positions.keys()
+        if todo:
+            self._positions.update(KeywordScanner({"tokens": todo}).scan(self.upper))
+
+    def upper_offset(self, i: int) -> int:
+        """Offset in `upper` of offset `i` of `text`; they differ after a
+        character that upper-cases to several (e.g. "ß" -> "SS")."""
+        if len(self.upper) == len(self.text):
+            return i
+        shifted = self.memo('upper_offsets', lambda: list(accumulate((len(ch.upper()) for ch in self.text), initial=0)))
+        return shifted[i]
+
+    def first(self, token: str) -> int:
+        """First offset of `token` (case-insensitive), -1 when absent."""
+        found = self.positions(token)
+        return found[0] if found else -1
+
+    def count(self, token: str, case_sensitive: bool = True) -> int:
+        """Non-overlapping occurrences: `text.count(token)`, or when not
+        `case_sensitive` the number of `re.findall(token, text, re.I)` hits."""
+        if not case_sensitive:
+            n, end = 0, 0
+            for p in self.positions(token):
+                if p >= end:
+                    n, end = n + 1, p + max(1, len(token))
+            return n
+        n = self._counts.get(token)
+        if n is None:
+            n = self.text.count(token)
+            self._counts[token] = n
+        return n
+
+    def memo(self, key: str, compute: Callable[[], Any]) -> Any:
+        """`compute()` once per document, cached under `key`."""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def window(self, token: str, before: int, after: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of `before` chars before to `after` chars after the
+        first occurrence of `token`, clipped to the text; None when absent."""
+        idx = self.first(token)
+        if idx == -1:
+            return None
+        return max(0, idx - before), min(len(self.upper), idx + len(token) + after)
+
+    def contains(self, keyword: str, start: int, end: int) -> bool:
+        """Whether `keyword` occurs entirely inside `upper[start:end]`."""
+        hits = self.positions(keyword)
+        i = bisect_left(hits, max(0, start))
+        return i < len(hits) and hits[i] + len(keyword) <= min(end, len(self.upper))
+
+    def contains_any(self, keywords: Iterable[str], start: int, end: int) -> bool:
+        return any(self.contains(k, start, end) for k in keywords)
+
+    def contains_class(self, name: str, start: int, end: int) -> bool:
+        """Whether any keyword of scanner class `name` lies entirely inside
+        `upper[start:end]`."""
+        hits = self._classes.get(name)
+        if hits is None:
+            hits = self._classes[name] = self._class_hits(name)
+        starts, min_ends = hits
+        i = bisect_left(starts, max(0, start))
+        return i < len(starts) and min_ends[i] <= min(end, len(self.upper))
+
+    def _scan(self) -> None:
+        for keyword, found in self.scanner.scan(self.upper).items():
+            self._positions.setdefault(keyword, found)
+        self._scanned = True
+
+    def _class_hits(self, name: str) -> Tuple[List[int], List[int]]:
+        """Hits of a class sorted by start, with the smallest end offset of
+        the hits from each one onwards: some hit fits in [start, end) iff the
+        first hit at or after `start` has min_ends <= end."""
+        spans = sorted((p, p + len(k)) for k in self.scanner.classes[name] for p in self.positions(k))
+        starts = [p for p, _ in spans]
+        min_ends = [e for _, e in spans]
+        for i in range(len(min_ends) - 2, -1, -1):
+            if min_ends[i + 1] < min_ends[i]:
+                min_ends[i] = min_ends[i + 1]
+        return starts, min_ends
+
+    def search(self, rx: Pattern, start: int, end: int, anchor: str) -> bool:
+        """Whether `rx` matches inside `upper[start:end]`, as
+        `rx.search(upper[start:end])` would. Every match of `rx` must begin
+        with the literal `anchor` (e.g. "B" for the B/L label regex): only
+        those offsets are tried. `rx` must not use anchors or lookbehinds."""
+        start, end = max(0, start), min(end, len(self.upper))
+        starts = self.positions(anchor)
+        i = bisect_left(starts, start)
+        while i < len(starts) and starts[i] < end:
+            if rx.match(self.upper, starts[i], end):
+                return True
+            i += 1
+        return False
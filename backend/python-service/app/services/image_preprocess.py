@@ -0,0 +1,223 @@
+# services/image_preprocess.py
+"""Page image preprocessing for OCR, computed once per page on NumPy arrays.
+
+`prepare_image(img, mode)` returns a PreparedImage whose `gray` and `binary`
+images are shared by every PSM pass instead of being recomputed per pass.
+
+Modes (OCR_PREPROCESS):
+- `basic`: historical behaviour, PIL autocontrast and a fixed 160 threshold.
+- `otsu`: contrast stretch, dark scan border removal, deskew, global Otsu
+  threshold and removal of isolated specks.
+- `adaptive`: same, but the threshold is the local mean over a window of
+  about 1/10 inch, which copes with uneven lighting and stamps.
+"""
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+PREPROCESS_MODES = ("basic", "otsu", "adaptive")
+
+BASIC_THRESHOLD = 160
+# a border row/column is one that is mostly ink (black scanner margins)
+BORDER_INK_RATIO = 0.6
+MAX_SKEW_DEG = 5.0
+SKEW_STEP_DEG = 0.25
+# below this the rotation costs more (resampling blur) than it fixes
+MIN_SKEW_DEG = 0.3
+# deskew is estimated on a strided copy at most this wide
+SKEW_SAMPLE_WIDTH = 1000
+ADAPTIVE_OFFSET = 10
+
+
+def _as_gray_array(img: Image.Image) -> np.ndarray:
+    if img.mode != "L":
+        img = img.convert("L")
+    return np.asarray(img, dtype=np.uint8)
+
+
+def _histogram(arr: np.ndarray) -> np.ndarray:
+    return np.bincount(arr.ravel(), minlength=256)
+
+
+def stretch_contrast(arr: np.ndarray, hist: Optional[np.ndarray] = None) -> np.ndarray:
+    """Map the darkest pixel to 0 and the lightest to 255 (PIL autocontrast)."""
+    hist = _histogram(arr) if hist is None else hist
+    used = np.flatnonzero(hist)
+    if used.size < 2:
+        return arr
+    lo, hi = int(used[0]), int(used[-1])
+    if lo == 0 and hi == 255:
+        return arr
+    lut = np.clip((np.arange(256) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+    return lut[arr]
+
+
+def otsu_threshold(hist: np.ndarray) -> int:
+    """Threshold maximising the between-class variance of `hist` (256 bins).
+
+    Pixels strictly below the returned value are ink.
+    """
+    hist = hist.astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return BASIC_THRESHOLD
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    mean_bg = cum_mean / np.where(weight_bg == 0, 1, weight_bg)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.where(weight_fg == 0, 1, weight_fg)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    # bin t separates [0, t] from [t + 1, 255]
+    return int(np.argmax(between)) + 1
+
+
+def adaptive_ink(arr: np.ndarray, block: int, offset: int = ADAPTIVE_OFFSET) -> np.ndarray:
+    """Ink mask: pixels darker than their `block` x `block` local mean minus `offset`.
+
+    Window sums come from an integral image of the edge-padded page; uint32
+    wrap-around cancels out in the four-corner difference because every
+    window sum fits in 32 bits.
+    """
+    block = max(3, int(block) | 1)
+    half = block // 2
+    padded = np.pad(arr, half, mode="edge")
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.uint32)
+    np.cumsum(padded, axis=0, dtype=np.uint32, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, dtype=np.uint32, out=integral[1:, 1:])
+    sums = integral[block:, block:] - integral[:-block, block:]
+    sums -= integral[block:, :-block]
+    sums += integral[:-block, :-block]
+    area = block * block
+    # arr < local mean - offset  <=>  arr * area + offset * area < window sum
+    return arr.astype(np.uint32) * area + offset * area < sums
+
+
+def _edge_run(mostly_ink: np.ndarray) -> Tuple[int, int]:
+    """Length of the leading and trailing runs of True in a 1-D mask."""
+    if mostly_ink.all():
+        return 0, 0  # a fully dark page is content, not border
+    lead = int(np.argmin(mostly_ink))
+    trail = int(np.argmin(mostly_ink[::-1]))
+    return lead, trail
+
+
+def border_box(ink: np.ndarray) -> Tuple[int, int, int, int]:
+    """(top, bottom, left, right) extent of dark scanner margins, in pixels."""
+    top, bottom = _edge_run(ink.mean(axis=1) > BORDER_INK_RATIO)
+    left, right = _edge_run(ink.mean(axis=0) > BORDER_INK_RATIO)
+    return top, bottom, left, right
+
+
+def _clear_border(arr: np.ndarray, ink: np.ndarray, box: Tuple[int, int, int, int]) -> None:
+    top, bottom, left, right = box
+    height, width = arr.shape
+    for target, value in ((arr, 255), (ink, False)):
+        target[:top, :] = value
+        target[height - bottom:, :] = value
+        target[:, :left] = value
+        target[:, width - right:] = value
+
+
+def estimate_skew(ink: np.ndarray) -> float:
+    """Skew of the text lines in degrees (positive: lines fall to the right).
+
+    Projection-profile search: ink pixels are sheared by each candidate
+    angle and binned by row; the angle whose row profile has the sharpest
+    transitions (sum of squared differences) aligns the lines.
+    """
+    stride = max(1, ink.shape[1] // SKEW_SAMPLE_WIDTH)
+    ys, xs = np.nonzero(ink[::stride, ::stride])
+    if ys.size < 200:
+        return 0.0
+    ys = ys.astype(np.float64)
+    xs = xs.astype(np.float64)
+
+    def score(angle: float) -> float:
+        rows = np.rint(ys - xs * math.tan(math.radians(angle))).astype(np.int64)
+        profile = np.bincount(rows - rows.min())
+        return float(np.square(np.diff(profile)).sum())
+
+    # 1 degree sweep, then SKEW_STEP_DEG around the best coarse angle
+    coarse = max(np.arange(-MAX_SKEW_DEG, MAX_SKEW_DEG + 0.5, 1.0), key=score)
+    fine = np.arange(coarse - 1.0 + SKEW_STEP_DEG, coarse + 1.0, SKEW_STEP_DEG)
+    return round(float(max(fine, key=score)), 2)
+
+
+def despeckle(ink: np.ndarray) -> np.ndarray:
+    """Drop ink pixels that have no ink among their 8 neighbours."""
+    padded = np.pad(ink, 1).astype(np.uint8)
+    height, width = ink.shape
+    neighbours = np.zeros(ink.shape, dtype=np.uint8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy == 1 and dx == 1:
+                continue
+            neighbours += padded[dy:dy + height, dx:dx + width]
+    return ink & (neighbours > 0)
+
+
+class PreparedImage:
+    """Preprocessed variants of one page image.
+
+    `gray` is what the grayscale PSM passes read; `binary` (0/255 "L") is
+    built on first access, so adaptive cascades that never binarize don't
+    pay for it. `skew` is the correction applied, in degrees.
+    """
+
+    __slots__ = ("mode", "gray", "skew", "_arr", "_threshold", "_dpi", "_binary")
+
+    def __init__(self, mode: str, gray: Image.Image, skew: float = 0.0,
+                 arr: Optional[np.ndarray] = None, threshold: int = BASIC_THRESHOLD, dpi: int = 300):
+        self.mode = mode
+        self.gray = gray
+        self.skew = skew
+        self._arr = arr
+        self._threshold = threshold
+        self._dpi = dpi
+        self._binary = None
+
+    @property
+    def binary(self) -> Image.Image:
+        if self._binary is None:
+            if self.mode == "basic":
+                self._binary = self.gray.point(lambda x: 0 if x < BASIC_THRESHOLD else 255, "1")
+            else:
+                if self.mode == "adaptive":
+                    ink = adaptive_ink(self._arr, block=self._dpi // 10)
+                else:
+                    ink = self._arr < self._threshold
+                ink = despeckle(ink)
+                self._binary = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8), "L")
+        return self._binary
+
+
+def prepare_image(img: Image.Image, mode: str = "basic", dpi: int = 300) -> PreparedImage:
+    """Preprocess `img` once for all OCR passes (see module docstring)."""
+    mode = (mode or "basic").lower()
+    if mode not in PREPROCESS_MODES:
+        raise ValueError(f"unknown OCR_PREPROCESS mode {mode!r} (expected one of {PREPROCESS_MODES})")
+    if mode == "basic":
+        if img.mode != "L":  # rasterized pages already are; convert() would copy
+            img = img.convert("L")
+        return PreparedImage(mode, ImageOps.autocontrast(img), dpi=dpi)
+
+    arr = _as_gray_array(img)
+    hist = _histogram(arr)
+    arr = stretch_contrast(arr, hist)
+    threshold = otsu_threshold(_histogram(arr))
+    ink = arr < threshold
+    if not arr.flags.writeable:
+        arr = arr.copy()
+    _clear_border(arr, ink, border_box(ink))
+
+    skew = estimate_skew(ink)
+    if abs(skew) >= MIN_SKEW_DEG:
+        # PIL rotates counter-clockwise, which lifts lines falling to the right
+        rotated = Image.fromarray(arr, "L").rotate(skew, resample=Image.BILINEAR, fillcolor=255)
+        arr = np.asarray(rotated, dtype=np.uint8)
+    else:
+        skew = 0.0
+    return PreparedImage(mode, Image.fromarray(arr, "L"), skew, arr, threshold, dpi)
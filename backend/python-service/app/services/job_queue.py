@@ -0,0 +1,253 @@
+# services/job_queue.py
+"""Durable parse-job queue backed by SQLite.
+
+Jobs survive restarts (one row per job in JOBS_DB_PATH, WAL mode so several
+uvicorn workers can share the file):
+
+- `enqueue` dedupes on (document_id, file_url / storage_path, hint):
+  submitting the same document again returns the existing
+  queued/running/done job instead of OCRing it twice. A done job whose
+  result is degraded (no text was extracted, or the OCR was partial) is
+  queued again instead.
+- `claim` hands a job to one worker under a lease. A worker that dies
+  mid-job simply stops renewing the lease; the job is claimed again once
+  the lease expires, so work is neither lost nor run twice concurrently.
+- `fail` puts the job back in the queue until JOBS_MAX_ATTEMPTS is reached,
+  not claimable for `retry_backoff_s` x 2^(attempts-1) (kept in lease_until);
+  a job whose lease expires on its last attempt (the worker crashed or was
+  OOM-killed) is failed by `claim` rather than leased again.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from core.config import Settings
+from core.logging import get_logger
+
+log = get_logger('services.job_queue')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parse_jobs (
+    id TEXT PRIMARY KEY,
+    dedupe_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    callback_url TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    callback_status TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parse_jobs_status ON parse_jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS parse_jobs_dedupe ON parse_jobs (dedupe_key, status);
+"""
+
+
+def _degraded(result: Optional[dict]) -> bool:
+    """A done result that should not answer resubmissions: OCR ran (BL hint)
+    but produced no text, or stopped early (partial)."""
+    result = result or {}
+    extraction = result.get('extraction')
+    if extraction is None:
+        return False
+    return extraction.get('status') == 'partial' or not (result.get('raw_text_snippet') or '').strip()
+
+
+def dedupe_key(payload: dict) -> str:
+    h = hashlib.sha256()
+    for k in ('document_id', 'file_url', 'storage_path', 'hint'):
+        h.update(str(payload.get(k) or '').encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class JobQueue:
+    def __init__(self, path: str, max_attempts: int = 3, retry_backoff_s: float = 0.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_backoff_s = retry_backoff_s
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        """BEGIN IMMEDIATE transaction (one writer at a time across processes)."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        return _Tx(conn)
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def enqueue(self, payload: dict, callback_url: Optional[str] = None) -> dict:
+        """Queue a job, or return the live/done job for the same document
+        (unless that job's result is degraded)."""
+        key = dedupe_key(payload)
+        now = time.time()
+        with self._write() as conn:
+            existing = conn.execute(
+                'SELECT * FROM parse_jobs WHERE dedupe_key = ? AND status != ? ORDER BY created_at DESC LIMIT 1',
+                (key, FAILED),
+            ).fetchone()
+            if existing is not None:
+                job = self._row(existing)
+                if not (job['status'] == DONE and _degraded(job['result'])):
+                    return {**job, 'deduplicated': True}
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO parse_jobs (id, dedupe_key, payload, callback_url, status, created_at, updated_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, key, json.dumps(payload), callback_url, QUEUED, now, now),
+            )
+            row = conn.execute('SELECT * FROM parse_jobs WHERE id = ?', (job_id,)).fetchone()
+        log.info('jobs.enqueued', extra={'job_id': job_id, 'document_id': payload.get('document_id')})
+        return {**self._row(row), 'deduplicated': False}
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute('SELECT * FROM parse_jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._row(row)
+
+    def claim(self, owner: str, lease_s: float) -> Optional[dict]:
+        """Lease the oldest queued (or lease-expired running) job to `owner`.
+        Lease-expired jobs out of attempts are marked failed on the way."""
+        now = time.time()
+        with self._write() as conn:
+            while True:
+                row = conn.execute(
+                    'SELECT id, status, attempts FROM parse_jobs'
+                    ' WHERE (status = ? AND (lease_until IS NULL OR lease_until <= ?))'
+                    ' OR (status = ? AND lease_until < ?)'
+                    ' ORDER BY created_at LIMIT 1',
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['status'] == QUEUED or row['attempts'] < self.max_attempts:
+                    break
+                conn.execute(
+                    'UPDATE parse_jobs SET status = ?, error = ?, lease_owner = NULL, lease_until = NULL,'
+                    ' updated_at = ? WHERE id = ?',
+                    (FAILED, f"lease expired after {row['attempts']} attempts", now, row['id']),
+                )
+                log.warning('jobs.lease_expired', extra={'job_id': row['id'], 'attempts': row['attempts']})
+            conn.execute(
+                'UPDATE parse_jobs SET status = ?, attempts = attempts + 1, lease_owner = ?,'
+                ' lease_until = ?, updated_at = ? WHERE id = ?',
+                (RUNNING, owner, now + lease_s, now, row['id']),
+            )
+            job = conn.execute('SELECT * FROM parse_jobs WHERE id = ?', (row['id'],)).fetchone()
+        return self._row(job)
+
+    def renew(self, job_id: str, owner: str, lease_s: float) -> bool:
+        now = time.time()
+        with self._write() as conn:
+            cur = conn.execute(
+                'UPDATE parse_jobs SET lease_until = ?, updated_at = ?'
+                ' WHERE id = ? AND lease_owner = ? AND status = ?',
+                (now + lease_s, now, job_id, owner, RUNNING),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id: str, owner: str, result: dict) -> bool:
+        with self._write() as conn:
+            cur = conn.execute(
+                'UPDATE parse_jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL,'
+                ' lease_until = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?',
+                (DONE, json.dumps(result), time.time(), job_id, owner),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, job_id: str, owner: str, error: str, retry: bool = True) -> Optional[str]:
+        """Record a failure; requeue (after the backoff) while attempts remain.
+        Returns the new status."""
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute(
+                'SELECT attempts FROM parse_jobs WHERE id = ? AND lease_owner = ?', (job_id, owner)
+            ).fetchone()
+            if row is None:
+                return None
+            status = QUEUED if retry and row['attempts'] < self.max_attempts else FAILED
+            not_before = None
+            if status == QUEUED and self.retry_backoff_s > 0:
+                not_before = now + self.retry_backoff_s * 2 ** max(0, row['attempts'] - 1)
+            conn.execute(
+                'UPDATE parse_jobs SET status = ?, error = ?, lease_owner = NULL, lease_until = ?,'
+                ' updated_at = ? WHERE id = ?',
+                (status, error[:1000], not_before, now, job_id),
+            )
+        return status
+
+    def release(self, job_id: str, owner: str) -> None:
+        """Give a claimed job back without counting the attempt (e.g. executor busy)."""
+        with self._write() as conn:
+            conn.execute(
+                'UPDATE parse_jobs SET status = ?, attempts = MAX(attempts - 1, 0), lease_owner = NULL,'
+                ' lease_until = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?',
+                (QUEUED, time.time(), job_id, owner),
+            )
+
+    def set_callback_status(self, job_id: str, status: str) -> None:
+        with self._write() as conn:
+            conn.execute('UPDATE parse_jobs SET callback_status = ? WHERE id = ?', (status, job_id))
+
+    def counts(self) -> dict:
+        rows = self._conn().execute('SELECT status, COUNT(*) AS n FROM parse_jobs GROUP BY status').fetchall()
+        return {r['status']: r['n'] for r in rows}
+
+
+class _Tx:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    settings = Settings()
+    with _queue_lock:
+        if _queue is None or _queue.path != settings.JOBS_DB_PATH:
+            _queue = JobQueue(settings.JOBS_DB_PATH, settings.JOBS_MAX_ATTEMPTS, settings.JOBS_RETRY_BACKOFF_S)
+        return _queue
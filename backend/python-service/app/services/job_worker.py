@@ -0,0 +1,131 @@
+# services/job_worker.py
+"""Background consumer for the parse-job queue.
+
+Each worker task claims a job under a lease, renews the lease while the job
+runs, stores the result (or requeues on failure) and finally POSTs the
+outcome to the job's callback_url when one was given. A worker that loses
+its lease (renewal refused: the job was reclaimed or failed meanwhile)
+abandons the job without storing anything.
+"""
+import asyncio
+import os
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from core.config import Settings
+from core.executor import ExecutorBusy
+from core.http import DocumentTooLarge, get_async_client
+from core.logging import get_logger
+from services.job_queue import DONE, FAILED, JobQueue
+
+log = get_logger('services.job_worker')
+
+ProcessFn = Callable[[dict], Awaitable[dict]]
+
+
+class JobWorker:
+    def __init__(self, queue: JobQueue, process: ProcessFn, lease_s: float = 120, poll_s: float = 1.0):
+        self.queue = queue
+        self.process = process
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Renew the lease until cancelled; returns once a renewal is refused."""
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            if not await asyncio.to_thread(self.queue.renew, job_id, self.owner, self.lease_s):
+                log.warning('jobs.lease_lost', extra={'job_id': job_id})
+                return
+
+    async def run_once(self) -> Optional[dict]:
+        """Claim and run one job. Returns the stored job, or None when idle."""
+        job = await asyncio.to_thread(self.queue.claim, self.owner, self.lease_s)
+        if job is None:
+            return None
+        job_id = job['id']
+        log.info('jobs.started', extra={'job_id': job_id, 'attempt': job['attempts']})
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+        work = asyncio.ensure_future(self.process(job['payload']))
+        try:
+            await asyncio.wait((work, heartbeat), return_when=asyncio.FIRST_COMPLETED)
+            if not work.done():
+                # lease lost: the job is someone else's now, drop this run
+                return await asyncio.to_thread(self.queue.get, job_id)
+            result = work.result()
+        except ExecutorBusy as e:
+            # not the job's fault: hand it back and let the executor drain
+            await asyncio.to_thread(self.queue.release, job_id, self.owner)
+            await asyncio.sleep(min(e.retry_after, 30))
+            return await asyncio.to_thread(self.queue.get, job_id)
+        except DocumentTooLarge as e:
+            await asyncio.to_thread(self.queue.fail, job_id, self.owner, str(e), False)
+        except Exception as e:
+            log.exception('jobs.failed', extra={'job_id': job_id})
+            await asyncio.to_thread(self.queue.fail, job_id, self.owner, repr(e), True)
+        else:
+            await asyncio.to_thread(self.queue.complete, job_id, self.owner, result)
+            log.info('jobs.done', extra={'job_id': job_id})
+        finally:
+            work.cancel()
+            heartbeat.cancel()
+
+        stored = await asyncio.to_thread(self.queue.get, job_id)
+        if stored and stored['callback_url'] and stored['status'] in (DONE, FAILED):
+            await self._callback(stored)
+        return stored
+
+    async def _callback(self, job: dict, attempts: int = 3) -> None:
+        body = {
+            'job_id': job['id'],
+            'status': job['status'],
+            'result': job['result'],
+            'error': job['error'],
+        }
+        status = 'failed'
+        for attempt in range(attempts):
+            try:
+                resp = await get_async_client().post(job['callback_url'], json=body)
+                if resp.status_code < 500:
+                    status = f'sent:{resp.status_code}'
+                    break
+                status = f'failed:{resp.status_code}'
+            except Exception as e:
+                status = f'failed:{type(e).__name__}'
+            if attempt + 1 < attempts:
+                await asyncio.sleep(2 ** attempt)
+        log.info('jobs.callback', extra={'job_id': job['id'], 'callback_status': status})
+        await asyncio.to_thread(self.queue.set_callback_status, job['id'], status)
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                job = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception('jobs.worker_error')
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_s)
+
+
+_tasks: List[asyncio.Task] = []
+
+
+def start_job_workers(queue: JobQueue, process: ProcessFn) -> None:
+    settings = Settings()
+    for _ in range(settings.JOBS_WORKERS):
+        worker = JobWorker(queue, process, lease_s=settings.JOBS_LEASE_S, poll_s=settings.JOBS_POLL_S)
+        _tasks.append(asyncio.ensure_future(worker.run_forever()))
+    if _tasks:
+        log.info('jobs.workers_started', extra={'workers': len(_tasks), 'db': queue.path})
+
+
+async def stop_job_workers() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,94 @@
+# services/keyword_scanner.py
+"""Multi-keyword label scanner (Aho-Corasick).
+
+The parser's label vocabularies (BL labels, booking, seal, tax, port /
+voyage, container headings, ...) are compiled into one automaton that
+reports every occurrence of every keyword, overlapping ones included
+("SEAL" inside "CARRIER SEAL"), in a single pass over the text. The cost of
+a scan depends on the text length, not on the number of keywords.
+
+The automaton comes from `pyahocorasick` (C) when it is installed, else a
+pure-Python DFA built here is used; both return the same positions.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+
+class KeywordScanner:
+    """Aho-Corasick automaton over named keyword classes.
+
+    `classes` maps a class name to its keywords; keywords are matched as
+    plain uppercase substrings (scan an uppercased text). A keyword may
+    belong to several classes.
+    """
+
+    def __init__(self, classes: Mapping[str, Iterable[str]], native: bool = True):
+        self.classes: Dict[str, Tuple[str, ...]] = {
+            name: tuple(dict.fromkeys(k.upper() for k in keywords if k)) for name, keywords in classes.items()
+        }
+        self.keywords = frozenset(k for kws in self.classes.values() for k in kws)
+        if native and ahocorasick is not None:
+            self.engine = "pyahocorasick"
+            self._automaton = ahocorasick.Automaton()
+            for k in self.keywords:
+                self._automaton.add_word(k, k)
+            if self.keywords:
+                self._automaton.make_automaton()
+        else:
+            self.engine = "python"
+            self._delta, self._out = _build_dfa(self.keywords)
+
+    def scan(self, text: str) -> Dict[str, List[int]]:
+        """Start offsets of every occurrence of every keyword, ascending;
+        keywords that do not occur map to an empty list."""
+        hits: Dict[str, List[int]] = {k: [] for k in self.keywords}
+        if not text or not self.keywords:
+            return hits
+        if self.engine == "pyahocorasick":
+            for end, k in self._automaton.iter(text):
+                hits[k].append(end - len(k) + 1)
+            return hits
+        delta, out = self._delta, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for k in out[state]:
+                    hits[k].append(i - len(k) + 1)
+        return hits
+
+
+def _build_dfa(keywords: Iterable[str]) -> Tuple[List[Dict[str, int]], List[Tuple[str, ...]]]:
+    """Aho-Corasick trie with failure links folded into a full transition
+    table: one dict lookup per input character, missing entries lead to the
+    root. out[state] lists the keywords ending in that state."""
+    goto: List[Dict[str, int]] = [{}]
+    out: List[Tuple[str, ...]] = [()]
+    for k in keywords:
+        state = 0
+        for ch in k:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                goto.append({})
+                out.append(())
+                nxt = goto[state][ch] = len(goto) - 1
+            state = nxt
+        out[state] += (k,)
+
+    fail = [0] * len(goto)
+    delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        # breadth-first: the failure state's table is complete already
+        delta[state] = {**delta[fail[state]], **goto[state]}
+        out[state] += out[fail[state]]
+        for ch, nxt in goto[state].items():
+            fail[nxt] = delta[fail[state]].get(ch, 0)
+            queue.append(nxt)
+    return delta, out
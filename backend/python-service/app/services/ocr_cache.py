@@ -0,0 +1,172 @@
+# services/ocr_cache.py
+"""Content-addressed on-disk cache for OCR results.
+
+Entries are keyed by sha256(config fingerprint + document bytes) and stored
+as one JSON file each. Reads refresh the file mtime, and eviction removes the
+least recently used files once the directory grows past `max_bytes`. Writes
+go through a temp file + os.replace, so several uvicorn workers can share one
+directory. Hit/miss counters are per process: lookups made in executor
+child processes are counted by the API process (`record_lookup`).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional
+
+from core.config import Settings
+from core.logging import get_logger
+
+log = get_logger('services.ocr_cache')
+
+
+class OcrCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(data: bytes, fingerprint: str) -> str:
+        h = hashlib.sha256()
+        h.update(fingerprint.encode('utf-8'))
+        h.update(b'\0')
+        h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str, count: bool = True) -> Optional[dict]:
+        """The cached value, or None. With `count=False` the hit/miss
+        counters are left to the caller (`record`)."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path, None)  # LRU: mark as recently used
+        except FileNotFoundError:
+            value = None
+        except Exception:
+            log.warning('ocr_cache.read_failed', extra={'key': key}, exc_info=True)
+            value = None
+
+        if count:
+            self.record(value is not None)
+        return value
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key: str, value: dict) -> None:
+        payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        if len(payload) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            try:
+                replaced = os.path.getsize(path)  # an overwrite frees the old entry
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except Exception:
+            log.warning('ocr_cache.write_failed', extra={'key': key}, exc_info=True)
+            return
+
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._scan_bytes()
+            else:
+                self._approx_bytes += len(payload) - replaced
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        out = []
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if not e.name.endswith('.json'):
+                    continue
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                out.append((st.st_mtime, st.st_size, e.path))
+        return out
+
+    def _scan_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._approx_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries()
+            return {
+                'enabled': True,
+                'directory': self.directory,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache: Optional[OcrCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OcrCache]:
+    """Return the process-wide cache, or None when OCR_CACHE_DIR is empty."""
+    global _cache
+    settings = Settings()
+    if not settings.OCR_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.directory != settings.OCR_CACHE_DIR:
+            _cache = OcrCache(settings.OCR_CACHE_DIR, int(settings.OCR_CACHE_MAX_MB * 1024 * 1024))
+        return _cache
+
+
+def record_lookup(cached: Optional[bool]) -> None:
+    """Count a lookup reported by `ocr_document(count_cache=False)` (its
+    "cached" flag, None when the cache was not consulted). OCR runs in
+    executor child processes, whose own counters /metrics/ocr never sees."""
+    cache = get_ocr_cache()
+    if cache is not None and cached is not None:
+        cache.record(cached)
+
+
+def cache_stats() -> dict:
+    cache = get_ocr_cache()
+    if cache is None:
+        return {'enabled': False}
+    return cache.stats()
@@ -0,0 +1,180 @@
+# services/ocr_engines.py
+"""Tesseract backends.
+
+`pytesseract` starts one `tesseract` process per call and reloads the
+eng+fra traineddata every time. `tesserocr` drives libtesseract in-process:
+one initialised API handle is kept per (thread, lang) and reused for every
+page and request served by that worker.
+
+Both backends expose the same two calls, mirroring pytesseract:
+`image_to_string(img, psm, variant, dpi)` and `image_to_data(...)`, the
+latter returning the pytesseract `Output.DICT` layout (text, conf,
+block_num, par_num, line_num, left, top, width, height).
+"""
+import threading
+from typing import Dict, Optional
+
+from PIL import Image
+import pytesseract
+
+try:
+    import tesserocr
+except Exception:
+    tesserocr = None
+
+from core.logging import get_logger
+
+DEFAULT_LANG = "eng+fra"
+
+
+def tesseract_config(psm: int, variant: str, dpi: int = 300, lang: str = DEFAULT_LANG) -> str:
+    if variant == "gray":
+        return (
+            f"-l {lang} "
+            f"--oem 3 "
+            f"--psm {psm} "
+            f"-c preserve_interword_spaces=1 "
+            f"--dpi {dpi}"
+        )
+    return f"-l {lang} --oem 3 --psm {psm} --dpi {dpi}"
+
+
+class PytesseractBackend:
+    """One tesseract subprocess per call (historical behaviour)."""
+
+    name = "pytesseract"
+
+    def warm(self) -> None:
+        pass
+
+    def image_to_string(self, img: Image.Image, psm: int, variant: str, dpi: int = 300,
+                        lang: str = DEFAULT_LANG) -> str:
+        return pytesseract.image_to_string(img, config=tesseract_config(psm, variant, dpi, lang))
+
+    def image_to_data(self, img: Image.Image, psm: int, variant: str, dpi: int = 300,
+                      lang: str = DEFAULT_LANG) -> dict:
+        return pytesseract.image_to_data(
+            img,
+            config=tesseract_config(psm, variant, dpi, lang),
+            output_type=pytesseract.Output.DICT,
+        )
+
+
+class TesserocrBackend:
+    """Persistent libtesseract handles (one per thread and language).
+
+    A PyTessBaseAPI is not thread-safe, so handles are thread-local; in the
+    page process pool every worker process keeps its own warm handle.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def warm(self, lang: str = DEFAULT_LANG) -> None:
+        self._api(lang)
+
+    def _api(self, lang: str):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(lang)
+        if api is None:
+            get_logger().info("ocr_engine.init", extra={"backend": self.name, "lang": lang})
+            api = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.DEFAULT)
+            apis[lang] = api
+        return api
+
+    def _prepare(self, img: Image.Image, psm: int, variant: str, dpi: int, lang: str):
+        api = self._api(lang)
+        api.SetPageSegMode(psm)
+        api.SetVariable("preserve_interword_spaces", "1" if variant == "gray" else "0")
+        api.SetVariable("user_defined_dpi", str(dpi))
+        api.SetImage(img)
+        return api
+
+    def image_to_string(self, img: Image.Image, psm: int, variant: str, dpi: int = 300,
+                        lang: str = DEFAULT_LANG) -> str:
+        api = self._prepare(img, psm, variant, dpi, lang)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_data(self, img: Image.Image, psm: int, variant: str, dpi: int = 300,
+                      lang: str = DEFAULT_LANG) -> dict:
+        api = self._prepare(img, psm, variant, dpi, lang)
+        RIL = tesserocr.RIL
+        data: Dict[str, list] = {
+            k: [] for k in ("text", "conf", "block_num", "par_num", "line_num",
+                            "left", "top", "width", "height")
+        }
+        try:
+            api.Recognize()
+            it = api.GetIterator()
+            block = par = line = 0
+            for word in tesserocr.iterate_level(it, RIL.WORD):
+                if word.IsAtBeginningOf(RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if word.IsAtBeginningOf(RIL.PARA):
+                    par, line = par + 1, 0
+                if word.IsAtBeginningOf(RIL.TEXTLINE):
+                    line += 1
+                text = word.GetUTF8Text(RIL.WORD)
+                box = word.BoundingBox(RIL.WORD)
+                if text is None or box is None:
+                    continue
+                x1, y1, x2, y2 = box
+                data["text"].append(text)
+                data["conf"].append(word.Confidence(RIL.WORD))
+                data["block_num"].append(block)
+                data["par_num"].append(par)
+                data["line_num"].append(line)
+                data["left"].append(x1)
+                data["top"].append(y1)
+                data["width"].append(x2 - x1)
+                data["height"].append(y2 - y1)
+        finally:
+            api.Clear()
+        return data
+
+
+_backends: Dict[str, object] = {}
+_backends_lock = threading.Lock()
+
+
+def available_backends() -> list:
+    names = ["pytesseract"]
+    if tesserocr is not None:
+        names.append("tesserocr")
+    return names
+
+
+def _resolve(name: str) -> str:
+    if name == "auto":
+        return "tesserocr" if tesserocr is not None else "pytesseract"
+    if name == "tesserocr" and tesserocr is None:
+        get_logger().warning("ocr_engine.unavailable", extra={"backend": name})
+        return "pytesseract"
+    if name not in ("pytesseract", "tesserocr"):
+        get_logger().warning("ocr_engine.unknown", extra={"backend": name})
+        return "pytesseract"
+    return name
+
+
+def get_ocr_backend(name: Optional[str] = None):
+    """Return the shared backend for `name` ('pytesseract', 'tesserocr' or
+    'auto' = tesserocr when installed). Unknown or unavailable backends fall
+    back to pytesseract."""
+    requested = (name or "auto").lower()
+    with _backends_lock:
+        backend = _backends.get(requested)
+        if backend is None:
+            resolved = _resolve(requested)
+            backend = _backends.get(resolved)
+            if backend is None:
+                backend = TesserocrBackend() if resolved == "tesserocr" else PytesseractBackend()
+                _backends[resolved] = backend
+            _backends[requested] = backend
+        return backend
@@ -0,0 +1,223 @@
+# services/ocr_layout.py
+"""Word-level OCR layout kept next to the flattened text.
+
+`image_to_data` already returns every word with its box, confidence and
+block/paragraph/line numbers; `PageLayout` keeps that in a compact form so
+the parser can ask geometric questions ("value right of / below a label")
+without re-OCRing or re-scanning the whole text.
+
+Layouts travel as plain dicts (OCR cache, process pool):
+{"page": n, "width": w, "height": h, "words": [[text, left, top, right, bottom, conf, line], ...]}
+where `line` numbers the text lines of the page in reading order.
+"""
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+_NON_TOKEN_RE = re.compile(r"[^A-Z0-9/]")
+
+# (left, top, right, bottom, line) of a word or a run of words on one line
+Box = Tuple[int, int, int, int, int]
+
+
+def _norm(text: str) -> str:
+    return _NON_TOKEN_RE.sub("", (text or "").upper())
+
+
+class Word:
+    __slots__ = ("text", "norm", "left", "top", "right", "bottom", "conf", "line")
+
+    def __init__(self, text: str, left: int, top: int, right: int, bottom: int, conf: float, line: int):
+        self.text = text
+        self.norm = _norm(text)
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+        self.conf = conf
+        self.line = line
+
+    def to_list(self) -> list:
+        return [self.text, self.left, self.top, self.right, self.bottom, self.conf, self.line]
+
+
+def _span_box(words: Sequence[Word]) -> Box:
+    return (
+        min(w.left for w in words),
+        min(w.top for w in words),
+        max(w.right for w in words),
+        max(w.bottom for w in words),
+        words[0].line,
+    )
+
+
+class PageLayout:
+    """Words of one OCRed page, grouped by line (coordinates in page pixels)."""
+
+    __slots__ = ("page", "width", "height", "words", "_lines")
+
+    def __init__(self, words: List[Word], width: int = 0, height: int = 0, page: int = 1):
+        self.page = page
+        self.width = width
+        self.height = height
+        self.words = words
+        self._lines: Optional[List[List[Word]]] = None
+
+    @classmethod
+    def from_data(cls, data: dict, size: Tuple[int, int] = (0, 0), page: int = 1) -> "PageLayout":
+        """Build from pytesseract `Output.DICT` (as returned by both OCR backends)."""
+        words: List[Word] = []
+        line_ids: dict = {}
+        for i, text in enumerate(data.get("text", [])):
+            text = (text or "").strip()
+            if not text:
+                continue
+            try:
+                key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                left, top = int(data["left"][i]), int(data["top"][i])
+                right, bottom = left + int(data["width"][i]), top + int(data["height"][i])
+                conf = round(float(data["conf"][i]), 1)
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+            line = line_ids.setdefault(key, len(line_ids))
+            words.append(Word(text, left, top, right, bottom, conf, line))
+        return cls(words, size[0], size[1], page)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "PageLayout":
+        words = [Word(*w) for w in d.get("words") or []]
+        return cls(words, d.get("width", 0), d.get("height", 0), d.get("page", 1))
+
+    def to_dict(self) -> dict:
+        return {
+            "page": self.page,
+            "width": self.width,
+            "height": self.height,
+            "words": [w.to_list() for w in self.words],
+        }
+
+    @property
+    def lines(self) -> List[List[Word]]:
+        if self._lines is None:
+            by_line: dict = {}
+            for w in self.words:
+                by_line.setdefault(w.line, []).append(w)
+            self._lines = [sorted(ws, key=lambda w: w.left) for _, ws in sorted(by_line.items())]
+        return self._lines
+
+    # -------------------------------------------------
+    # lookups
+    # -------------------------------------------------
+    def find(self, phrase: str, inside_word: bool = False, max_words: int = 4) -> List[Box]:
+        """Boxes of every run of consecutive words on a line that spells `phrase`.
+
+        Matching ignores case, spacing and punctuation (except '/'), so
+        "B/L No." matches "B/L NO" and "MEDU 1234567" matches "MEDU1234567".
+        With `inside_word` a single word merely containing `phrase` also
+        matches (values glued to their label, e.g. "NO:MEDU1234567").
+        """
+        target = _norm(phrase)
+        if not target:
+            return []
+        boxes = []
+        for line in self.lines:
+            for start, word in enumerate(line):
+                if inside_word and target in word.norm:
+                    boxes.append(_span_box([word]))
+                    continue
+                joined = ""
+                for end in range(start, min(len(line), start + max_words)):
+                    joined += line[end].norm
+                    if joined == target:
+                        boxes.append(_span_box(line[start:end + 1]))
+                        break
+                    if not target.startswith(joined):
+                        break
+        return boxes
+
+    def line(self, line_id: int) -> List[Word]:
+        for words in self.lines:
+            if words and words[0].line == line_id:
+                return words
+        return []
+
+    def right_of(self, box: Box) -> List[Word]:
+        """Words after `box` on its line, nearest first."""
+        left, top, right, bottom, line = box
+        return [w for w in self.line(line) if w.left >= right - 1]
+
+    def below(self, box: Box, max_lines: float = 2.5) -> List[Word]:
+        """Words of the first line under `box` that overlaps it horizontally.
+
+        Only lines starting within `max_lines` label heights are considered.
+        """
+        left, top, right, bottom, _ = box
+        reach = bottom + max_lines * max(1, bottom - top)
+        slack = max(1, bottom - top)
+        for line in self.lines:
+            under = [w for w in line if bottom <= w.top <= reach and w.right >= left - slack and w.left <= right + slack]
+            if under:
+                # keep the value's own words that extend past the label
+                first = min(under, key=lambda w: w.left)
+                return [w for w in line if w.left >= first.left]
+        return []
+
+    def value_right_of(self, label: str) -> Optional[str]:
+        for box in self.find(label):
+            words = self.right_of(box)
+            if words:
+                return " ".join(w.text for w in words)
+        return None
+
+    def value_below(self, label: str) -> Optional[str]:
+        for box in self.find(label):
+            words = self.below(box)
+            if words:
+                return " ".join(w.text for w in words)
+        return None
+
+    def is_labelled(self, token: str, labels: Iterable[str], max_gap: float = 0.5) -> bool:
+        """Whether `token` sits right of (same line, within `max_gap` of the
+        page width) or directly below one of `labels`."""
+        targets = self.find(token, inside_word=True)
+        if not targets:
+            return False
+        width = self.width or max((w.right for w in self.words), default=0)
+        for label in labels:
+            for lbox in self.find(label):
+                for tbox in targets:
+                    if tbox[4] == lbox[4] and 0 <= tbox[0] - lbox[2] <= max_gap * width:
+                        return True
+                    if tbox[1] >= lbox[3] and tbox[0] <= lbox[2] and tbox[2] >= lbox[0] and \
+                            tbox[1] - lbox[3] <= 2.5 * max(1, lbox[3] - lbox[1]):
+                        return True
+        return False
+
+
+class DocumentLayout:
+    """Page layouts of a document; lookups return the first page that answers."""
+
+    __slots__ = ("pages",)
+
+    def __init__(self, pages: List[PageLayout]):
+        self.pages = pages
+
+    @classmethod
+    def from_dicts(cls, pages: Optional[Iterable[dict]]) -> Optional["DocumentLayout"]:
+        layouts = [PageLayout.from_dict(p) for p in pages or [] if p and p.get("words")]
+        return cls(layouts) if layouts else None
+
+    @classmethod
+    def coerce(cls, layout) -> Optional["DocumentLayout"]:
+        """Accept a DocumentLayout, a PageLayout or the list-of-dicts form."""
+        if layout is None or isinstance(layout, cls):
+            return layout
+        if isinstance(layout, PageLayout):
+            return cls([layout])
+        return cls.from_dicts(layout)
+
+    def value_right_of(self, label: str) -> Optional[str]:
+        return next((v for v in (p.value_right_of(label) for p in self.pages) if v), None)
+
+    def value_below(self, label: str) -> Optional[str]:
+        return next((v for v in (p.value_below(label) for p in self.pages) if v), None)
+
+    def is_labelled(self, token: str, labels: Iterable[str], max_gap: float = 0.5) -> bool:
+        labels = list(labels)
+        return any(p.is_labelled(token, labels, max_gap) for p in self.pages)
@@ -1,48 +1,117 @@
 # services/ocr_service.py
 import io
 import logging
-from typing import Optional, List
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, List, Tuple
 import re
 
-import requests
-from PIL import Image, ImageOps
-import pytesseract
-from pdf2image import convert_from_bytes
+from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PyPDF2 import PdfReader
 
+from core.config import Settings
 from core.logging import get_logger
+from services.bl_parser import pick_best_bl
+from services.image_preprocess import PreparedImage, prepare_image
+from services.ocr_layout import PageLayout
+from services.pdf_images import page_scan_dpi, page_scan_image
+from services.text_layer import get_text_backend
+from services.text_quality import score_text
+from services.ocr_cache import OcrCache, get_ocr_cache
+from services.ocr_engines import get_ocr_backend
 
 logger = logging.getLogger(__name__)
 
 # -------------------------------------------------
-# OCR IMAGE CORE
+# DEADLINE
 # -------------------------------------------------
-def _ocr_image(img: Image.Image) -> str:
-    log = get_logger()
-    log.debug("ocr_image.start")
+class Deadline:
+    """Wall-clock OCR budget shared by the page and PSM loops.
 
-    texts: List[str] = []
+    `at` is an epoch timestamp (None = no limit) so it can be handed to pool
+    workers as a plain float; `hit` records that a loop was cut short.
+    """
 
-    # 1️⃣ Pré-traitement robuste
-    try:
-        img = img.convert("L")
-        img = ImageOps.autocontrast(img)
-    except Exception:
-        pass
+    __slots__ = ("at", "hit")
+
+    def __init__(self, at: Optional[float] = None):
+        self.at = at
+        self.hit = False
+
+    def expired(self) -> bool:
+        if self.at is not None and time.time() >= self.at:
+            self.hit = True
+            return True
+        return False
 
-    # ⚠️ BL = texte structuré → éviter PSM trop agressifs
-    psm_list = [6, 4, 3]  # 6 = bloc, 4 = colonne, 3 = auto
 
-    for psm in psm_list:
+def _skipped_page() -> dict:
+    return {"text": "", "conf": None, "dpi": None, "passes": [], "levels_tried": [], "skipped": True}
+
+
+# -------------------------------------------------
+# OCR IMAGE CORE
+# -------------------------------------------------
+# ⚠️ BL = texte structuré → éviter PSM trop agressifs
+PSM_LIST = [6, 4, 3]  # 6 = bloc, 4 = colonne, 3 = auto
+
+
+def _data_to_text(data: dict) -> str:
+    """Rebuild line-structured text from `image_to_data` output."""
+    lines: List[str] = []
+    current_key = None
+    current: List[str] = []
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if key != current_key and current:
+            lines.append(" ".join(current))
+            current = []
+        current_key = key
+        current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+
+def _mean_confidence(data: dict) -> float:
+    """Mean Tesseract word confidence (0-100), or -1 when no word was read."""
+    confs = []
+    for i, word in enumerate(data.get("text", [])):
+        if not (word or "").strip():
+            continue
         try:
-            config = (
-                f"-l eng+fra "
-                f"--oem 3 "
-                f"--psm {psm} "
-                f"-c preserve_interword_spaces=1 "
-                f"--dpi 300"
-            )
-            txt = pytesseract.image_to_string(img, config=config)
+            conf = float(data["conf"][i])
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+        if conf >= 0:
+            confs.append(conf)
+    return sum(confs) / len(confs) if confs else -1.0
+
+
+def _ocr_image_exhaustive(
+    page: PreparedImage, passes: List[dict], dpi: int = 300, engine=None, deadline: Optional[Deadline] = None
+) -> str:
+    """Historical cascade: every PSM on grayscale then binarized, keep longest."""
+    log = get_logger()
+    engine = engine or get_ocr_backend(Settings().OCR_BACKEND)
+    deadline = deadline or Deadline()
+    texts: List[str] = []
+
+    for psm in PSM_LIST:
+        if passes and deadline.expired():
+            return max(texts, key=len) if texts else ""
+        try:
+            txt = engine.image_to_string(page.gray, psm, "gray", dpi)
+            passes.append({"variant": "gray", "psm": psm, "len": len(txt or "")})
             if txt and len(txt.strip()) > 20:
                 texts.append(txt)
                 log.debug("ocr_image.psm", extra={"psm": psm, "len": len(txt)})
@@ -51,11 +120,13 @@ def _ocr_image(img: Image.Image) -> str:
 
     # 2️⃣ Fallback binarisé (en dernier recours)
     try:
-        bw = img.point(lambda x: 0 if x < 160 else 255, "1")
-        for psm in psm_list:
+        bw = page.binary
+        for psm in PSM_LIST:
+            if deadline.expired():
+                break
             try:
-                config = f"-l eng+fra --oem 3 --psm {psm} --dpi 300"
-                txt = pytesseract.image_to_string(bw, config=config)
+                txt = engine.image_to_string(bw, psm, "binary", dpi)
+                passes.append({"variant": "binary", "psm": psm, "len": len(txt or "")})
                 if txt and len(txt.strip()) > 20:
                     texts.append(txt)
             except Exception:
@@ -67,88 +138,548 @@ def _ocr_image(img: Image.Image) -> str:
     return max(texts, key=len) if texts else ""
 
 
-# -------------------------------------------------
-# PDF OCR
-# -------------------------------------------------
-def _extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+def _ocr_image_adaptive(
+    page: PreparedImage,
+    passes: List[dict],
+    settings: Settings,
+    dpi: int = 300,
+    engine=None,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[str, float, Optional[dict]]:
+    """Confidence-driven cascade.
+
+    Stops at the first pass whose mean word confidence reaches
+    OCR_MIN_CONFIDENCE; the binarized copy is only tried when the best
+    grayscale pass stays below OCR_BINARIZE_BELOW. Otherwise the most
+    confident pass wins. Returns (text, mean confidence, `image_to_data`
+    output) of that pass.
+    """
+    best_text, best_conf, best_data = "", -1.0, None
+    engine = engine or get_ocr_backend(settings.OCR_BACKEND)
+    deadline = deadline or Deadline()
+
+    def run(image: Image.Image, variant: str) -> bool:
+        nonlocal best_text, best_conf, best_data
+        for psm in PSM_LIST:
+            if passes and deadline.expired():
+                return True
+            try:
+                data = engine.image_to_data(image, psm, variant, dpi)
+            except Exception:
+                continue
+            txt = _data_to_text(data)
+            conf = _mean_confidence(data)
+            passes.append({"variant": variant, "psm": psm, "conf": round(conf, 1), "len": len(txt)})
+            if len(txt.strip()) <= 20:
+                continue
+            if conf > best_conf:
+                best_text, best_conf, best_data = txt, conf, data
+            if conf >= settings.OCR_MIN_CONFIDENCE:
+                return True
+        return False
+
+    if run(page.gray, "gray"):
+        return best_text, best_conf, best_data
+
+    if best_conf < settings.OCR_BINARIZE_BELOW and not deadline.expired():
+        try:
+            bw = page.binary
+        except Exception:
+            bw = None
+        if bw is not None:
+            run(bw, "binary")
+
+    return best_text, best_conf, best_data
+
+
+def _ocr_image_detailed(img: Image.Image, dpi: int = 300, deadline: Optional[Deadline] = None) -> dict:
+    """OCR one page image and report which passes ran.
+
+    Returns {"text": str, "conf": float | None, "dpi": int,
+    "passes": [{"variant", "psm", "len", "conf"?}, ...]}. `conf` is only
+    known in adaptive mode (image_to_string reports no confidence), and so
+    is `layout` (PageLayout dict of the winning pass, else None). Once
+    `deadline` expires no further pass is started (at least one always runs).
+    The page is preprocessed once (OCR_PREPROCESS) for all passes; `skew`
+    is the deskew correction applied, in degrees.
+    """
     log = get_logger()
+    log.debug("ocr_image.start")
+    settings = Settings()
+    passes: List[dict] = []
 
-    # 1️⃣ PDF SEARCHABLE (prioritaire)
+    # 1️⃣ Pré-traitement robuste
     try:
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        pages_text = []
-        for i, page in enumerate(reader.pages):
-            t = page.extract_text() or ""
-            if t.strip():
-                # preserve page separation and priority to page 1
-                pages_text.append(f"--- PAGE {i+1} ---\n{t.strip()}")
-
-        joined = "\n".join(pages_text).strip()
-        if len(joined) > 50:
-            log.debug("pdf.searchable.success", extra={"len": len(joined)})
-            return joined
+        page = prepare_image(img, settings.OCR_PREPROCESS, dpi)
     except Exception:
-        log.debug("pdf.searchable.failed", exc_info=True)
+        log.exception("ocr_image.preprocess_failed", extra={"mode": settings.OCR_PREPROCESS})
+        page = PreparedImage("basic", img)
 
-    # 2️⃣ OCR IMAGE (fallback)
-    try:
-        log.info("pdf.image_ocr.start", extra={"bytes": len(pdf_bytes)})
-        images = convert_from_bytes(
-            pdf_bytes,
-            dpi=300,
-            fmt="png",
-            thread_count=2,
-        )
+    engine = get_ocr_backend(settings.OCR_BACKEND)
+    conf = layout = None
+    if settings.OCR_PSM_MODE == "adaptive":
+        text, conf, data = _ocr_image_adaptive(page, passes, settings, dpi, engine, deadline)
+        if data is not None:
+            layout = PageLayout.from_data(data, page.gray.size).to_dict()
+    else:
+        text = _ocr_image_exhaustive(page, passes, dpi, engine, deadline)
 
-        ocr_texts = []
-        for i, img in enumerate(images):
-            t = _ocr_image(img)
-            if t:
-                ocr_texts.append(f"--- PAGE {i+1} ---\n{t.strip()}")
-            log.debug("pdf.image_ocr.page", extra={"page": i + 1, "len": len(t)})
+    return {"text": text, "conf": conf, "dpi": dpi, "passes": passes, "skew": page.skew, "layout": layout}
 
-        joined = "\n".join(ocr_texts)
-        log.info(
-            "pdf.image_ocr.done",
-            extra={"pages": len(images), "text_len": len(joined)},
-        )
-        return joined
+
+def _ocr_image(img: Image.Image) -> str:
+    return _ocr_image_detailed(img)["text"]
+
+
+# -------------------------------------------------
+# PAGE POOL
+# -------------------------------------------------
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+
+def _warm_ocr_worker() -> None:
+    """Pool initializer: load the OCR engine once per worker process."""
+    try:
+        get_ocr_backend(Settings().OCR_BACKEND).warm()
     except Exception:
-        log.exception("pdf.image_ocr.failed")
-        return ""
+        get_logger().warning("ocr_engine.warm_failed", exc_info=True)
+
+
+def _get_page_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared page pool of `workers` processes (created lazily).
+
+    There is a single pool, sized to OCR_PAGE_WORKERS whatever the page
+    count of the document; it is only replaced when that size changes.
+    """
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        stale = None
+        if _page_pool is not None and _page_pool_workers != workers:
+            stale, _page_pool = _page_pool, None
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_ocr_worker)
+            _page_pool_workers = workers
+        pool = _page_pool
+    if stale is not None:
+        stale.shutdown(wait=False, cancel_futures=True)
+    return pool
+
+
+def shutdown_page_pool() -> None:
+    """Stop the page pool (app shutdown, or after it broke)."""
+    global _page_pool
+    with _page_pool_lock:
+        pool, _page_pool = _page_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 # -------------------------------------------------
-# PUBLIC API
+# STREAMING RASTERIZATION
 # -------------------------------------------------
-def ocr_from_bytes(data: bytes, content_type: Optional[str] = None) -> str:
+def _pdf_page_count(pdf_path: str) -> int:
+    try:
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    except Exception:
+        with open(pdf_path, "rb") as f:
+            return len(PdfReader(f).pages)
+
+
+def _page_windows(page_numbers: List[int], window: int) -> List[Tuple[int, int]]:
+    """Group sorted page numbers into contiguous (first, last) runs of at most `window` pages."""
+    runs: List[Tuple[int, int]] = []
+    for n in page_numbers:
+        if runs and n == runs[-1][1] + 1 and n - runs[-1][0] < window:
+            runs[-1] = (runs[-1][0], n)
+        else:
+            runs.append((n, n))
+    return runs
+
+
+def _rasterize(pdf_path: str, dpi: int, first_page: int, last_page: int) -> List[Image.Image]:
+    """Render pages as 8-bit grayscale ("L") images.
+
+    poppler writes raw PGM (`pdftoppm -gray`), which PIL maps straight into
+    an "L" image: no PNG encode/decode and no RGB -> L conversion before OCR.
     """
-    Perform OCR on in-memory bytes.
-    Returns NORMALIZED text (UPPERCASE, collapsed spaces).
+    return convert_from_path(
+        pdf_path, dpi=dpi, fmt="ppm", grayscale=True, first_page=first_page, last_page=last_page
+    )
+
+
+def _iter_pdf_images(pdf_path: str, page_numbers: List[int], dpi: int = 300, window: int = 1):
+    """Yield (page_number, image) rendering at most `window` pages at a time.
+
+    Only the current window is held in memory, so peak RSS does not grow
+    with the number of pages in the document.
     """
-    raw_text = ""
+    window = max(1, int(window or 1))
+    for first, last in _page_windows(sorted(page_numbers), window):
+        images = _rasterize(pdf_path, dpi, first, last)
+        for offset, img in enumerate(images):
+            yield first + offset, img
+        del images
+
+
+def _render_page(pdf_path: str, page_number: int, dpi: int) -> Optional[Image.Image]:
+    images = _rasterize(pdf_path, dpi, page_number, page_number)
+    return images[0] if images else None
+
+
+# -------------------------------------------------
+# EMBEDDED SCAN IMAGES
+# -------------------------------------------------
+# coarser scans are rendered instead: poppler's upscaling helps tesseract on
+# small glyphs. Poor reads of finer scans still climb the ladder.
+EMBEDDED_MIN_DPI = 150
+
 
+def _open_pdf(pdf_path: str) -> Optional[PdfReader]:
     try:
-        is_pdf = (
-            (content_type and "pdf" in content_type.lower())
-            or data[:4] == b"%PDF"
-        )
+        return PdfReader(pdf_path)
+    except Exception:
+        get_logger().debug("pdf.open_failed", exc_info=True)
+        return None
 
-        if is_pdf:
-            raw_text = _extract_text_from_pdf_bytes(data)
+
+def _scan_pages(reader: Optional[PdfReader], page_numbers: List[int]) -> set:
+    """Pages that are a single embedded scan image of at least EMBEDDED_MIN_DPI."""
+    if reader is None:
+        return set()
+    found = set()
+    for n in page_numbers:
+        try:
+            dpi = page_scan_dpi(reader.pages[n - 1])
+        except IndexError:
+            continue
+        if dpi and dpi >= EMBEDDED_MIN_DPI:
+            found.add(n)
+    return found
+
+
+def _embedded_scan(
+    reader: Optional[PdfReader], page_number: int, levels: List[int]
+) -> Tuple[Optional[Image.Image], List[int]]:
+    """(native scan image, ladder) for a page listed by `_scan_pages`.
+
+    The image stands for the first ladder level; levels above its native dpi
+    are still rendered by poppler when the read is poor. (None, levels) when
+    the image cannot be decoded here: the ladder then renders the page.
+    """
+    found = page_scan_image(reader.pages[page_number - 1]) if reader is not None else None
+    if found is None:
+        return None, levels
+    img, dpi = found
+    return img, [dpi] + [level for level in levels if level > dpi]
+
+
+# -------------------------------------------------
+# RESOLUTION LADDER
+# -------------------------------------------------
+def _needs_escalation(res: dict, settings: Settings) -> bool:
+    """True when a page read should be retried at the next ladder level."""
+    if res.get("conf") is not None:
+        return res["conf"] < settings.OCR_ESCALATE_BELOW
+    # exhaustive mode reports no confidence: only escalate (near-)empty reads
+    return len((res.get("text") or "").strip()) < 100
+
+
+def _better_read(res: dict, best: dict) -> bool:
+    if res.get("conf") is not None and best.get("conf") is not None:
+        return res["conf"] > best["conf"]
+    return len(res.get("text") or "") >= len(best.get("text") or "")
+
+
+def _ocr_page_ladder(
+    pdf_path: str,
+    page_number: int,
+    levels: List[int],
+    first_image: Optional[Image.Image] = None,
+    deadline: Optional[Deadline] = None,
+) -> dict:
+    """OCR a page at levels[0] dpi, re-rendering at the next level while the
+    read stays below threshold. The report records every level tried and
+    `truncated` when the deadline cut passes or levels short."""
+    settings = Settings()
+    deadline = deadline or Deadline()
+    best = None
+    tried = []
+    for i, dpi in enumerate(levels):
+        if i > 0 and deadline.expired():
+            break
+        img = first_image if (i == 0 and first_image is not None) else _render_page(pdf_path, page_number, dpi)
+        if img is None:
+            break
+        res = _ocr_image_detailed(img, dpi=dpi, deadline=deadline)
+        del img
+        tried.append(dpi)
+        if best is None or _better_read(res, best):
+            best = res
+        if not _needs_escalation(res, settings):
+            break
+    if best is None:
+        best = {"text": "", "conf": None, "dpi": levels[0], "passes": []}
+    best["levels_tried"] = tried
+    best["truncated"] = deadline.hit
+    return best
+
+
+def _rasterize_and_ocr_page(
+    pdf_path: str,
+    page_number: int,
+    levels: Optional[List[int]] = None,
+    deadline_at: Optional[float] = None,
+) -> dict:
+    """Pool task: render a single page from the shared temp file and OCR it."""
+    deadline = Deadline(deadline_at)
+    if deadline.expired():
+        return _skipped_page()
+    levels = levels or [300]
+    img = None
+    if Settings().OCR_EMBEDDED_IMAGES:
+        reader = _open_pdf(pdf_path)
+        if _scan_pages(reader, [page_number]):
+            img, levels = _embedded_scan(reader, page_number, levels)
+    res = _ocr_page_ladder(pdf_path, page_number, levels, first_image=img, deadline=deadline)
+    res["raster"] = "embedded" if img is not None else "poppler"
+    return res
+
+
+def _ocr_pdf_pages(
+    pdf_path: str,
+    page_numbers: List[int],
+    workers: Optional[int] = None,
+    levels: Optional[List[int]] = None,
+    deadline_at: Optional[float] = None,
+) -> List[dict]:
+    """Rasterize and OCR `page_numbers`; reports are returned in the same order.
+
+    With `workers` > 1 (default: OCR_PAGE_WORKERS) each pool process renders
+    and OCRs its own page from `pdf_path`, so no image crosses a process
+    boundary; `map` keeps the results aligned with page order. Otherwise
+    pages are streamed OCR_RASTER_WINDOW at a time. Falls back to the
+    sequential path if the pool breaks.
+
+    Pages are read at the first dpi of `levels` (default OCR_DPI_LADDER) and
+    re-rendered at the next level only when the read is poor.
+
+    Pages that are a single embedded scan image (OCR_EMBEDDED_IMAGES) are
+    read from that image at its native resolution instead of being rendered.
+
+    Pages not started before `deadline_at` (epoch seconds) come back as
+    {"skipped": True} reports with empty text.
+    """
+    log = get_logger()
+    settings = Settings()
+    levels = levels or settings.ocr_dpi_levels
+    if workers is None:
+        workers = settings.OCR_PAGE_WORKERS
+    page_count = len(page_numbers)
+    workers = max(1, int(workers or 1))
+
+    # the pool keeps its size; only `page_count` tasks are submitted to it
+    if workers > 1 and page_count > 1:
+        try:
+            return list(
+                _get_page_pool(workers).map(
+                    _rasterize_and_ocr_page,
+                    [pdf_path] * page_count,
+                    page_numbers,
+                    [levels] * page_count,
+                    [deadline_at] * page_count,
+                )
+            )
+        except BrokenProcessPool:
+            log.exception("pdf.image_ocr.pool_broken", extra={"workers": workers})
+            shutdown_page_pool()
+
+    deadline = Deadline(deadline_at)
+    results: Dict[int, dict] = {}
+    reader = _open_pdf(pdf_path) if settings.OCR_EMBEDDED_IMAGES else None
+    scans = _scan_pages(reader, page_numbers)
+    # the generator renders lazily: breaking out stops further rasterization
+    rendered = _iter_pdf_images(
+        pdf_path, [n for n in page_numbers if n not in scans], dpi=levels[0], window=settings.OCR_RASTER_WINDOW
+    )
+    for page in sorted(page_numbers):
+        if deadline.expired():
+            break
+        if page in scans:
+            img, page_levels = _embedded_scan(reader, page, levels)
+            raster = "embedded" if img is not None else "poppler"
         else:
-            img = Image.open(io.BytesIO(data))
-            raw_text = _ocr_image(img)
+            _, img = next(rendered, (page, None))
+            page_levels, raster = levels, "poppler"
+        results[page] = _ocr_page_ladder(pdf_path, page, page_levels, first_image=img, deadline=Deadline(deadline_at))
+        results[page]["raster"] = raster
+        del img
+    if deadline.hit:
+        log.info("pdf.image_ocr.deadline", extra={"done": sorted(results), "pages": page_numbers})
+    return [results.get(page) or {**_skipped_page(), "skipped": deadline.hit} for page in page_numbers]
+
 
+# -------------------------------------------------
+# PDF OCR
+# -------------------------------------------------
+def _join_pages(pages: List[dict]) -> str:
+    """Join page reports into the `--- PAGE n ---` separated document text."""
+    parts = []
+    for p in pages:
+        t = (p.get("text") or "").strip()
+        if t:
+            # preserve page separation and priority to page 1
+            parts.append(f"--- PAGE {p['page']} ---\n{t}")
+    return "\n".join(parts)
+
+
+def _page_text_ok(text: str, settings: Settings) -> bool:
+    """Whether a page's text layer is good enough to skip OCR for that page:
+    long garbage (glyph ids, mojibake) fails as well as empty pages."""
+    return score_text(text).score >= settings.OCR_TEXT_MIN_QUALITY
+
+
+def _read_text_layer(pdf_bytes: bytes) -> Optional[List[dict]]:
+    """Per-page text-layer reports (TEXT_LAYER_BACKEND), or None when the PDF
+    cannot be parsed."""
+    pages = get_text_backend(Settings().TEXT_LAYER_BACKEND).extract_pages(pdf_bytes)
+    if pages is None:
+        get_logger().debug("pdf.searchable.failed")
+        return None
+    return [
+        {"page": i + 1, "source": "text", "text": (text or "").strip(), "passes": []}
+        for i, text in enumerate(pages)
+    ]
+
+
+def _extract_pdf_pages(pdf_bytes: bytes, deadline_at: Optional[float] = None) -> List[dict]:
+    """Extract per-page text reports from a PDF.
+
+    The text-layer / OCR decision is made per page: pages with a usable text
+    layer keep it, only the others are rasterized and OCRed. Each report is
+    {"page", "source": "text"|"ocr", "text", "passes"} (+ dpi/conf/levels_tried
+    and skipped/truncated for OCR pages, see `deadline_at`).
+    """
+    log = get_logger()
+    settings = Settings()
+
+    # 1️⃣ PDF SEARCHABLE (prioritaire, page par page)
+    pages = _read_text_layer(pdf_bytes)
+    if pages is not None:
+        ocr_numbers = [p["page"] for p in pages if not _page_text_ok(p["text"], settings)]
+        if not ocr_numbers:
+            log.debug("pdf.searchable.success", extra={"len": len(_join_pages(pages))})
+            return pages
+    else:
+        ocr_numbers = None  # unknown page count: OCR everything
+
+    # 2️⃣ OCR IMAGE (pages sans texte exploitable)
+    try:
+        log.info("pdf.image_ocr.start", extra={"bytes": len(pdf_bytes), "pages": ocr_numbers})
+        with tempfile.TemporaryDirectory(prefix="ocr-") as tmp:
+            pdf_path = os.path.join(tmp, "document.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(pdf_bytes)
+            if ocr_numbers is None:
+                ocr_numbers = list(range(1, _pdf_page_count(pdf_path) + 1))
+                pages = [{"page": n, "source": "text", "text": "", "passes": []} for n in ocr_numbers]
+            results = _ocr_pdf_pages(pdf_path, ocr_numbers, deadline_at=deadline_at)
+            ocr_set = set(ocr_numbers)
+            text_pages = [p for p in pages if p["page"] not in ocr_set]
+            if not Deadline(deadline_at).expired():
+                _escalate_for_bl(pdf_path, ocr_numbers, results, text_pages, deadline_at)
+
+        by_number = {p["page"]: p for p in pages}
+        for n, res in zip(ocr_numbers, results):
+            by_number[n] = {
+                "page": n,
+                "source": "ocr",
+                "text": res["text"],
+                "passes": res["passes"],
+                "dpi": res.get("dpi"),
+                "conf": res.get("conf"),
+                "levels_tried": res.get("levels_tried", []),
+                "skipped": res.get("skipped", False),
+                "truncated": res.get("truncated", False),
+                "raster": res.get("raster"),
+                "layout": res.get("layout"),
+            }
+            log.debug(
+                "pdf.image_ocr.page",
+                extra={
+                    "page": n,
+                    "len": len(res["text"]),
+                    "dpi": res.get("dpi"),
+                    "levels_tried": res.get("levels_tried"),
+                    "passes": res["passes"],
+                },
+            )
+        pages = [by_number[n] for n in sorted(by_number)]
+
+        log.info(
+            "pdf.image_ocr.done",
+            extra={
+                "pages": len(pages),
+                "ocr_pages": ocr_numbers,
+                "text_len": sum(len(p["text"]) for p in pages),
+                "passes_per_page": [len(p["passes"]) for p in pages],
+            },
+        )
+        return pages
     except Exception:
-        logger.exception("ocr_from_bytes.failed")
-        raw_text = ""
+        log.exception("pdf.image_ocr.failed")
+        # keep whatever the text layer gave us
+        return [p for p in (pages or []) if p["text"]]
+
+
+def _escalate_for_bl(
+    pdf_path: str,
+    page_numbers: List[int],
+    results: List[dict],
+    text_pages: Optional[List[dict]] = None,
+    deadline_at: Optional[float] = None,
+) -> None:
+    """Second ladder trigger: when no confident BL number is found in the
+    document (text-layer pages + the ladder's output), re-read the OCR pages
+    that stopped below the top level at the top level (in place)."""
+    levels = Settings().ocr_dpi_levels
+    top = levels[-1]
+    low = [i for i, r in enumerate(results) if (r.get("dpi") or top) < top]
+    if not low:
+        return
+
+    read = list(text_pages or []) + [{"page": n, "text": r["text"]} for n, r in zip(page_numbers, results)]
+    text = _normalize_ocr_text(_join_pages(sorted(read, key=lambda p: p["page"])))
+    found = pick_best_bl(text)
+    if isinstance(found, dict) and found.get("confidence") in ("high", "medium"):
+        return
+
+    get_logger().info("pdf.image_ocr.bl_escalation", extra={"pages": [page_numbers[i] for i in low], "dpi": top})
+    redone = _ocr_pdf_pages(pdf_path, [page_numbers[i] for i in low], levels=[top], deadline_at=deadline_at)
+    for i, res in zip(low, redone):
+        if res.get("skipped"):
+            continue
+        res["levels_tried"] = results[i].get("levels_tried", []) + res.get("levels_tried", [])
+        res["escalation"] = "bl"
+        results[i] = res
 
-    # 3️⃣ NORMALISATION CRITIQUE POUR BL (SAFE)
-    # - Keep line separators (\n)
-    # - Uppercase
-    # - Collapse multiple spaces/tabs within lines
-    # - Collapse long sequences of single-char tokens like 'M E D U 9 0 2' -> 'MEDU902'
+
+def _extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    return _join_pages(_extract_pdf_pages(pdf_bytes))
+
+
+# -------------------------------------------------
+# NORMALISATION
+# -------------------------------------------------
+def _normalize_ocr_text(raw_text: str) -> str:
+    """
+    NORMALISATION CRITIQUE POUR BL (SAFE)
+    - Keep line separators (\n)
+    - Uppercase
+    - Collapse multiple spaces/tabs within lines
+    - Collapse long sequences of single-char tokens like 'M E D U 9 0 2' -> 'MEDU902'
+    """
     try:
         raw = raw_text or ""
 
@@ -188,27 +719,261 @@ def ocr_from_bytes(data: bytes, content_type: Optional[str] = None) -> str:
                 blank_count = 0
                 cleaned_lines.append(ln)
 
-        normalized = '\n'.join(cleaned_lines).strip()
-
-        get_logger().info(
-            "ocr_from_bytes.result",
-            extra={"len_raw": len(raw_text or ''), "len_norm": len(normalized)},
-        )
-        return normalized
+        return '\n'.join(cleaned_lines).strip()
     except Exception:
         get_logger().exception('ocr_normalization.failed')
         return (raw_text or '').upper()
 
 
-def ocr_from_url(url: str) -> str:
-    """Download URL and run OCR."""
+# -------------------------------------------------
+# PUBLIC API
+# -------------------------------------------------
+# Bump when a change to the OCR/normalisation code alters the produced text,
+# so cached results from the previous code are not served.
+OCR_CONFIG_VERSION = 4
+
+
+def _ocr_config_fingerprint(settings: Settings) -> str:
+    """Everything besides the input bytes that changes the OCR output."""
+    return "|".join([
+        f"v{OCR_CONFIG_VERSION}",
+        f"psm={settings.OCR_PSM_MODE}",
+        f"min_conf={settings.OCR_MIN_CONFIDENCE}",
+        f"binarize_below={settings.OCR_BINARIZE_BELOW}",
+        f"dpi_ladder={','.join(map(str, settings.ocr_dpi_levels))}",
+        f"escalate_below={settings.OCR_ESCALATE_BELOW}",
+        f"text_min_quality={settings.OCR_TEXT_MIN_QUALITY}",
+        f"preprocess={settings.OCR_PREPROCESS}",
+        f"embedded_images={settings.OCR_EMBEDDED_IMAGES}",
+        f"text_layer={get_text_backend(settings.TEXT_LAYER_BACKEND).name}",
+        f"backend={get_ocr_backend(settings.OCR_BACKEND).name}",
+    ])
+
+
+def ocr_document(
+    data: bytes, content_type: Optional[str] = None, deadline_at: Optional[float] = None,
+    count_cache: bool = True,
+) -> dict:
+    """
+    Perform OCR on in-memory bytes and report how each page was read.
+
+    Returns {"text": NORMALIZED text, "pages": [{"page", "source", "len", "passes"}],
+    "partial": bool, "skipped_pages": [int], "layout": [PageLayout dict],
+    "cached": bool, None when the cache was not consulted}. `layout` holds the word boxes of OCR pages read with
+    image_to_data (OCR_PSM_MODE=adaptive); text-layer pages have none. Results are
+    served from the OCR cache when the same bytes were already processed
+    with the same OCR configuration.
+
+    `deadline_at` (epoch seconds) bounds the work: pages not started by then
+    are skipped and PSM/ladder passes stop, and the result is `partial`
+    (partial results are never cached).
+
+    With `count_cache=False` the cache hit/miss counters are not touched:
+    the caller counts the lookup from "cached" (`ocr_cache.record_lookup`),
+    e.g. in the API process when this runs in an executor child.
+    """
+    cache = get_ocr_cache()
+    cache_key = None
+    if cache is not None and data:
+        kind = "pdf" if (content_type and "pdf" in content_type.lower()) else "auto"
+        cache_key = OcrCache.make_key(data, f"{_ocr_config_fingerprint(Settings())}|{kind}")
+        cached = cache.get(cache_key, count=count_cache)
+        if cached is not None:
+            get_logger().info("ocr_from_bytes.cache_hit", extra={"key": cache_key[:16]})
+            return {**cached, "cached": True}
+
+    result = _ocr_document_uncached(data, content_type, deadline_at)
+
+    # empty text usually means a transient failure: do not pin it in the cache
+    if cache_key and result["text"] and not result["partial"]:
+        cache.put(cache_key, result)
+    return {**result, "cached": False if cache_key else None}
+
+
+def _ocr_document_uncached(data: bytes, content_type: Optional[str], deadline_at: Optional[float] = None) -> dict:
+    pages: List[dict] = []
+    is_pdf = False
+
+    try:
+        is_pdf = (
+            (content_type and "pdf" in content_type.lower())
+            or data[:4] == b"%PDF"
+        )
+
+        if is_pdf:
+            pages = _extract_pdf_pages(data, deadline_at)
+        else:
+            img = Image.open(io.BytesIO(data))
+            deadline = Deadline(deadline_at)
+            res = _ocr_image_detailed(img, deadline=deadline)
+            pages = [{
+                "page": 1,
+                "source": "ocr",
+                "text": res["text"],
+                "passes": res["passes"],
+                "dpi": None,
+                "conf": res["conf"],
+                "truncated": deadline.hit,
+                "layout": res.get("layout"),
+            }]
+
+    except Exception:
+        logger.exception("ocr_from_bytes.failed")
+        pages = []
+
+    if is_pdf:
+        raw_text = _join_pages(pages)
+    else:
+        raw_text = pages[0]["text"] if pages else ""
+    normalized = _normalize_ocr_text(raw_text)
+
+    get_logger().info(
+        "ocr_from_bytes.result",
+        extra={"len_raw": len(raw_text or ''), "len_norm": len(normalized)},
+    )
+    reports, layout = [], []
+    for p in pages:
+        report = {k: v for k, v in p.items() if k not in ("text", "layout")}
+        report["len"] = len(p["text"] or "")
+        reports.append(report)
+        if p.get("layout"):
+            layout.append({**p["layout"], "page": p["page"]})
+    skipped = [p["page"] for p in reports if p.get("skipped")]
+    return {
+        "text": normalized,
+        "pages": reports,
+        "ladder": _ladder_summary(reports),
+        "partial": bool(skipped) or any(p.get("truncated") for p in reports),
+        "skipped_pages": skipped,
+        "layout": layout,
+    }
+
+
+def _ladder_summary(pages: List[dict]) -> dict:
+    """Per-document resolution metrics: which ladder level produced the answer."""
+    ocr_pages = [p for p in pages if p.get("dpi")]
+    return {
+        "levels": Settings().ocr_dpi_levels,
+        "final_dpi": max((p["dpi"] for p in ocr_pages), default=None),
+        "page_dpi": {p["page"]: p["dpi"] for p in ocr_pages},
+        "escalated_pages": [p["page"] for p in ocr_pages if len(p.get("levels_tried") or []) > 1],
+    }
+
+
+# -------------------------------------------------
+# FAST BL (HEADER BAND)
+# -------------------------------------------------
+PDFTOPPM_TIMEOUT_S = 60
+
+
+def _band_fraction(band: float) -> float:
+    return min(1.0, max(0.05, float(band)))
+
+
+def _header_band(img: Image.Image, band: float) -> Image.Image:
+    width, height = img.size
+    return img.crop((0, 0, width, max(1, int(height * _band_fraction(band)))))
+
+
+def _rasterize_header_band(pdf_path: str, dpi: int, band: float) -> Optional[Image.Image]:
+    """Render only the top `band` of page 1 as an "L" image.
+
+    pdf2image has no crop option, so this runs `pdftoppm -gray -H <px>`
+    itself: poppler rasterizes just the band instead of the whole page.
+    Returns None when the page size is unknown or pdftoppm fails.
+    """
     try:
-        resp = requests.get(url, timeout=20)
-        resp.raise_for_status()
-        return ocr_from_bytes(
-            resp.content,
-            content_type=resp.headers.get("content-type", ""),
+        info = pdfinfo_from_path(pdf_path)
+        m = re.match(r"\s*([\d.]+) x ([\d.]+)", str(info.get("Page size") or ""))
+        if not m:
+            return None
+        # pdftoppm crops the rotated (displayed) page
+        rotated = int(info.get("Page rot") or 0) % 180
+        height_pts = float(m.group(1) if rotated else m.group(2))
+        band_px = max(1, int(height_pts / 72.0 * dpi * _band_fraction(band)))
+        out = subprocess.run(
+            ["pdftoppm", "-r", str(dpi), "-f", "1", "-l", "1", "-gray",
+             "-x", "0", "-y", "0", "-W", "0", "-H", str(band_px), pdf_path],
+            capture_output=True, check=True, timeout=PDFTOPPM_TIMEOUT_S,
         )
+        img = Image.open(io.BytesIO(out.stdout))
+        img.load()
+        return img
     except Exception:
-        get_logger().exception("ocr_from_url.failed", extra={"url": url})
-        return ""
+        get_logger().debug("ocr_header_band.crop_render_failed", exc_info=True)
+        return None
+
+
+def ocr_header_band(
+    data: bytes, content_type: Optional[str] = None, deadline_at: Optional[float] = None,
+    count_cache: bool = True,
+) -> Optional[dict]:
+    """
+    OCR only the top OCR_FAST_BL_BAND of page 1 (where carriers print the B/L
+    number); returns {"text": NORMALIZED text, "cached": bool|None,
+    "truncated": bool}.
+
+    Returns None when the shortcut does not apply: searchable PDFs already
+    have a cheap text layer, unreadable input is left to the full path, and
+    so is a request whose `deadline_at` has already passed. Band results are
+    kept in the OCR cache under their own key (`count_cache` as in
+    `ocr_document`); results cut short by the deadline are not cached.
+    """
+    log = get_logger()
+    settings = Settings()
+    band = settings.OCR_FAST_BL_BAND
+    deadline = Deadline(deadline_at)
+    if deadline.expired():
+        return None
+
+    cache = get_ocr_cache()
+    cache_key = None
+    if cache is not None and data:
+        cache_key = OcrCache.make_key(data, f"{_ocr_config_fingerprint(settings)}|band={_band_fraction(band)}")
+        cached = cache.get(cache_key, count=count_cache)
+        if cached is not None:
+            return {"text": cached["text"], "cached": True, "truncated": False}
+
+    try:
+        is_pdf = (
+            (content_type and "pdf" in content_type.lower())
+            or data[:4] == b"%PDF"
+        )
+        if is_pdf:
+            first = get_text_backend(settings.TEXT_LAYER_BACKEND).extract_pages(data, max_pages=1)
+            if first and _page_text_ok(first[0], settings):
+                return None
+            with tempfile.TemporaryDirectory(prefix="ocr-") as tmp:
+                pdf_path = os.path.join(tmp, "document.pdf")
+                with open(pdf_path, "wb") as f:
+                    f.write(data)
+                img = _rasterize_header_band(pdf_path, 300, band)
+                if img is None:
+                    images = _rasterize(pdf_path, 300, 1, 1)
+                    if not images:
+                        return None
+                    img = _header_band(images[0], band)
+        else:
+            img = _header_band(Image.open(io.BytesIO(data)), band)
+
+        res = _ocr_image_detailed(img, deadline=deadline)
+        log.info(
+            "ocr_header_band.done",
+            extra={"band": band, "len": len(res["text"]), "passes": res["passes"], "truncated": deadline.hit},
+        )
+        text = _normalize_ocr_text(res["text"])
+    except Exception:
+        log.exception("ocr_header_band.failed")
+        return None
+
+    if cache_key and text and not deadline.hit:
+        cache.put(cache_key, {"text": text})
+    return {"text": text, "cached": False if cache_key else None, "truncated": deadline.hit}
+
+
+def ocr_from_bytes(data: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Perform OCR on in-memory bytes.
+    Returns NORMALIZED text (UPPERCASE, collapsed spaces).
+    """
+    return ocr_document(data, content_type)["text"]
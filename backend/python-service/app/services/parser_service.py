@@ -106,6 +106,7 @@ def parse_document_text(text: str, doc_type: str) -> List[Field]:
 
             # 2️⃣ Fallback: analyze candidates from extract_bl_numbers
             candidates = extract_bl_numbers(text)
+            doc = bl_parser.index_document(text)
             valid_candidates: List[Tuple[str, int]] = []
             for c in candidates:
                 if not c:
@@ -115,7 +116,7 @@ def parse_document_text(text: str, doc_type: str) -> List[Field]:
                 # If candidate is inside a container-list section and there is no explicit
                 # BL label nearby, skip it to avoid false positives from container lists.
                 try:
-                    if bl_parser.is_within_container_section(text, c) and not bl_parser.has_explicit_bl_label_near(text, c):
+                    if bl_parser.is_within_container_section(doc, c) and not bl_parser.has_explicit_bl_label_near(doc, c):
                         log.info('fallback.skip_container_section', extra={'token': c})
                         continue
                 except Exception:
@@ -124,16 +125,16 @@ def parse_document_text(text: str, doc_type: str) -> List[Field]:
                 score = 0
                 # proximity to explicit BL labels
                 try:
-                    if bl_parser.has_explicit_bl_label_near(text, c):
+                    if bl_parser.has_explicit_bl_label_near(doc, c):
                         score += 50
-                    if bl_parser.candidate_near_bl_keyword(text, c, window=80):
+                    if bl_parser.candidate_near_bl_keyword(doc, c, window=80):
                         score += 25
                     # prefer longer / more structured tokens
                     score += min(len(c), 30)
                     # penalize if in seal/container contexts but do not reject
-                    if bl_parser.is_seal_number_context(text, c):
+                    if bl_parser.is_seal_number_context(doc, c):
                         score -= 40
-                    if bl_parser.is_within_container_section(text, c):
+                    if bl_parser.is_within_container_section(doc, c):
                         score -= 30
                 except Exception:
                     # defensive: if helper not available, rely on length
@@ -0,0 +1,92 @@
+# services/pattern_set.py
+"""Several regexes run as one scan.
+
+bl_parser tries a dozen labelled B/L patterns on every document, each one a
+full `finditer` pass. A `PatternSet` compiles them once into a single
+alternation of named groups (one group per pattern) and walks the text
+once:
+
+- one C-level `search` finds the next offset where *any* pattern matches;
+  the named group that matched tells the first pattern matching there;
+- the later patterns are then tried at that offset only (`match`), since
+  several may match at the same place (e.g. "B/L NO" and "BL NO" variants);
+- a pattern whose previous match has not ended yet is skipped, exactly as
+  its own `finditer` would skip overlapping matches.
+
+`scan` therefore returns what running every pattern's `finditer` would, with
+the span and pattern id of each match, for about the cost of one pass.
+Patterns are compiled without IGNORECASE: scan an uppercased text (sre
+cannot skip ahead on case-insensitive literals, which makes them slow).
+"""
+import re
+from typing import List, Sequence, Tuple
+
+
+class PatternMatch:
+    """One match of one pattern of a set. `value` is the pattern's last
+    capture group (`re.findall` style), or the whole match when it has none."""
+
+    __slots__ = ("id", "index", "start", "end", "value")
+
+    def __init__(self, id: str, index: int, start: int, end: int, value: str):
+        self.id = id
+        self.index = index
+        self.start = start
+        self.end = end
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"PatternMatch({self.id!r}, {self.start}, {self.end}, {self.value!r})"
+
+
+class PatternSet:
+    """Named regexes compiled once and scanned together.
+
+    `patterns` is a sequence of (id, regex) pairs, in priority order. When
+    every match of every pattern starts with one of the characters of
+    `first_chars`, pass them: the merged regex is gated by a lookahead on
+    them, which lets the search skip other offsets quickly.
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str]], first_chars: str = ""):
+        self.ids = tuple(pid for pid, _ in patterns)
+        if len(set(self.ids)) != len(self.ids):
+            raise ValueError("pattern ids must be unique")
+        self.patterns = tuple(re.compile(rx) for _, rx in patterns)
+        groups = [f"(?P<_{i}>{rx})" for i, (_, rx) in enumerate(patterns)]
+        gate = "(?=[%s])" % re.escape(first_chars) if first_chars else ""
+        self.merged = re.compile(gate + "(?:" + "|".join(groups) + ")") if groups else None
+        self._value_groups = [
+            self.merged.groupindex[f"_{i}"] + (p.groups if p.groups else 0) for i, p in enumerate(self.patterns)
+        ] if groups else []
+
+    def scan(self, text: str) -> List[PatternMatch]:
+        """Every match of every pattern, ordered by start offset and, at the
+        same offset, by pattern order."""
+        out: List[PatternMatch] = []
+        if not text or self.merged is None:
+            return out
+        patterns, ids = self.patterns, self.ids
+        # offset where each pattern's own finditer would resume
+        resume = [0] * len(patterns)
+        search = self.merged.search
+        m = search(text)
+        while m is not None:
+            pos = m.start()
+            first = int(m.lastgroup[1:])
+            if pos >= resume[first]:
+                end = m.end()
+                out.append(PatternMatch(ids[first], first, pos, end, m.group(self._value_groups[first])))
+                resume[first] = end if end > pos else pos + 1
+            # patterns before `first` were tried by the alternation and fail here
+            for k in range(first + 1, len(patterns)):
+                if pos < resume[k]:
+                    continue
+                mk = patterns[k].match(text, pos)
+                if mk is not None:
+                    end = mk.end()
+                    value = mk.group(mk.re.groups) if mk.re.groups else mk.group(0)
+                    out.append(PatternMatch(ids[k], k, pos, end, value))
+                    resume[k] = end if end > pos else pos + 1
+            m = search(text, pos + 1)
+        return out
@@ -0,0 +1,183 @@
+# services/pdf_images.py
+"""Embedded scan images of PDF pages.
+
+Scanners and most "print to PDF" scan apps wrap one JPEG / CCITT / Flate
+image per page. For such pages the image can be handed to OCR as is, at its
+native resolution, instead of re-rendering the page through poppler.
+
+`page_scan_dpi(page)` / `page_scan_image(page)` only accept pages whose
+content stream paints a single image XObject covering (almost) the whole
+page, with no text, vector drawing or inline image; anything else returns
+None and is rasterized.
+"""
+import io
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+from PyPDF2.generic import ContentStream
+
+from core.logging import get_logger
+
+# share of the page area the image must cover to stand for the page
+MIN_COVERAGE = 0.9
+
+# operators that paint something besides the image (text, paths, shadings,
+# inline images) make the page composite
+_PAINT_OPS = {
+    b"Tj", b"TJ", b"'", b'"', b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*", b"sh", b"BI", b"EI",
+}
+
+# lossless stream encodings PyPDF2 decodes in get_data()
+_STREAM_FILTERS = {"/FlateDecode", "/LZWDecode", "/ASCII85Decode", "/ASCIIHexDecode", "/RunLengthDecode"}
+
+_MODES = {"/DeviceGray": "L", "/CalGray": "L", "/DeviceRGB": "RGB", "/CalRGB": "RGB", "/DeviceCMYK": "CMYK"}
+
+Matrix = Tuple[float, float, float, float, float, float]
+
+
+def _mul(m: Matrix, n: Matrix) -> Matrix:
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + b * c2,
+        a * b2 + b * d2,
+        c * a2 + d * c2,
+        c * b2 + d * d2,
+        e * a2 + f * c2 + e2,
+        e * b2 + f * d2 + f2,
+    )
+
+
+def _single_image_draw(page) -> Optional[Tuple[str, Matrix]]:
+    """(XObject name, CTM) when the page paints exactly one image and nothing else."""
+    contents = page.get_contents()
+    if contents is None:
+        return None
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources else None
+    if not xobjects:
+        return None
+    xobjects = xobjects.get_object()
+
+    ctm: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    stack = []
+    drawn = None
+    for operands, op in ContentStream(contents, page.pdf).operations:
+        if op in _PAINT_OPS:
+            return None
+        if op == b"q":
+            stack.append(ctm)
+        elif op == b"Q":
+            ctm = stack.pop() if stack else ctm
+        elif op == b"cm":
+            ctm = _mul(tuple(float(x) for x in operands), ctm)
+        elif op == b"Do":
+            xobj = xobjects.get(operands[0])
+            if xobj is None or drawn is not None:
+                return None
+            if xobj.get_object().get("/Subtype") != "/Image":
+                return None  # form XObjects may hold anything
+            drawn = (operands[0], ctm)
+    return drawn
+
+
+def _color_space(xobj) -> Optional[str]:
+    cs = xobj.get("/ColorSpace")
+    if cs is None:
+        return "/DeviceGray" if xobj.get("/ImageMask") else None
+    cs = cs.get_object()
+    if isinstance(cs, list):
+        if cs and cs[0] == "/ICCBased":
+            n = cs[1].get_object().get("/N")
+            return {1: "/DeviceGray", 3: "/DeviceRGB", 4: "/DeviceCMYK"}.get(n)
+        return None  # Indexed, Separation, ... are left to poppler
+    return cs
+
+
+def _decode_image(xobj) -> Optional[Image.Image]:
+    """PIL image of an image XObject, or None for encodings left to poppler."""
+    filters = xobj.get("/Filter")
+    if filters is None:
+        filters = []
+    elif not isinstance(filters, list):
+        filters = [filters]
+    *transport, codec = filters or [None]
+    if any(f not in _STREAM_FILTERS for f in transport):
+        return None
+    width, height = int(xobj["/Width"]), int(xobj["/Height"])
+    decode = xobj.get("/Decode")
+    invert = decode is not None and [float(x) for x in decode][:2] == [1.0, 0.0]
+
+    if codec in ("/DCTDecode", "/JPXDecode"):
+        # PyPDF2 passes JPEG / JPEG 2000 through: the data *is* the file
+        img = Image.open(io.BytesIO(xobj.get_data()))
+    elif codec == "/CCITTFaxDecode":
+        # PyPDF2 wraps the G3/G4 data in a WhiteIsZero TIFF header and
+        # ignores /BlackIs1, which flips the meaning of the decoded bits
+        img = Image.open(io.BytesIO(xobj.get_data()))
+        parms = xobj.get("/DecodeParms")
+        if isinstance(parms, list):
+            parms = parms[0] if parms else None
+        if parms is not None and parms.get_object().get("/BlackIs1"):
+            invert = not invert
+    elif codec is None or codec in _STREAM_FILTERS:
+        bits = int(xobj.get("/BitsPerComponent", 8))
+        mode = _MODES.get(_color_space(xobj) or "")
+        if mode is None or bits not in (1, 8) or (bits == 1 and mode != "L"):
+            return None
+        img = Image.frombytes("1" if bits == 1 else mode, (width, height), xobj.get_data())
+    else:
+        return None
+
+    if invert:
+        img = ImageOps.invert(img.convert("L"))
+    return img
+
+
+def _scan_placement(page) -> Optional[Tuple[str, int]]:
+    """(XObject name, native dpi) of a full-page single image placement."""
+    drawn = _single_image_draw(page)
+    if drawn is None:
+        return None
+    name, (a, b, c, d, _, _) = drawn
+    if abs(b) > 1e-6 or abs(c) > 1e-6 or a <= 0 or d <= 0:
+        return None
+    box = page.mediabox
+    page_w, page_h = float(box.width), float(box.height)
+    if page_w <= 0 or page_h <= 0 or (a * d) / (page_w * page_h) < MIN_COVERAGE:
+        return None
+    width = int(page["/Resources"]["/XObject"][name].get_object()["/Width"])
+    return name, int(round(width * 72.0 / a))
+
+
+def page_scan_dpi(page) -> Optional[int]:
+    """Native dpi when `page` is a single-image scan (nothing is decoded), else None."""
+    try:
+        placement = _scan_placement(page)
+    except Exception:
+        get_logger().debug("pdf.embedded_image.inspect_failed", exc_info=True)
+        return None
+    return placement[1] if placement else None
+
+
+def page_scan_image(page) -> Optional[Tuple[Image.Image, int]]:
+    """(image, native dpi) of a single-image scanned page, else None.
+
+    The image is rotated by the page's /Rotate so text reads upright; only
+    axis-aligned, unflipped placements are accepted.
+    """
+    try:
+        placement = _scan_placement(page)
+        if placement is None:
+            return None
+        name, dpi = placement
+        img = _decode_image(page["/Resources"]["/XObject"][name].get_object())
+        if img is None:
+            return None
+        rotate = int(page.get("/Rotate", 0) or 0) % 360
+        if rotate:
+            img = img.rotate(-rotate, expand=True)
+        return img, dpi
+    except Exception:
+        get_logger().debug("pdf.embedded_image.failed", exc_info=True)
+        return None
@@ -0,0 +1,131 @@
+# services/text_layer.py
+"""PDF text-layer backends.
+
+`pypdf2` is the historical pure-Python `PdfReader.extract_text`,
+`pdfplumber` the layout-aware pure-Python extractor, and
+`pdftotext` runs poppler's `pdftotext -layout` (C++, one process for the
+whole document; poppler-utils is already in the image for pdf2image).
+
+Every backend exposes `extract_pages(pdf_bytes, max_pages=None)`, returning
+one string per page, or None when the PDF cannot be read by that backend.
+"""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from PyPDF2 import PdfReader
+
+try:
+    import pdfplumber
+except Exception:
+    pdfplumber = None
+
+from core.logging import get_logger
+
+PDFTOTEXT_TIMEOUT_S = 60
+
+
+class PyPDF2Backend:
+    """PyPDF2 `extract_text` (historical behaviour)."""
+
+    name = "pypdf2"
+
+    def extract_pages(self, pdf_bytes: bytes, max_pages: Optional[int] = None) -> Optional[List[str]]:
+        try:
+            reader = PdfReader(io.BytesIO(pdf_bytes))
+            pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+            return [page.extract_text() or "" for page in pages]
+        except Exception:
+            get_logger().debug("text_layer.pypdf2.failed", exc_info=True)
+            return None
+
+
+class PdfplumberBackend:
+    """pdfplumber `extract_text`."""
+
+    name = "pdfplumber"
+
+    def extract_pages(self, pdf_bytes: bytes, max_pages: Optional[int] = None) -> Optional[List[str]]:
+        try:
+            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+                return [page.extract_text() or "" for page in pages]
+        except Exception:
+            get_logger().debug("text_layer.pdfplumber.failed", exc_info=True)
+            return None
+
+
+class PdftotextBackend:
+    """poppler `pdftotext -layout`; pages come back separated by form feeds."""
+
+    name = "pdftotext"
+
+    def extract_pages(self, pdf_bytes: bytes, max_pages: Optional[int] = None) -> Optional[List[str]]:
+        args = ["pdftotext", "-layout", "-enc", "UTF-8", "-q"]
+        if max_pages is not None:
+            args += ["-f", "1", "-l", str(max_pages)]
+        try:
+            with tempfile.TemporaryDirectory(prefix="text-") as tmp:
+                pdf_path = os.path.join(tmp, "document.pdf")
+                with open(pdf_path, "wb") as f:
+                    f.write(pdf_bytes)
+                out = subprocess.run(
+                    args + [pdf_path, "-"], capture_output=True, check=True, timeout=PDFTOTEXT_TIMEOUT_S
+                )
+        except Exception:
+            get_logger().debug("text_layer.pdftotext.failed", exc_info=True)
+            return None
+        text = out.stdout.decode("utf-8", errors="replace")
+        # every page, blank ones included, is terminated by a form feed
+        if text.endswith("\f"):
+            text = text[:-1]
+        return text.split("\f") if text else []
+
+
+_backends: Dict[str, object] = {}
+_backends_lock = threading.Lock()
+
+
+def available_backends() -> list:
+    names = ["pypdf2"]
+    if pdfplumber is not None:
+        names.append("pdfplumber")
+    if shutil.which("pdftotext"):
+        names.append("pdftotext")
+    return names
+
+
+def _resolve(name: str) -> str:
+    if name == "auto":
+        return "pdftotext" if shutil.which("pdftotext") else "pypdf2"
+    if name not in ("pypdf2", "pdfplumber", "pdftotext"):
+        get_logger().warning("text_layer.unknown", extra={"backend": name})
+        return "pypdf2"
+    if name not in available_backends():
+        get_logger().warning("text_layer.unavailable", extra={"backend": name})
+        return "pypdf2"
+    return name
+
+
+def get_text_backend(name: Optional[str] = None):
+    """Return the shared backend for `name` ('pypdf2' (default), 'pdfplumber',
+    'pdftotext' or 'auto' = pdftotext when the binary is installed). Unknown
+    or unavailable backends fall back to pypdf2."""
+    requested = (name or "pypdf2").lower()
+    with _backends_lock:
+        backend = _backends.get(requested)
+        if backend is None:
+            resolved = _resolve(requested)
+            backend = _backends.get(resolved)
+            if backend is None:
+                backend = {
+                    "pdftotext": PdftotextBackend,
+                    "pdfplumber": PdfplumberBackend,
+                }.get(resolved, PyPDF2Backend)()
+                _backends[resolved] = backend
+            _backends[requested] = backend
+        return backend
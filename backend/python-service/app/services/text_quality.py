@@ -0,0 +1,131 @@
+# services/text_quality.py
+"""Quality score of a PDF text layer.
+
+A text layer can be long and still useless: fonts without a ToUnicode map
+decode to glyph ids ("(cid:42)", private-use code points), UTF-8 read as
+Latin-1 turns into mojibake ("EXPÃ‰DITEUR"). Counting characters accepts
+both. `score_text` instead combines three cheap signals, one regex pass
+each:
+
+- printable: share of non-space characters that are ordinary letters,
+  digits, punctuation or symbols (not control / private-use / U+FFFD, not
+  "(cid:n)" runs, not "Ã©"-style mojibake pairs);
+- dictionary: share of alphabetic words (3+ letters) found in a small
+  English/French shipping vocabulary;
+- labels: number of distinct BL form labels (SHIPPER, CONSIGNEE, ...).
+
+`TextQuality.score` is in [0, 1]: printable ratio times the stronger of the
+dictionary and label evidence. Pages below OCR_TEXT_MIN_QUALITY are OCRed.
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# dictionary hit rate at which the dictionary evidence saturates; BL pages
+# are full of codes and names, so a quarter of real words is already a lot
+DICTIONARY_TARGET = 0.25
+# known words (or labels) needed before a page counts as text at all, so a
+# "Page 2" footer stamped on a scan does not pass for a text layer
+MIN_HITS = 5
+# distinct labels at which label evidence saturates
+LABEL_TARGET = 2
+
+_CID_RE = re.compile(r"\(cid:\d+\)")
+_MOJIBAKE_RE = re.compile("[ÂÃâ][\u0080-¿‘-›€ŒœŠšŸŽž]")
+_WORD_RE = re.compile(r"[^\W\d_]{3,}")
+
+_LABELS = (
+    "SHIPPER", "CONSIGNEE", "NOTIFY", "VESSEL", "VOYAGE", "PORT OF LOADING", "PORT OF DISCHARGE",
+    "PLACE OF RECEIPT", "PLACE OF DELIVERY", "BILL OF LADING", "B/L", "BOOKING", "CONTAINER", "SEAL",
+    "GROSS WEIGHT", "FREIGHT", "DESCRIPTION OF GOODS", "EXPEDITEUR", "DESTINATAIRE", "NAVIRE",
+    "CONNAISSEMENT", "PORT DE CHARGEMENT", "PORT DE DECHARGEMENT", "POIDS BRUT",
+)
+_LABEL_RE = re.compile(
+    r"(?<![A-Z0-9])(" + "|".join(re.escape(l).replace(r"\ ", r"\s+") for l in _LABELS) + r")(?![A-Z0-9])"
+)
+
+_VOCABULARY = frozenset("""
+the and for with from this that are not all any per see our you your has have was were will shall may
+been into onto upon other such than then there these those which where when who what each only also
+under over above below between about after before same said on board date place name address
+bill lading shipper consignee notify party parties vessel voyage port loading discharge receipt
+delivery final destination container containers seal seals number numbers booking reference
+description goods cargo packages package pieces gross net weight weights measurement volume cbm kgs
+kilos tons tonnes freight prepaid collect payable charges charge rate rates total amount currency
+original originals copy copies draft non negotiable negotiable issued issue carrier carriers master
+agent agents shipped received apparent good order condition unless otherwise stated herein terms
+conditions clause clauses liability contract carriage transport transshipment shipment shipping
+shipments ocean sea line lines company limited ltd inc corporation declared value invoice customs
+export import country origin marks nos stc contain contains containing pallets cartons bags drums
+bales units dry reefer high cube feet page pages signed signature stamp authority behalf document
+documents letter cover attention dear sincerely regards please find attached enclosed following
+request requested information telephone phone fax email road street avenue city tel mobile
+le la les des du de un une et ou pour par sur dans avec sans sont est pas plus aux ces cette
+expediteur destinataire navire connaissement chargement dechargement marchandises marchandise
+poids brut nette conteneur conteneurs scelle plomb numero date lieu livraison fret paye payer
+montant total originaux facture douane pays societe adresse signature cachet agent transporteur
+""".split())
+
+
+class TextQuality:
+    """Signals behind a text layer score (see module docstring)."""
+
+    __slots__ = ("printable", "words", "known", "labels")
+
+    def __init__(self, printable: float, words: int, known: int, labels: int):
+        self.printable = printable
+        self.words = words
+        self.known = known
+        self.labels = labels
+
+    @property
+    def dictionary(self) -> float:
+        return self.known / self.words if self.words else 0.0
+
+    @property
+    def score(self) -> float:
+        if self.known + self.labels < MIN_HITS and self.labels < LABEL_TARGET:
+            return 0.0
+        words = min(1.0, self.dictionary / DICTIONARY_TARGET)
+        labels = min(1.0, self.labels / LABEL_TARGET)
+        return round(self.printable * max(words, labels), 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "score": self.score,
+            "printable": round(self.printable, 3),
+            "dictionary": round(self.dictionary, 3),
+            "labels": self.labels,
+        }
+
+
+def _fold(word: str) -> str:
+    """Lowercase, accents stripped (EXPÉDITEUR -> expediteur)."""
+    word = word.lower()
+    if word.isascii():
+        return word
+    return unicodedata.normalize("NFKD", word).encode("ascii", "ignore").decode("ascii")
+
+
+def _is_printable(ch: str) -> bool:
+    if ch == "�":
+        return False
+    return unicodedata.category(ch)[0] in "LNPS"
+
+
+def score_text(text: Optional[str]) -> TextQuality:
+    """Score a page (or document) text layer; empty text scores 0."""
+    text = text or ""
+    cid_chars = sum(len(m) for m in _CID_RE.findall(text))
+    if cid_chars:
+        text = _CID_RE.sub(" ", text)
+    chars = [ch for ch in text if not ch.isspace()]
+    total = len(chars) + cid_chars
+    # each mojibake pair stands for one mangled character: both count as bad
+    good = sum(1 for ch in chars if _is_printable(ch)) - 2 * len(_MOJIBAKE_RE.findall(text))
+    printable = max(0, good) / total if total else 0.0
+
+    words = _WORD_RE.findall(text)
+    known = sum(1 for w in words if _fold(w) in _VOCABULARY)
+    labels = len({re.sub(r"\s+", " ", m) for m in _LABEL_RE.findall(_fold(text).upper())})
+    return TextQuality(printable, len(words), known, labels)
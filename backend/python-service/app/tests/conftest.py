@@ -0,0 +1,5 @@
+import os
+
+# Run parse/OCR jobs in threads during tests so monkeypatched functions are
+# seen by the executor (a process pool would run its own copies).
+os.environ.setdefault('OCR_EXECUTOR', 'thread')
@@ -0,0 +1,90 @@
+from collections import Counter
+
+import pytest
+
+from services import bl_parser
+from services.bl_parser import Candidate, merge_candidates
+from utils.text_normalizer import normalize_text
+
+TEXTS = [
+    normalize_text("Bill of Lading No: MEDUH9024256\nMEDUH9024256 again"),
+    normalize_text("SCAC MAEU\nB/L No: 262267475\nBooking No. 262267475"),
+    "MAEU\n262802788\nB/L: 262802788",
+    "Straße 5\n  MAEU    262802788  \nfoo CMAU\n12345678 rest\nMSCU\n\n 1234567",  # ß shifts upper offsets
+    "Größe ß B/L No: medu-1234567 ßß medu-1234567 / HLCU-240512345",
+]
+
+
+def _records(text):
+    doc = bl_parser.index_document(text)
+    return doc, [
+        (bl_parser.repair_broken_candidates, bl_parser.repair_broken_candidate_records(doc)),
+        (bl_parser.extract_bl_numbers, bl_parser.extract_bl_number_records(doc)),
+        (bl_parser.extract_bl_candidates, bl_parser.extract_bl_candidate_records(doc)),
+    ]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_records_match_string_apis_and_spans_point_at_values(text):
+    doc, groups = _records(text)
+    for extract, records in groups:
+        assert [c.value for c in records] == extract(text)
+        for c in records:
+            assert c.spans == tuple(sorted(set(c.spans)))
+            for start, end in c.spans:
+                assert bl_parser._clean(doc.upper[start:end]) == c.value
+
+
+def test_merge_keeps_first_seen_order_and_every_source():
+    doc = bl_parser.index_document("MAEU\n262802788\nB/L: MAEU262802788 and MAEU-262802788")
+    merged = merge_candidates(
+        bl_parser.repair_broken_candidate_records(doc),
+        bl_parser.extract_bl_number_records(doc),
+        bl_parser.extract_bl_candidate_records(doc),
+    )
+
+    first = merged[0]
+    assert (first.value, first.source, first.raw) == ("MAEU262802788", bl_parser.SOURCE_REPAIRED, "MAEU\n262802788")
+    assert set(first.sources) == {bl_parser.SOURCE_REPAIRED, bl_parser.SOURCE_EXPLICIT, bl_parser.SOURCE_FORMAT,
+                                  bl_parser.SOURCE_TOKEN}
+    assert [doc.upper[s:e] for s, e in first.spans] == ["MAEU\n262802788", "MAEU262802788", "MAEU-262802788"]
+    assert len({c.value for c in merged}) == len(merged)
+
+
+def test_scoring_reuses_the_features_computed_by_the_extractors(monkeypatch):
+    calls = Counter()
+    features = {
+        "structurally_invalid": "is_structurally_invalid_bl",
+        "false_positive": "is_false_positive",
+        "iso6346": "is_iso6346",
+        "format_terms": "_format_terms",
+    }
+
+    def counting(name, compute):
+        def counted(value):
+            calls[name, value] += 1
+            return compute(value)
+        return counted
+
+    for name, function in features.items():
+        monkeypatch.setattr(bl_parser, function, counting(name, getattr(bl_parser, function)))
+    text = TEXTS[0] + "\n" + TEXTS[1]
+
+    _records(text)
+    extraction = Counter(calls)
+    calls.clear()
+    bl_parser.pick_best_bl(text)
+
+    # the structural filters ran in extraction only; scoring features once per value
+    assert {k: n for k, n in calls.items() if k[0] in ("structurally_invalid", "false_positive")} == {
+        k: n for k, n in extraction.items() if k[0] in ("structurally_invalid", "false_positive")
+    }
+    assert calls and max(n for (name, _), n in calls.items() if name in ("iso6346", "format_terms")) == 1
+
+
+def test_candidate_shares_value_as_raw_and_has_no_dict():
+    c = Candidate("MEDU1234567", "MEDU1234567", bl_parser.SOURCE_TOKEN, (0, 11))
+
+    assert c.raw is c.value
+    assert not hasattr(c, "__dict__")
+    assert c.iso6346 is bl_parser.is_iso6346("MEDU1234567")
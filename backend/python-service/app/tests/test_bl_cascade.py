@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from services import bl_parser
+from utils.text_normalizer import normalize_text
+
+CASES = [
+    "Bill of Lading No: MEDUH9024256",
+    "BL NO: EU26752001",
+    "Seal No: EU26752001 / BL No: EU26752001",
+    "SCAC MAEU\nB/L No: 262267475",
+    "SCAC MAEU B/L No. 262267475 Booking No. 262267475",
+    "SCAC MAEU\nBIL No, 262267475\nBooking No. 262267475",
+    "MEDUH9024256 something else",
+    "Containers: MEDU1234567",
+    "MAEU\n262802788\nB/L: 262802788",
+    "TAX ID 12345678 B/L NO MEDU7654321",
+    "Straße 12 Hamburg\nB/L No: HLCUHAM240512345\nBooking No. 24051234",  # upper-casing shifts offsets
+]
+
+LABELS = ["B/L NO", "BILL OF LADING NO", "BOOKING NO", "SEAL", "CONTAINER", "VESSEL", "VOYAGE NO", "TAX ID",
+          "KGS", "Shipper", "B L", "MEDU", "MAEU", "Port of Loading"]
+
+
+def _noisy(seed, lines=300):
+    """Token soup with many labelled values: lots of candidates, close scores."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        r = rnd.random()
+        code = "".join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rnd.randint(2, 4)))
+        if r < 0.4:
+            out.append(f"{rnd.choice(LABELS)}: {code}{rnd.randint(10**5, 10**11)}")
+        elif r < 0.6:
+            out.append(str(rnd.randint(10**7, 10**13)))
+        elif r < 0.8:
+            out.append("".join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-/") for _ in range(rnd.randint(6, 18))))
+        else:
+            out.append(" ".join(rnd.choice(LABELS) for _ in range(rnd.randint(1, 4))))
+    return "\n".join(out)
+
+
+CORPUS = [normalize_text(c) for c in CASES] + [_noisy(seed) for seed in range(8)]
+
+
+@pytest.mark.parametrize("top_k", [1, bl_parser.CASCADE_TOP_K])
+def test_cascade_picks_what_exhaustive_scoring_picks(top_k):
+    for text in CORPUS:
+        assert bl_parser.pick_best_bl(text, top_k=top_k) == bl_parser.pick_best_bl(text, top_k=None)
+
+
+class _Log:
+    """bl_parser.log stand-in recording info events."""
+
+    def __init__(self):
+        self.infos = []
+
+    def info(self, event, extra=None, **kwargs):
+        self.infos.append((event, extra))
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def test_cascade_scores_only_a_few_candidates_in_full(monkeypatch):
+    log = _Log()
+    monkeypatch.setattr(bl_parser, "log", log)
+
+    bl_parser.pick_best_bl(_noisy(3, lines=2000), top_k=10)
+
+    cascade = [extra for event, extra in log.infos if event == "pick_best_bl.cascade"]
+    assert cascade and cascade[-1]["scored"] < cascade[-1]["candidates"]
+
+
+def test_v2_returns_every_candidate_scored():
+    text = _noisy(5)
+    result = bl_parser.pick_best_bl_v2(text)
+
+    values = [c["candidate"] for c in result["candidates"]]
+    assert set(bl_parser.extract_bl_candidates(bl_parser._ocr_reconstruct(text))) <= set(values)
+    assert len(values) > bl_parser.CASCADE_TOP_K
+    assert [c["score"] for c in result["candidates"]] == sorted((c["score"] for c in result["candidates"]), reverse=True)
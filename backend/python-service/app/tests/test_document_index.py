@@ -0,0 +1,67 @@
+import random
+
+from services import bl_parser
+from services.document_index import DocumentIndex
+
+TEXT = "\n".join([
+    "BILL OF LADING No. MEDUH9024256",
+    "BOOKING NO: 262267475   VAT 99887766",
+    "CONTAINER NUMBERS: MSCU1234565 SEAL NUMBER: EU26752001",
+    "VESSEL: MSC AURORA    VOYAGE NO: FA412R",
+    "B/L: medu7654321",
+])
+
+
+def test_window_queries_match_slicing():
+    doc = DocumentIndex(TEXT)
+    upper = TEXT.upper()
+    rnd = random.Random(0)
+    for _ in range(500):
+        start, end = sorted(rnd.randint(-20, len(upper) + 20) for _ in range(2))
+        for kw in ("SEAL", "NO", "B/L", "CONTAINER NUMBERS", "ZZZ"):
+            assert doc.contains(kw, start, end) == (kw in upper[max(0, start):max(0, end)])
+        label = bl_parser._BL_LABEL_TOKEN_RX
+        assert doc.search(label, start, end, anchor="B") == bool(label.search(upper[max(0, start):max(0, end)]))
+
+
+def test_first_and_counts_are_case_insensitive_where_helpers_were():
+    doc = DocumentIndex(TEXT)
+
+    assert doc.first("MEDU7654321") == TEXT.upper().find("MEDU7654321")
+    assert doc.first("NOT THERE") == -1
+    assert doc.count("MEDU7654321") == 0  # str.count semantics
+    assert doc.count("MEDU7654321", case_sensitive=False) == 1
+    assert DocumentIndex("AAAA").count("AA", case_sensitive=False) == 2
+
+
+def test_locate_collects_the_positions_find_would():
+    doc = DocumentIndex(TEXT + "\nAAAA medu7654321")
+    tokens = ["MEDU7654321", "eu26752001", "AA", "NO", "NOT THERE", ""]
+
+    doc.locate(tokens)
+
+    fresh = DocumentIndex(doc.text)
+    for t in tokens:
+        assert doc.positions(t) == fresh.positions(t)
+
+
+def test_helpers_answer_the_same_from_text_or_shared_index():
+    doc = bl_parser.index_document(TEXT)
+    helpers = [
+        bl_parser.has_explicit_bl_label_near,
+        bl_parser.is_seal_number_context,
+        bl_parser.is_tax_or_fiscal_context,
+        bl_parser.is_in_port_or_voyage_context,
+        bl_parser.is_in_forbidden_bl_context,
+        bl_parser.candidate_near_bl_keyword,
+        bl_parser.is_within_container_section,
+        lambda t, c: bl_parser.candidate_near_phrase(t, c, "B/L NO", window=30),
+    ]
+    tokens = ["MEDUH9024256", "262267475", "99887766", "MSCU1234565", "EU26752001", "FA412R", "MEDU7654321"]
+
+    answers = [[h(TEXT, t) for h in helpers] for t in tokens]
+
+    assert [[h(doc, t) for h in helpers] for t in tokens] == answers
+    assert answers[4][1]  # seal context
+    assert answers[2][2]  # VAT number
+    assert answers[1][4]  # after BOOKING NO
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.executor import BoundedExecutor, ExecutorBusy
+
+
+def test_executor_rejects_when_slots_and_queue_are_full():
+    executor = BoundedExecutor(max_workers=1, max_queue=1, mode='thread')
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(executor.submit(release.wait, 5))
+        second = asyncio.ensure_future(executor.submit(lambda: 'queued'))
+        await asyncio.sleep(0.05)
+        assert (executor.in_flight, executor.queued) == (1, 1)
+
+        with pytest.raises(ExecutorBusy) as busy:
+            await executor.submit(lambda: 'rejected')
+        assert busy.value.retry_after >= 1
+
+        release.set()
+        return await first, await second
+
+    try:
+        assert asyncio.run(run()) == (True, 'queued')
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert (stats['in_flight'], stats['queued'], stats['completed'], stats['rejected']) == (0, 0, 2, 1)
+
+
+def test_cancelled_submit_holds_its_slot_until_the_work_ends():
+    executor = BoundedExecutor(max_workers=1, max_queue=0, mode='thread')
+    release = threading.Event()
+
+    async def run():
+        waiter = asyncio.ensure_future(executor.submit(release.wait, 5))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        await asyncio.sleep(0.05)
+        # the job is still running in the pool: no new work is admitted
+        assert executor.in_flight == 1
+        with pytest.raises(ExecutorBusy):
+            await executor.submit(lambda: 'rejected')
+
+        release.set()
+        for _ in range(100):
+            if not executor.in_flight:
+                break
+            await asyncio.sleep(0.01)
+        assert (executor.in_flight, executor.completed) == (0, 1)
+        return await executor.submit(lambda: 'admitted')
+
+    try:
+        assert asyncio.run(run()) == 'admitted'
+    finally:
+        executor.shutdown()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from core import http
+from core.http import DocumentTooLarge, download
+
+
+def _client(body: bytes, headers=None):
+    def handler(request):
+        return httpx.Response(200, content=body, headers={"content-type": "application/pdf", **(headers or {})})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_download_streams_body_and_content_type():
+    async def run():
+        async with _client(b"%PDF-1.4 body") as client:
+            return await download("https://example.com/doc.pdf", max_bytes=1024, client=client)
+
+    data, content_type = asyncio.run(run())
+    assert data == b"%PDF-1.4 body"
+    assert content_type == "application/pdf"
+
+
+def test_download_stops_past_size_limit():
+    async def run():
+        async with _client(b"x" * 4096) as client:
+            await download("https://example.com/doc.pdf", max_bytes=1000, client=client)
+
+    with pytest.raises(DocumentTooLarge):
+        asyncio.run(run())
+
+
+def test_close_async_client_closes_the_client_of_every_loop():
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+
+    async def make():
+        return http.get_async_client()
+
+    try:
+        other_client = asyncio.run_coroutine_threadsafe(make(), other).result(5)
+
+        async def run():
+            client = http.get_async_client()
+            assert client is http.get_async_client() and client is not other_client
+            await http.close_async_client()
+            return client
+
+        client = asyncio.run(run())
+        assert client.is_closed and other_client.is_closed
+        assert not http._clients
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
@@ -0,0 +1,81 @@
+import dataclasses
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from core.config import Settings
+from services import image_preprocess, ocr_engines, ocr_service
+from services.image_preprocess import estimate_skew, otsu_threshold, prepare_image
+
+
+def _use_settings(monkeypatch, **overrides):
+    monkeypatch.setattr(ocr_service, "Settings", lambda: dataclasses.replace(Settings(), **overrides))
+
+
+def _text_page(width=1200, height=1600, paper=220, ink=40):
+    """Rows of dark word-like blocks on grey paper."""
+    img = Image.new("L", (width, height), paper)
+    draw = ImageDraw.Draw(img)
+    for y in range(150, height - 150, 50):
+        for x in range(100, width - 150, 36):
+            draw.rectangle((x, y, x + 24, y + 22), fill=ink)
+    return img
+
+
+def test_otsu_threshold_splits_ink_from_paper():
+    hist = np.bincount(np.asarray(_text_page()).ravel(), minlength=256)
+    assert 40 < otsu_threshold(hist) <= 220
+
+
+def test_deskew_corrects_rotated_scan():
+    skewed = _text_page().rotate(-2.5, fillcolor=220)  # lines fall to the right
+
+    page = prepare_image(skewed, "otsu")
+
+    assert abs(page.skew - 2.5) <= 0.25
+    assert abs(estimate_skew(np.asarray(page.gray) < 128)) <= 0.25
+
+
+def test_dark_scan_border_is_whitened():
+    img = _text_page()
+    ImageDraw.Draw(img).rectangle((0, 0, 1199, 39), fill=0)
+
+    for mode in ("otsu", "adaptive"):
+        page = prepare_image(img, mode)
+        assert np.asarray(page.gray)[:40].min() == 255
+        assert np.asarray(page.binary)[:40].min() == 255
+        assert np.asarray(page.binary)[150:172, 100:124].max() == 0
+
+
+def test_despeckle_drops_isolated_pixels():
+    ink = np.zeros((10, 10), dtype=bool)
+    ink[2, 2] = True
+    ink[6:8, 6:8] = True
+
+    cleaned = image_preprocess.despeckle(ink)
+
+    assert not cleaned[2, 2]
+    assert cleaned[6:8, 6:8].all()
+
+
+def test_page_is_preprocessed_once_for_all_passes(monkeypatch):
+    _use_settings(monkeypatch, OCR_PSM_MODE="exhaustive", OCR_PREPROCESS="otsu", OCR_BACKEND="pytesseract")
+    prepared = []
+    seen = set()
+
+    def counting_prepare(img, mode, dpi):
+        page = prepare_image(img, mode, dpi)
+        prepared.append(page)
+        return page
+
+    def image_to_string(img, config):
+        seen.add(id(img))
+        return "BILL OF LADING NO MEDUH9024256 SHIPPER ACME"
+
+    monkeypatch.setattr(ocr_service, "prepare_image", counting_prepare)
+    monkeypatch.setattr(ocr_engines.pytesseract, "image_to_string", image_to_string)
+    res = ocr_service._ocr_image_detailed(_text_page())
+
+    assert len(prepared) == 1
+    assert len(res["passes"]) == 6
+    assert seen == {id(prepared[0].gray), id(prepared[0].binary)}
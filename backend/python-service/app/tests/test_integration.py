@@ -11,11 +11,21 @@ def test_health():
     assert resp.json().get('status') == 'ok'
 
 
+async def _fake_fetch(url):
+    return b'%PDF-1.4', 'application/pdf'
+
+
+def _ocr_result(text, partial=False, skipped_pages=()):
+    return {'text': text, 'pages': [], 'partial': partial, 'skipped_pages': list(skipped_pages)}
+
+
 def test_parse_document_endpoint(monkeypatch):
-    # Mock OCR to avoid external network call and ensure a BL token is present
-    monkeypatch.setattr('services.ocr_service.ocr_from_url', lambda url: 'BILL OF LADING NO COSU123456789')
-    # parse.py imports ocr_from_url directly; patch that symbol as well
-    monkeypatch.setattr('api.v1.parse.ocr_from_url', lambda url: 'BILL OF LADING NO COSU123456789')
+    # Mock download + OCR to avoid external network call and ensure a BL token is present
+    monkeypatch.setattr('api.v1.parse.fetch_document', _fake_fetch)
+    monkeypatch.setattr(
+        'api.v1.parse.ocr_document',
+        lambda data, content_type=None, deadline_at=None, count_cache=True: _ocr_result('BILL OF LADING NO COSU123456789'),
+    )
 
     payload = {
         "document_id": "test-123",
@@ -32,3 +42,206 @@ def test_parse_document_endpoint(monkeypatch):
     has_bl_field = any(f for f in fields if f.get('key') == 'bl_number')
     has_extraction_bl = bool(data.get('extraction', {}) and data['extraction'].get('bl_number'))
     assert has_bl_field or has_extraction_bl
+
+
+def _fast_bl_settings():
+    import dataclasses
+    from core.config import Settings
+
+    return dataclasses.replace(Settings(), OCR_FAST_BL=True)
+
+
+def _band(text, seen=None):
+    def ocr_header_band(data, content_type=None, deadline_at=None, count_cache=True):
+        if seen is not None:
+            seen['deadline_at'] = deadline_at
+        return {'text': text, 'cached': None, 'truncated': False}
+
+    return ocr_header_band
+
+
+def test_parse_fast_bl_mode_skips_full_ocr(monkeypatch):
+    seen = {}
+    monkeypatch.setattr('api.v1.parse.Settings', _fast_bl_settings)
+    monkeypatch.setattr('api.v1.parse.fetch_document', _fake_fetch)
+    monkeypatch.setattr(
+        'api.v1.parse.ocr_header_band',
+        _band('MEDITERRANEAN SHIPPING COMPANY S.A.\nBILL OF LADING NO. MEDUH9024256', seen),
+    )
+
+    def full_ocr(data, content_type=None, deadline_at=None, count_cache=True):
+        raise AssertionError('full-document OCR should not run')
+
+    monkeypatch.setattr('api.v1.parse.ocr_document', full_ocr)
+
+    payload = {"document_id": "test-123", "file_url": "https://example.com/doc.pdf", "hint": "BL"}
+    headers = {"x-api-key": "changeme", "x-deadline-ms": "5000"}
+    resp = client.post('/api/v1/parse/document', json=payload, headers=headers)
+    assert resp.status_code == 200, resp.text
+    assert seen['deadline_at'] is not None
+    extraction = resp.json()['extraction']
+    assert extraction['bl_number'] == 'MEDUH9024256'
+    assert extraction['ocr_mode'] == 'fast_bl'
+    # containers, seals, weight... were only searched in the header band
+    assert (extraction['status'], extraction['ocr_scope']) == ('partial', 'header_band')
+
+
+def test_parse_fast_bl_mode_falls_back_to_full_ocr(monkeypatch):
+    monkeypatch.setattr('api.v1.parse.Settings', _fast_bl_settings)
+    monkeypatch.setattr('api.v1.parse.fetch_document', _fake_fetch)
+    monkeypatch.setattr('api.v1.parse.ocr_header_band', _band('SHIPPER: ACME TRADING'))
+    monkeypatch.setattr(
+        'api.v1.parse.ocr_document',
+        lambda data, content_type=None, deadline_at=None, count_cache=True: _ocr_result(
+            'SHIPPER: ACME TRADING\nBILL OF LADING NO COSU123456789'
+        ),
+    )
+
+    payload = {"document_id": "test-123", "file_url": "https://example.com/doc.pdf", "hint": "BL"}
+    resp = client.post('/api/v1/parse/document', json=payload, headers={"x-api-key": "changeme"})
+    assert resp.status_code == 200, resp.text
+    extraction = resp.json()['extraction']
+    assert (extraction['ocr_mode'], extraction['status']) == ('full', 'parsed')
+    assert 'ocr_scope' not in extraction
+
+
+def test_parse_rejects_oversized_document(monkeypatch):
+    from core.http import DocumentTooLarge
+
+    async def too_large(url):
+        raise DocumentTooLarge('document exceeds 10 bytes')
+
+    monkeypatch.setattr('api.v1.parse.fetch_document', too_large)
+
+    payload = {"document_id": "test-123", "file_url": "https://example.com/doc.pdf", "hint": "BL"}
+    resp = client.post('/api/v1/parse/document', json=payload, headers={"x-api-key": "changeme"})
+    assert resp.status_code == 413
+
+
+def test_parse_returns_503_with_retry_after_when_saturated(monkeypatch):
+    from core.executor import ExecutorBusy
+
+    class BusyExecutor:
+        async def submit(self, fn, *args):
+            raise ExecutorBusy(retry_after=7)
+
+    monkeypatch.setattr('api.v1.parse.fetch_document', _fake_fetch)
+    monkeypatch.setattr('api.v1.parse.get_executor', lambda: BusyExecutor())
+
+    payload = {"document_id": "test-123", "file_url": "https://example.com/doc.pdf", "hint": "BL"}
+    resp = client.post('/api/v1/parse/document', json=payload, headers={"x-api-key": "changeme"})
+    assert resp.status_code == 503
+    assert resp.headers['retry-after'] == '7'
+
+
+def test_parse_documents_streams_ndjson_per_document(monkeypatch):
+    import json
+    from core.http import DocumentTooLarge
+
+    async def fetch(url):
+        if 'huge' in url:
+            raise DocumentTooLarge('document exceeds 10 bytes')
+        return url.encode(), 'application/pdf'
+
+    monkeypatch.setattr('api.v1.parse.fetch_document', fetch)
+    monkeypatch.setattr(
+        'api.v1.parse.ocr_document',
+        lambda data, content_type=None, deadline_at=None, count_cache=True: _ocr_result(
+            'BILL OF LADING NO COSU123456789' if b'bl' in data else 'INVOICE'
+        ),
+    )
+
+    docs = [
+        {"document_id": "doc-bl", "file_url": "https://example.com/bl.pdf", "hint": "BL"},
+        {"document_id": "doc-big", "file_url": "https://example.com/huge.pdf", "hint": "BL"},
+        {"document_id": "doc-inv", "file_url": "https://example.com/invoice.pdf", "hint": "INVOICE"},
+    ]
+    resp = client.post('/api/v1/parse/documents', json=docs, headers={"x-api-key": "changeme"})
+    assert resp.status_code == 200, resp.text
+    assert resp.headers['content-type'].startswith('application/x-ndjson')
+
+    lines = {d['document_id']: d for d in map(json.loads, resp.text.strip().splitlines())}
+    assert set(lines) == {'doc-bl', 'doc-big', 'doc-inv'}
+    assert lines['doc-bl']['status'] == 200
+    assert lines['doc-bl']['result']['extraction']['bl_number'] == 'COSU123456789'
+    assert lines['doc-big']['status'] == 413
+    assert lines['doc-inv']['index'] == 2
+
+
+def test_abandoned_batch_keeps_executor_slots_until_ocr_ends(monkeypatch):
+    import asyncio
+    import json
+    import threading
+
+    from api.v1.parse import parse_documents
+    from core.executor import BoundedExecutor
+    from models.document import DocumentInput
+
+    executor = BoundedExecutor(max_workers=2, max_queue=8, mode='thread')
+    release = threading.Event()
+
+    async def fetch(url):
+        return url.encode(), 'application/pdf'
+
+    def ocr(data, content_type=None, deadline_at=None, count_cache=True):
+        if b'slow' in data:
+            release.wait(5)
+        return _ocr_result('BILL OF LADING NO COSU123456789')
+
+    monkeypatch.setattr('api.v1.parse.fetch_document', fetch)
+    monkeypatch.setattr('api.v1.parse.ocr_document', ocr)
+    monkeypatch.setattr('api.v1.parse.get_executor', lambda: executor)
+
+    async def wait_for(predicate):
+        for _ in range(200):
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+
+    async def run():
+        docs = [DocumentInput(document_id='fast', file_url='https://example.com/fast.pdf', hint='BL')] + [
+            DocumentInput(document_id=f'slow-{i}', file_url=f'https://example.com/slow-{i}.pdf', hint='BL')
+            for i in range(5)
+        ]
+        body = (await parse_documents(docs, x_deadline_ms=None)).body_iterator
+        first = json.loads(await body.__anext__())
+        await wait_for(lambda: executor.in_flight == 2)
+
+        await body.aclose()  # client disconnected mid-batch
+        await asyncio.sleep(0.05)
+        # the cancelled items' OCR jobs still run and keep their slots
+        assert executor.stats()['in_flight'] == 2
+        assert executor.stats()['queued'] == 0
+
+        release.set()
+        await wait_for(lambda: executor.in_flight == 0)
+        return first, executor.stats()
+
+    try:
+        first, stats = asyncio.run(run())
+    finally:
+        release.set()
+        executor.shutdown()
+    assert first['document_id'] == 'fast'
+    assert (stats['in_flight'], stats['completed']) == (0, 3)
+
+
+def test_parse_document_returns_partial_result_past_deadline(monkeypatch):
+    seen = {}
+
+    def ocr(data, content_type=None, deadline_at=None, count_cache=True):
+        seen['deadline_at'] = deadline_at
+        return _ocr_result('BILL OF LADING NO COSU123456789', partial=True, skipped_pages=[2, 3])
+
+    monkeypatch.setattr('api.v1.parse.fetch_document', _fake_fetch)
+    monkeypatch.setattr('api.v1.parse.ocr_document', ocr)
+
+    payload = {"document_id": "test-123", "file_url": "https://example.com/doc.pdf", "hint": "BL"}
+    headers = {"x-api-key": "changeme", "x-deadline-ms": "5000"}
+    resp = client.post('/api/v1/parse/document', json=payload, headers=headers)
+    assert resp.status_code == 200, resp.text
+    extraction = resp.json()['extraction']
+    assert extraction['status'] == 'partial'
+    assert extraction['skipped_pages'] == [2, 3]
+    assert extraction['bl_number'] == 'COSU123456789'
+    assert seen['deadline_at'] is not None
@@ -0,0 +1,214 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.job_queue import DONE, QUEUED, RUNNING, JobQueue
+from services.job_worker import JobWorker
+
+client = TestClient(app)
+HEADERS = {"x-api-key": "changeme"}
+PAYLOAD = {"document_id": "job-123", "file_url": "https://example.com/doc.pdf", "hint": "BL"}
+
+
+def test_job_submit_dedupe_and_result(monkeypatch, tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr("api.v1.jobs.get_job_queue", lambda: queue)
+
+    async def fetch(url):
+        return b"%PDF-1.4", "application/pdf"
+
+    monkeypatch.setattr("api.v1.parse.fetch_document", fetch)
+    monkeypatch.setattr(
+        "api.v1.parse.ocr_document",
+        lambda data, content_type=None, deadline_at=None, count_cache=True: {
+            "text": "BILL OF LADING NO COSU123456789", "pages": [], "partial": False, "skipped_pages": [],
+        },
+    )
+
+    first = client.post("/api/v1/parse/jobs", json=PAYLOAD, headers=HEADERS)
+    assert first.status_code == 202, first.text
+    job_id = first.json()["job_id"]
+    assert first.json()["status"] == QUEUED
+
+    again = client.post("/api/v1/parse/jobs", json=PAYLOAD, headers=HEADERS)
+    assert again.json()["job_id"] == job_id
+    assert again.json()["deduplicated"] is True
+
+    from api.v1.jobs import run_parse_job
+
+    stored = asyncio.run(JobWorker(queue, run_parse_job).run_once())
+    assert stored["status"] == DONE
+
+    resp = client.get(f"/api/v1/parse/jobs/{job_id}", headers=HEADERS)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == DONE
+    assert body["result"]["extraction"]["bl_number"] == "COSU123456789"
+
+    assert client.get("/api/v1/parse/jobs/unknown", headers=HEADERS).status_code == 404
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job = JobQueue(path).enqueue(dict(PAYLOAD))
+
+    crashed = JobQueue(path).claim("worker-a", lease_s=0.3)
+    assert crashed["id"] == job["id"] and crashed["status"] == RUNNING
+    assert JobQueue(path).claim("worker-b", lease_s=60) is None
+
+    time.sleep(0.35)
+    # a fresh queue on the same file (process restart) sees the job again
+    reclaimed = JobQueue(path).claim("worker-b", lease_s=60)
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["attempts"] == 2
+    assert not JobQueue(path).complete(job["id"], "worker-a", {"late": True})
+
+
+def test_failed_job_requeued_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=2)
+    job = queue.enqueue(dict(PAYLOAD))
+
+    async def boom(payload):
+        raise RuntimeError("ocr crashed")
+
+    worker = JobWorker(queue, boom)
+    assert asyncio.run(worker.run_once())["status"] == QUEUED
+    last = asyncio.run(worker.run_once())
+    assert last["status"] == "failed"
+    assert "ocr crashed" in last["error"]
+    assert queue.get(job["id"])["attempts"] == 2
+
+
+def test_expired_lease_fails_job_once_attempts_are_used(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job = JobQueue(path, max_attempts=2).enqueue(dict(PAYLOAD))
+
+    for owner in ("worker-a", "worker-b"):  # both crash mid-job
+        assert JobQueue(path, max_attempts=2).claim(owner, lease_s=0.1)["id"] == job["id"]
+        time.sleep(0.15)
+
+    assert JobQueue(path, max_attempts=2).claim("worker-c", lease_s=60) is None
+    stored = JobQueue(path).get(job["id"])
+    assert (stored["status"], stored["attempts"]) == ("failed", 2)
+    assert "lease expired" in stored["error"]
+
+
+def test_worker_abandons_job_when_lease_is_lost(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job = queue.enqueue(dict(PAYLOAD))
+
+    async def slow(payload):
+        # another worker takes the job over while this one is still running
+        queue._conn().execute("UPDATE parse_jobs SET lease_owner = 'worker-b' WHERE id = ?", (job["id"],))
+        await asyncio.sleep(5)
+        return {"late": True}
+
+    started = time.monotonic()
+    stored = asyncio.run(JobWorker(queue, slow, lease_s=0.15).run_once())
+
+    assert time.monotonic() - started < 2
+    assert (stored["status"], stored["lease_owner"], stored["result"]) == (RUNNING, "worker-b", None)
+
+
+def test_worker_retries_download_failures_and_empty_ocr(monkeypatch, tmp_path):
+    import httpx
+
+    from api.v1.jobs import run_parse_job
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job = queue.enqueue(dict(PAYLOAD))
+    texts = iter(["", "BILL OF LADING NO COSU123456789"])
+    fetches = []
+
+    async def fetch(url):
+        fetches.append(url)
+        if len(fetches) == 1:
+            raise httpx.ConnectError("connection reset")
+        return b"%PDF-1.4", "application/pdf"
+
+    monkeypatch.setattr("api.v1.parse.fetch_document", fetch)
+    monkeypatch.setattr(
+        "api.v1.parse.ocr_document",
+        lambda data, content_type=None, deadline_at=None, count_cache=True: {
+            "text": next(texts), "pages": [], "partial": False, "skipped_pages": [],
+        },
+    )
+    worker = JobWorker(queue, run_parse_job)
+
+    network = asyncio.run(worker.run_once())
+    assert (network["status"], network["result"]) == (QUEUED, None)
+    assert "ConnectError" in network["error"]
+    empty = asyncio.run(worker.run_once())
+    assert empty["status"] == QUEUED
+    assert "no text extracted" in empty["error"]
+
+    done = asyncio.run(worker.run_once())
+    assert (done["id"], done["status"], done["attempts"]) == (job["id"], DONE, 3)
+    assert done["result"]["extraction"]["bl_number"] == "COSU123456789"
+
+
+def test_failed_job_waits_for_its_backoff(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), retry_backoff_s=0.2)
+    job = queue.enqueue(dict(PAYLOAD))
+
+    assert queue.claim("worker-a", lease_s=60)["id"] == job["id"]
+    assert queue.fail(job["id"], "worker-a", "RuntimeError('ocr crashed')") == QUEUED
+    assert queue.claim("worker-a", lease_s=60) is None
+
+    time.sleep(0.25)
+    assert queue.claim("worker-a", lease_s=60)["attempts"] == 2
+
+
+def test_done_job_without_text_is_not_reused(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    first = queue.enqueue(dict(PAYLOAD))
+    queue.claim("worker-a", lease_s=60)
+    empty = {"raw_text_snippet": "", "extraction": {"status": "parsed", "bl_detected": False}}
+    assert queue.complete(first["id"], "worker-a", empty)
+
+    again = queue.enqueue(dict(PAYLOAD))
+    assert again["id"] != first["id"]
+    assert (again["status"], again["deduplicated"]) == (QUEUED, False)
+    assert queue.enqueue(dict(PAYLOAD))["id"] == again["id"]
+
+
+
+def test_done_job_of_non_bl_hint_is_reused(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    invoice = dict(PAYLOAD, hint="INVOICE")
+    job = queue.enqueue(invoice)
+    queue.claim("worker-a", lease_s=60)
+    # no OCR for non-BL hints: the empty snippet is the real answer
+    assert queue.complete(job["id"], "worker-a", {"raw_text_snippet": "", "extraction": None})
+
+    assert queue.enqueue(invoice)["deduplicated"] is True
+
+
+def test_jobs_run_without_deadline_and_partial_results_are_not_reused(monkeypatch, tmp_path):
+    from api.v1.jobs import run_parse_job
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job = queue.enqueue(dict(PAYLOAD))
+    deadlines = []
+
+    async def fetch(url):
+        return b"%PDF-1.4", "application/pdf"
+
+    def ocr(data, content_type=None, deadline_at=None, count_cache=True):
+        deadlines.append(deadline_at)
+        return {"text": "BILL OF LADING NO COSU123456789", "pages": [], "partial": False, "skipped_pages": []}
+
+    monkeypatch.setattr("api.v1.parse.fetch_document", fetch)
+    monkeypatch.setattr("api.v1.parse.ocr_document", ocr)
+    assert asyncio.run(JobWorker(queue, run_parse_job).run_once())["status"] == DONE
+    assert deadlines == [None]
+    assert queue.enqueue(dict(PAYLOAD))["id"] == job["id"]
+
+    other = dict(PAYLOAD, document_id="job-456")
+    partial = queue.enqueue(other)
+    queue.claim("worker-a", lease_s=60)
+    result = {"raw_text_snippet": "BILL OF LADING", "extraction": {"status": "partial", "skipped_pages": [2]}}
+    assert queue.complete(partial["id"], "worker-a", result)
+    assert queue.enqueue(other)["id"] != partial["id"]
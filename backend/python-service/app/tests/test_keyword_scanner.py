@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from services import bl_parser, keyword_scanner
+from services.classifier import classify_document
+from services.keyword_scanner import KeywordScanner
+
+ENGINES = [False] + ([True] if keyword_scanner.ahocorasick is not None else [])
+
+
+def _find_all(text, keyword):
+    return [i for i in range(len(text)) if text.startswith(keyword, i)]
+
+
+@pytest.mark.parametrize("native", ENGINES)
+def test_scan_reports_every_overlapping_occurrence(native):
+    scanner = KeywordScanner({"seal": ["SEAL", "CARRIER SEAL", "SEAL NO"], "bl": ["B/L", "B/L NO"]}, native=native)
+
+    hits = scanner.scan("CARRIER SEAL NO 12 B/L NO B/L")
+
+    assert hits == {"SEAL": [8], "CARRIER SEAL": [0], "SEAL NO": [8], "B/L": [19, 26], "B/L NO": [19]}
+
+
+@pytest.mark.parametrize("native", ENGINES)
+def test_scan_matches_brute_force(native):
+    rnd = random.Random(7)
+    for _ in range(200):
+        keywords = ["".join(rnd.choice("AB /") for _ in range(rnd.randint(1, 5))) for _ in range(rnd.randint(1, 10))]
+        text = "".join(rnd.choice("AB /C") for _ in range(150))
+
+        hits = KeywordScanner({"x": keywords}, native=native).scan(text)
+
+        assert hits == {k: _find_all(text, k) for k in set(keywords)}
+
+
+def test_class_queries_match_keyword_slicing():
+    doc = bl_parser.index_document("SHIPPER ACME\nSEAL NUMBER: EU26752001\nPORT OF LOADING ANTWERP VAT 123")
+    upper = doc.upper
+    rnd = random.Random(3)
+    for _ in range(300):
+        start, end = sorted(rnd.randint(-10, len(upper) + 10) for _ in range(2))
+        for name, keywords in bl_parser.LABEL_SCANNER.classes.items():
+            window = upper[max(0, start):max(0, end)]
+            assert doc.contains_class(name, start, end) == any(k in window for k in keywords)
+
+
+def test_classifier_weak_keywords_still_add_up():
+    text = "SHIPPER CONSIGNEE VESSEL VOYAGE CONTAINER SEAL"
+
+    assert classify_document(None, text) == "BL"
+    assert classify_document(None, "SHIPPER ONLY") == "UNKNOWN"
@@ -0,0 +1,96 @@
+import asyncio
+import dataclasses
+import os
+import time
+
+from api.v1 import parse
+from core.config import Settings
+from core.executor import BoundedExecutor
+from services import ocr_cache, ocr_service
+from services.ocr_cache import OcrCache
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = OcrCache(str(tmp_path), max_bytes=1024 * 1024)
+    key = OcrCache.make_key(b"%PDF-1.4 ...", "v1")
+
+    assert cache.get(key) is None
+    cache.put(key, {"text": "BILL OF LADING", "pages": []})
+    assert cache.get(key) == {"text": "BILL OF LADING", "pages": []}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert OcrCache.make_key(b"%PDF-1.4 ...", "v2") != key
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = OcrCache(str(tmp_path), max_bytes=300)
+    value = {"text": "X" * 80}
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, value)
+        os.utime(cache._path(key), (time.time() - 100 + i, time.time() - 100 + i))
+
+    cache.get("a")  # refresh "a": "b" is now the oldest entry
+    cache.put("d", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_overwriting_an_entry_does_not_grow_the_size_estimate(tmp_path):
+    cache = OcrCache(str(tmp_path), max_bytes=300)
+    value = {"text": "X" * 80}
+    cache.put("a", value)
+    cache.put("b", value)
+    for _ in range(5):
+        cache.put("a", value)
+
+    assert cache._approx_bytes == cache._scan_bytes()
+    assert cache.stats()["evictions"] == 0
+
+
+def test_repeated_document_served_from_cache(tmp_path, monkeypatch):
+    settings = dataclasses.replace(Settings(), OCR_CACHE_DIR=str(tmp_path))
+    monkeypatch.setattr(ocr_cache, "Settings", lambda: settings)
+    calls = []
+
+    def uncached(data, content_type, deadline_at=None):
+        calls.append(data)
+        return {"text": "B/L NO MEDUH9024256", "pages": [], "partial": False, "skipped_pages": []}
+
+    monkeypatch.setattr(ocr_service, "_ocr_document_uncached", uncached)
+
+    first = ocr_service.ocr_document(b"%PDF-1.4 same bytes", "application/pdf")
+    second = ocr_service.ocr_document(b"%PDF-1.4 same bytes", "application/pdf")
+
+    assert len(calls) == 1
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["text"] == first["text"]
+    assert ocr_cache.cache_stats()["hits"] == 1
+
+
+def _fake_uncached(data, content_type, deadline_at=None):
+    return {"text": "B/L NO MEDUH9024256", "pages": [], "partial": False, "skipped_pages": []}
+
+
+def test_counters_count_lookups_made_in_process_workers(tmp_path, monkeypatch):
+    settings = dataclasses.replace(Settings(), OCR_CACHE_DIR=str(tmp_path), OCR_FAST_BL=False)
+    monkeypatch.setattr(ocr_cache, "Settings", lambda: settings)
+    monkeypatch.setattr(parse, "Settings", lambda: settings)
+    # forked workers inherit the patches
+    monkeypatch.setattr(ocr_service, "_ocr_document_uncached", _fake_uncached)
+    executor = BoundedExecutor(max_workers=1, max_queue=1, mode="process")
+    monkeypatch.setattr(parse, "get_executor", lambda: executor)
+
+    async def run():
+        return [await parse._ocr_in_executor(b"%PDF-1.4 same bytes", "application/pdf", "doc-1") for _ in range(2)]
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert (first["cached"], second["cached"]) == (False, True)
+    stats = ocr_cache.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
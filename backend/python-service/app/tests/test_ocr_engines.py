@@ -0,0 +1,91 @@
+import types
+
+from PIL import Image
+
+from services import ocr_engines
+
+
+class _FakeWord:
+    def __init__(self, text, conf, box, starts):
+        self.text, self.conf, self.box, self.starts = text, conf, box, starts
+
+    def IsAtBeginningOf(self, level):
+        return level in self.starts
+
+    def GetUTF8Text(self, level):
+        return self.text
+
+    def BoundingBox(self, level):
+        return self.box
+
+    def Confidence(self, level):
+        return self.conf
+
+
+def _fake_tesserocr(created):
+    RIL = types.SimpleNamespace(BLOCK="block", PARA="para", TEXTLINE="line", WORD="word")
+    words = [
+        _FakeWord("BILL", 95.0, (10, 10, 50, 30), {"block", "para", "line"}),
+        _FakeWord("OF", 91.0, (55, 10, 70, 30), set()),
+        _FakeWord("MEDU1234567", 88.0, (10, 40, 120, 60), {"line"}),
+    ]
+
+    class PyTessBaseAPI:
+        def __init__(self, lang, oem):
+            created.append(lang)
+            self.psm = None
+
+        def SetPageSegMode(self, psm):
+            self.psm = psm
+
+        def SetVariable(self, name, value):
+            return True
+
+        def SetImage(self, img):
+            pass
+
+        def GetUTF8Text(self):
+            return f"TEXT PSM {self.psm}"
+
+        def Recognize(self):
+            pass
+
+        def GetIterator(self):
+            return iter(words)
+
+        def Clear(self):
+            pass
+
+    return types.SimpleNamespace(
+        PyTessBaseAPI=PyTessBaseAPI,
+        OEM=types.SimpleNamespace(DEFAULT=3),
+        RIL=RIL,
+        iterate_level=lambda it, level: it,
+    )
+
+
+def test_missing_tesserocr_falls_back_to_pytesseract(monkeypatch):
+    monkeypatch.setattr(ocr_engines, "tesserocr", None)
+    monkeypatch.setattr(ocr_engines, "_backends", {})
+
+    assert ocr_engines.get_ocr_backend("tesserocr").name == "pytesseract"
+    assert ocr_engines.get_ocr_backend("auto").name == "pytesseract"
+
+
+def test_tesserocr_backend_reuses_engine_and_maps_word_data(monkeypatch):
+    created = []
+    monkeypatch.setattr(ocr_engines, "tesserocr", _fake_tesserocr(created))
+    monkeypatch.setattr(ocr_engines, "_backends", {})
+    backend = ocr_engines.get_ocr_backend("auto")
+    img = Image.new("L", (20, 20), 255)
+
+    assert backend.name == "tesserocr"
+    assert backend.image_to_string(img, 6, "gray") == "TEXT PSM 6"
+    assert backend.image_to_string(img, 4, "gray") == "TEXT PSM 4"
+    data = backend.image_to_data(img, 3, "binary")
+
+    assert created == ["eng+fra"]
+    assert data["text"] == ["BILL", "OF", "MEDU1234567"]
+    assert data["line_num"] == [1, 1, 2]
+    assert data["block_num"] == [1, 1, 1]
+    assert (data["left"][2], data["top"][2], data["width"][2], data["height"][2]) == (10, 40, 110, 20)
@@ -0,0 +1,122 @@
+import dataclasses
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from core.config import Settings
+from main import app
+from services import ocr_engines, ocr_service
+from services.bl_parser import pick_best_bl
+from services.ocr_layout import DocumentLayout, PageLayout
+
+
+def _data(rows):
+    """image_to_data dict from [(line_num, [(text, left, top, width, height), ...]), ...]."""
+    data = {k: [] for k in ("text", "conf", "block_num", "par_num", "line_num", "left", "top", "width", "height")}
+    for line_num, words in rows:
+        for text, left, top, width, height in words:
+            data["text"].append(text)
+            data["conf"].append(90)
+            data["block_num"].append(1)
+            data["par_num"].append(1)
+            data["line_num"].append(line_num)
+            data["left"].append(left)
+            data["top"].append(top)
+            data["width"].append(width)
+            data["height"].append(height)
+    return data
+
+
+# two-column form: labels on one line, values on the next
+FORM = _data([
+    (1, [("SHIPPER", 100, 100, 140, 30), ("B/L", 1300, 100, 60, 30), ("No.", 1370, 100, 50, 30)]),
+    (2, [("ACME", 100, 150, 100, 30), ("TRADING", 210, 150, 150, 30), ("MEDUH9024256", 1300, 150, 260, 30)]),
+    (3, [("VESSEL:", 100, 400, 140, 30), ("MSC", 260, 400, 70, 30), ("AURORA", 340, 400, 140, 30)]),
+])
+
+
+def test_layout_value_right_of_and_below_label():
+    layout = PageLayout.from_data(FORM, (2480, 3508))
+
+    assert layout.value_right_of("VESSEL") == "MSC AURORA"
+    assert layout.value_below("B/L NO") == "MEDUH9024256"
+    assert layout.value_below("SHIPPER") == "ACME TRADING MEDUH9024256"
+    assert layout.is_labelled("MEDUH9024256", ["B/L NO"])
+    assert not layout.is_labelled("MEDUH9024256", ["VESSEL"])
+
+
+def test_layout_round_trips_through_dict():
+    layout = PageLayout.from_data(FORM, (2480, 3508), page=2)
+
+    doc = DocumentLayout.from_dicts([layout.to_dict()])
+
+    assert doc.pages[0].page == 2
+    assert doc.value_right_of("VESSEL") == "MSC AURORA"
+
+
+def test_pick_best_bl_uses_layout_for_labels_out_of_text_order():
+    # OCR emitted the value far from its label in the flattened text
+    filler = "\n".join(f"LINE {i} PARTICULARS FURNISHED BY SHIPPER" for i in range(6))
+    text = f"B/L NO\n{filler}\nMEDUH9024256"
+    layout = [PageLayout.from_data(FORM, (2480, 3508)).to_dict()]
+
+    plain = pick_best_bl(text)
+    with_layout = pick_best_bl(text, layout=layout)
+
+    assert with_layout["bl_number"] == "MEDUH9024256"
+    assert "explicit_bl_label" in with_layout["reason"]
+    assert "explicit_bl_label" not in (plain["reason"] or "")
+
+
+def test_adaptive_ocr_keeps_word_layout(monkeypatch):
+    monkeypatch.setattr(
+        ocr_service, "Settings",
+        lambda: dataclasses.replace(Settings(), OCR_PSM_MODE="adaptive", OCR_BACKEND="pytesseract", OCR_CACHE_DIR=""),
+    )
+    monkeypatch.setattr(ocr_engines.pytesseract, "image_to_data", lambda img, config, output_type: FORM)
+
+    res = ocr_service._ocr_image_detailed(Image.new("L", (2480, 3508), 255))
+
+    assert res["layout"]["width"] == 2480
+    assert [w[0] for w in res["layout"]["words"]][:3] == ["SHIPPER", "B/L", "No."]
+
+
+def test_default_exhaustive_mode_has_no_layout_and_parse_ignores_it(monkeypatch):
+    monkeypatch.setattr(
+        ocr_service, "Settings", lambda: dataclasses.replace(Settings(), OCR_BACKEND="pytesseract", OCR_CACHE_DIR="")
+    )
+    assert ocr_service.Settings().OCR_PSM_MODE == "exhaustive"
+    monkeypatch.setattr(
+        ocr_engines.pytesseract, "image_to_string", lambda img, config: "BILL OF LADING NO MEDUH9024256 SHIPPER"
+    )
+    buf = io.BytesIO()
+    Image.new("L", (200, 200), 255).save(buf, format="PNG")
+
+    doc = ocr_service.ocr_document(buf.getvalue(), "image/png")
+    assert doc["text"] == "BILL OF LADING NO MEDUH9024256 SHIPPER"
+    assert doc["layout"] == []
+
+    # a layout handed to the route is only used in adaptive mode
+    layout = {**PageLayout.from_data(FORM, (2480, 3508)).to_dict(), "page": 1}
+    monkeypatch.setattr(
+        "api.v1.parse.ocr_document",
+        lambda data, content_type=None, deadline_at=None, count_cache=True: {
+            "text": doc["text"], "pages": [], "partial": False, "skipped_pages": [], "layout": [layout],
+        },
+    )
+
+    async def fetch(url):
+        return b"%PDF-1.4", "application/pdf"
+
+    monkeypatch.setattr("api.v1.parse.fetch_document", fetch)
+    payload = {"document_id": "layout-1", "file_url": "https://example.com/bl.pdf", "hint": "BL"}
+
+    def vessel():
+        resp = TestClient(app).post("/api/v1/parse/document", json=payload, headers={"x-api-key": "changeme"})
+        assert resp.status_code == 200, resp.text
+        return resp.json()["extraction"]["vessel"]
+
+    assert vessel() is None
+    monkeypatch.setattr("api.v1.parse.Settings", lambda: dataclasses.replace(Settings(), OCR_PSM_MODE="adaptive"))
+    assert vessel() == "MSC AURORA"
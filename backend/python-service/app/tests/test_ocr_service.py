@@ -0,0 +1,265 @@
+import dataclasses
+import io
+import subprocess
+import time
+
+from PIL import Image
+
+from core.config import Settings
+from services import ocr_engines, ocr_service
+
+
+def _use_settings(monkeypatch, **overrides):
+    monkeypatch.setattr(ocr_service, "Settings", lambda: dataclasses.replace(Settings(), **overrides))
+
+
+def _fake_convert(calls=None):
+    def convert_from_path(path, dpi, fmt, first_page, last_page, grayscale=False):
+        # raw grayscale output: no PNG round trip, no RGB -> L conversion
+        assert (fmt, grayscale) == ("ppm", True)
+        if calls is not None:
+            calls.append((first_page, last_page))
+        # encode the page number in the image size so the fake OCR can recover it
+        return [Image.new("L", (10 + i, 10), 255) for i in range(first_page - 1, last_page)]
+
+    return convert_from_path
+
+
+def _fake_ocr(img, dpi=300, deadline=None):
+    return {"text": f"TEXT OF PAGE {img.size[0] - 9}", "conf": None, "dpi": dpi, "passes": []}
+
+
+def _fake_data(text, conf):
+    words = text.split()
+    n = len(words)
+    return {
+        "text": words,
+        "conf": [conf] * n,
+        "block_num": [1] * n,
+        "par_num": [1] * n,
+        "line_num": [1] * n,
+    }
+
+
+def test_scanned_pdf_pages_reassembled_in_order(monkeypatch):
+    monkeypatch.setattr(ocr_service, "convert_from_path", _fake_convert())
+    monkeypatch.setattr(ocr_service, "pdfinfo_from_path", lambda path: {"Pages": 5})
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", _fake_ocr)
+
+    for workers in (1, 3):
+        _use_settings(monkeypatch, OCR_PAGE_WORKERS=workers)
+        text = ocr_service._extract_text_from_pdf_bytes(b"not really a pdf")
+        ocr_service.shutdown_page_pool()
+
+        expected = "\n".join(f"--- PAGE {i} ---\nTEXT OF PAGE {i}" for i in range(1, 6))
+        assert text == expected
+
+
+def test_documents_of_any_page_count_share_one_page_pool(monkeypatch):
+    pools = []
+
+    class FakePool:
+        def __init__(self, max_workers, initializer=None):
+            pools.append(max_workers)
+            self.tasks = 0
+
+        def map(self, fn, *iterables):
+            results = [{"page": page} for page in iterables[1]]
+            self.tasks += len(results)
+            return iter(results)
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    monkeypatch.setattr(ocr_service, "ProcessPoolExecutor", FakePool)
+    ocr_service.shutdown_page_pool()
+    try:
+        for page_count in (2, 3, 5, 7):
+            pages = list(range(1, page_count + 1))
+            assert ocr_service._ocr_pdf_pages("doc.pdf", pages, workers=8) == [{"page": n} for n in pages]
+        assert pools == [8]
+        assert ocr_service._page_pool.tasks == 2 + 3 + 5 + 7
+    finally:
+        ocr_service.shutdown_page_pool()
+
+
+def test_mixed_pdf_only_ocrs_pages_without_text_layer(monkeypatch):
+    calls = []
+    cover = "COVER LETTER FOR SHIPMENT DOCUMENTS " * 3
+    layer = [
+        {"page": 1, "source": "text", "text": cover.strip(), "passes": []},
+        {"page": 2, "source": "text", "text": "", "passes": []},
+        {"page": 3, "source": "text", "text": "12", "passes": []},
+    ]
+    monkeypatch.setattr(ocr_service, "_read_text_layer", lambda data: [dict(p) for p in layer])
+    monkeypatch.setattr(ocr_service, "convert_from_path", _fake_convert(calls))
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", _fake_ocr)
+    _use_settings(monkeypatch, OCR_PAGE_WORKERS=1, OCR_TEXT_MIN_QUALITY=0.5)
+
+    pages = ocr_service._extract_pdf_pages(b"%PDF-mixed")
+
+    assert calls == [(2, 2), (3, 3)]
+    assert [(p["page"], p["source"]) for p in pages] == [(1, "text"), (2, "ocr"), (3, "ocr")]
+    assert pages[0]["text"] == cover.strip()
+    assert pages[2]["text"] == "TEXT OF PAGE 3"
+
+
+def test_rasterization_streams_bounded_windows(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr_service, "convert_from_path", _fake_convert(calls))
+    _use_settings(monkeypatch, OCR_PAGE_WORKERS=1, OCR_RASTER_WINDOW=2)
+
+    seen = []
+    for page, img in ocr_service._iter_pdf_images("doc.pdf", [1, 2, 3, 4, 5], window=2):
+        seen.append((page, img.size[0] - 9))
+
+    assert calls == [(1, 2), (3, 4), (5, 5)]
+    assert seen == [(1, 1), (2, 2), (3, 3), (4, 4), (5, 5)]
+
+
+def test_dpi_ladder_escalates_low_confidence_pages(monkeypatch):
+    _use_settings(monkeypatch, OCR_DPI_LADDER="150,300", OCR_ESCALATE_BELOW=70)
+    renders = []
+
+    def convert_from_path(path, dpi, fmt, first_page, last_page, grayscale=False):
+        renders.extend((n, dpi) for n in range(first_page, last_page + 1))
+        return [Image.new("L", (n, dpi), 255) for n in range(first_page, last_page + 1)]
+
+    def fake_ocr(img, dpi=300, deadline=None):
+        page = img.size[0]
+        # page 2 is only readable at full resolution
+        conf = 90 if (page != 2 or dpi == 300) else 40
+        return {"text": f"PAGE {page} AT {dpi}", "conf": conf, "dpi": dpi, "passes": []}
+
+    monkeypatch.setattr(ocr_service, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", fake_ocr)
+
+    results = ocr_service._ocr_pdf_pages("doc.pdf", [1, 2, 3], workers=1)
+
+    assert [r["dpi"] for r in results] == [150, 300, 150]
+    assert results[1]["levels_tried"] == [150, 300]
+    assert renders == [(1, 150), (2, 150), (2, 300), (3, 150)]
+
+
+def test_adaptive_cascade_stops_on_confident_pass(monkeypatch):
+    _use_settings(monkeypatch, OCR_PSM_MODE="adaptive", OCR_BACKEND="pytesseract")
+    calls = []
+
+    def image_to_data(img, config, output_type):
+        calls.append(config)
+        return _fake_data("BILL OF LADING NO MEDUH9024256 SHIPPER ACME", 93)
+
+    monkeypatch.setattr(ocr_engines.pytesseract, "image_to_data", image_to_data)
+    res = ocr_service._ocr_image_detailed(Image.new("L", (50, 50), 255))
+
+    assert res["text"] == "BILL OF LADING NO MEDUH9024256 SHIPPER ACME"
+    assert len(calls) == 1
+    assert [(p["variant"], p["psm"]) for p in res["passes"]] == [("gray", 6)]
+
+
+def test_adaptive_cascade_binarizes_low_confidence_pages(monkeypatch):
+    _use_settings(monkeypatch, OCR_PSM_MODE="adaptive", OCR_BACKEND="pytesseract")
+
+    def image_to_data(img, config, output_type):
+        conf = 40 if img.mode == "L" else 70
+        return _fake_data(f"NOISY PAGE TEXT READ WITH CONFIDENCE {conf}", conf)
+
+    monkeypatch.setattr(ocr_engines.pytesseract, "image_to_data", image_to_data)
+    res = ocr_service._ocr_image_detailed(Image.new("L", (50, 50), 255))
+
+    assert [p["variant"] for p in res["passes"]] == ["gray"] * 3 + ["binary"] * 3
+    assert res["text"].endswith("CONFIDENCE 70")
+
+
+def test_header_band_ocr_crops_top_of_page(monkeypatch):
+    _use_settings(monkeypatch, OCR_FAST_BL_BAND=0.25)
+    monkeypatch.setattr(ocr_service, "get_ocr_cache", lambda: None)
+    seen = []
+
+    def fake_ocr(img, dpi=300, deadline=None):
+        seen.append(img.size)
+        return {"text": "bill of lading no. meduh9024256", "passes": []}
+
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", fake_ocr)
+    buf = io.BytesIO()
+    Image.new("L", (200, 400), 255).save(buf, format="PNG")
+
+    assert ocr_service.ocr_header_band(buf.getvalue(), "image/png")["text"] == "BILL OF LADING NO. MEDUH9024256"
+    assert seen == [(200, 100)]
+
+
+def test_expired_deadline_skips_remaining_pages(monkeypatch):
+    monkeypatch.setattr(ocr_service, "convert_from_path", _fake_convert())
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", _fake_ocr)
+    _use_settings(monkeypatch, OCR_PAGE_WORKERS=1)
+
+    reports = ocr_service._ocr_pdf_pages("doc.pdf", [1, 2, 3], deadline_at=time.time() - 1)
+    assert [r["skipped"] for r in reports] == [True, True, True]
+    assert all(r["text"] == "" for r in reports)
+
+    reports = ocr_service._ocr_pdf_pages("doc.pdf", [1, 2], deadline_at=time.time() + 60)
+    assert [r["text"] for r in reports] == ["TEXT OF PAGE 1", "TEXT OF PAGE 2"]
+    assert not any(r.get("skipped") for r in reports)
+
+
+def test_header_band_of_scanned_pdf_is_cropped_at_render_time(monkeypatch):
+    _use_settings(monkeypatch, OCR_FAST_BL_BAND=0.25)
+
+    class NoText:
+        name = "pypdf2"
+
+        def extract_pages(self, data, max_pages=None):
+            return [""]
+
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append(args)
+        buf = io.BytesIO()
+        Image.new("L", (2550, int(args[args.index("-H") + 1])), 255).save(buf, format="PPM")
+        return subprocess.CompletedProcess(args, 0, stdout=buf.getvalue())
+
+    def full_page(*args):
+        raise AssertionError("page 1 should not be rendered whole")
+
+    seen = []
+
+    def fake_ocr(img, dpi=300, deadline=None):
+        seen.append((img.mode, img.size))
+        return {"text": "b/l no. meduh9024256", "passes": []}
+
+    monkeypatch.setattr(ocr_service, "get_text_backend", lambda name: NoText())
+    monkeypatch.setattr(ocr_service, "get_ocr_cache", lambda: None)
+    monkeypatch.setattr(ocr_service, "pdfinfo_from_path", lambda path: {"Page size": "612 x 792 pts (letter)"})
+    monkeypatch.setattr(ocr_service.subprocess, "run", run)
+    monkeypatch.setattr(ocr_service, "_rasterize", full_page)
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", fake_ocr)
+
+    assert ocr_service.ocr_header_band(b"%PDF-1.4 scan", "application/pdf")["text"] == "B/L NO. MEDUH9024256"
+    assert calls[0][0] == "pdftoppm" and calls[0][calls[0].index("-H") + 1] == "825"  # 792pt * 300/72 * 0.25
+    assert seen == [("L", (2550, 825))]
+
+
+def test_header_band_is_cached_and_respects_the_deadline(monkeypatch, tmp_path):
+    _use_settings(monkeypatch, OCR_FAST_BL_BAND=0.25, OCR_CACHE_DIR=str(tmp_path))
+    monkeypatch.setattr(ocr_service, "get_ocr_cache", lambda: ocr_service.OcrCache(str(tmp_path), 1 << 20))
+    calls = []
+
+    def fake_ocr(img, dpi=300, deadline=None):
+        calls.append(deadline.at)
+        return {"text": "b/l no. meduh9024256", "passes": []}
+
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", fake_ocr)
+    buf = io.BytesIO()
+    Image.new("L", (200, 400), 255).save(buf, format="PNG")
+    data = buf.getvalue()
+
+    assert ocr_service.ocr_header_band(data, "image/png", deadline_at=time.time() - 1) is None
+    assert calls == []
+
+    at = time.time() + 60
+    first = ocr_service.ocr_header_band(data, "image/png", deadline_at=at)
+    second = ocr_service.ocr_header_band(data, "image/png", deadline_at=at)
+    assert calls == [at]
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert first["text"] == second["text"] == "B/L NO. MEDUH9024256"
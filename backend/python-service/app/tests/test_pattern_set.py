@@ -0,0 +1,74 @@
+import random
+import re
+
+import pytest
+
+from services import bl_parser
+from services.pattern_set import PatternSet
+
+PIECES = [
+    "B/L No.", "b / l n0", "BIL No", "B|L N0,", "BL NO:", "bl ref:", "Bill of Lading No", "BILLOFLADING NO",
+    "Ocean Bill No.", "housebill num", "Master Bill N°", "B/L:", "SEAL", "VOYAGE", "maeu262802788",
+    "MEDU-1234567", "ab-123456", "00LU2164215810", "2024", ".", ",", "  ", "\n",
+]
+
+
+def _noisy_text(seed, words=3000):
+    rnd = random.Random(seed)
+    return " ".join(rnd.choice(PIECES) for _ in range(words))
+
+
+def _separate(patterns, text, flags=0):
+    """(pattern index, start, end, value) of one finditer per pattern."""
+    out = []
+    for k, rx in enumerate(patterns):
+        for m in re.finditer(rx, text, flags):
+            out.append((k, m.start(), m.end(), m.group(m.re.groups) if m.re.groups else m.group(0)))
+    return sorted(out, key=lambda r: (r[1], r[0]))
+
+
+def _scanned(pattern_set, text):
+    return [(m.index, m.start, m.end, m.value) for m in pattern_set.scan(text)]
+
+
+def test_scan_reports_overlapping_matches_with_ids():
+    ps = PatternSet([("ab", r"AB(\d+)"), ("a", r"A\w"), ("num", r"\d{2}")])
+
+    found = ps.scan("XAB123 AC")
+
+    assert [(m.id, m.start, m.end, m.value) for m in found] == [
+        ("ab", 1, 6, "123"), ("a", 1, 3, "AB"), ("num", 3, 5, "12"), ("a", 7, 9, "AC"),
+    ]
+
+
+def test_scan_matches_one_finditer_per_pattern():
+    rnd = random.Random(11)
+    for _ in range(300):
+        patterns = [
+            "".join(rnd.choice(["A", "B", "AB", r"\d", r"\d+", "[AB]", r"(\d{2})", r"\s*", "B?"]) for _ in range(rnd.randint(1, 4)))
+            for _ in range(rnd.randint(1, 6))
+        ]
+        patterns = [p for p in patterns if re.compile(p).match("") is None] or ["A"]
+        text = "".join(rnd.choice("AB12 C") for _ in range(120))
+
+        ps = PatternSet([(f"p{k}", p) for k, p in enumerate(patterns)])
+
+        assert _scanned(ps, text) == _separate(patterns, text)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_explicit_patterns_match_case_insensitive_passes(seed):
+    text = _noisy_text(seed)
+    patterns = bl_parser.BL_LABEL_VALUE_REGEXES + bl_parser.EXPLICIT_BL_REGEXES
+
+    expected = _separate(patterns, text, re.IGNORECASE)
+
+    assert [(k, s, e, v) for k, s, e, v in _scanned(bl_parser.EXPLICIT_PATTERNS, text.upper())] == [
+        (k, s, e, v.upper()) for k, s, e, v in expected
+    ]
+    assert expected
+
+
+def test_duplicate_ids_rejected():
+    with pytest.raises(ValueError):
+        PatternSet([("x", "A"), ("x", "B")])
@@ -0,0 +1,86 @@
+import dataclasses
+import io
+import os
+
+from PIL import Image, ImageDraw
+from PyPDF2 import PdfReader
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from core.config import Settings
+from services import ocr_service
+from services.pdf_images import page_scan_dpi, page_scan_image
+
+A4 = (595.27, 841.89)
+
+
+def _scan(mode="L", size=(1654, 2339)):
+    img = Image.new("L", size, 255)
+    ImageDraw.Draw(img).rectangle((100, 100, 400, 160), fill=0)
+    return img.convert(mode)
+
+
+def _pil_pdf(mode, dpi=200):
+    buf = io.BytesIO()
+    _scan(mode).save(buf, format="PDF", resolution=dpi)
+    return buf.getvalue()
+
+
+def _reportlab_pdf():
+    """Page 1: full-page scan; page 2: scan + text; page 3: small picture."""
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    c.drawImage(ImageReader(_scan()), 0, 0, *A4)
+    c.showPage()
+    c.drawImage(ImageReader(_scan()), 0, 0, *A4)
+    c.drawString(50, 50, "B/L NO MEDUH9024256")
+    c.showPage()
+    c.drawImage(ImageReader(_scan()), 0, 0, 200, 300)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_single_image_pages_yield_native_image():
+    # JPEG (DCT), CCITT G4 and ASCII85+Flate encodings
+    for data in (_pil_pdf("L"), _pil_pdf("1"), _reportlab_pdf()):
+        img, dpi = page_scan_image(PdfReader(io.BytesIO(data)).pages[0])
+
+        assert dpi == 200
+        assert img.size[0] == 1654
+        gray = img.convert("L")
+        assert gray.getpixel((200, 130)) < 64  # ink stays ink
+        assert gray.getpixel((800, 800)) > 192
+
+
+def test_composite_pages_are_left_to_rasterization():
+    pages = PdfReader(io.BytesIO(_reportlab_pdf())).pages
+
+    assert page_scan_dpi(pages[1]) is None  # text drawn over the scan
+    assert page_scan_dpi(pages[2]) is None  # image does not cover the page
+    assert page_scan_image(pages[2]) is None
+
+
+def test_embedded_scans_are_ocred_without_rendering(monkeypatch, tmp_path):
+    pdf_path = os.path.join(tmp_path, "scan.pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(_reportlab_pdf())
+    rendered, seen = [], []
+
+    def convert_from_path(path, dpi, fmt, first_page, last_page, grayscale=False):
+        rendered.extend(range(first_page, last_page + 1))
+        return [Image.new("L", (10, 10), 255) for _ in range(first_page, last_page + 1)]
+
+    def fake_ocr(img, dpi=300, deadline=None):
+        seen.append((img.size[0], dpi))
+        return {"text": "TEXT", "conf": 95.0, "dpi": dpi, "passes": []}
+
+    monkeypatch.setattr(ocr_service, "Settings", lambda: dataclasses.replace(Settings(), OCR_PAGE_WORKERS=1))
+    monkeypatch.setattr(ocr_service, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(ocr_service, "_ocr_image_detailed", fake_ocr)
+
+    results = ocr_service._ocr_pdf_pages(pdf_path, [1, 2, 3])
+
+    assert rendered == [2, 3]
+    assert seen == [(1654, 200), (10, 300), (10, 300)]
+    assert [r["raster"] for r in results] == ["embedded", "poppler", "poppler"]
@@ -0,0 +1,94 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from core.storage import SignedUrlCache, StorageClient
+from main import app
+
+_SERVER = Path(__file__).resolve().parents[2] / "scripts" / "local_storage_server.py"
+_spec = importlib.util.spec_from_file_location("local_storage_server", _SERVER)
+local_storage_server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(local_storage_server)
+
+HEADERS = {"x-api-key": "changeme"}
+
+
+@pytest.fixture
+def storage(tmp_path):
+    (tmp_path / "shipments").mkdir()
+    (tmp_path / "shipments" / "bl 1.pdf").write_bytes(b"%PDF-1.4 stand-in")
+    server, base_url = local_storage_server.serve(str(tmp_path), key="test-key")
+    try:
+        yield server, StorageClient(base_url, "test-key", "documents")
+    finally:
+        server.shutdown()
+
+
+def test_storage_download(storage):
+    _, client = storage
+
+    async def run():
+        async with httpx.AsyncClient() as http:
+            return await client.download("shipments/bl 1.pdf", client=http)
+
+    data, content_type = asyncio.run(run())
+    assert data == b"%PDF-1.4 stand-in"
+    assert content_type == "application/pdf"
+
+
+def test_signed_url_cache_drops_urls_before_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("core.storage.time.time", lambda: now[0])
+    cache = SignedUrlCache(max_entries=2, margin_s=60)
+
+    cache.put("documents", "a.pdf", 600, "https://signed/a")
+    cache.put("documents", "short.pdf", 30, "https://signed/short")  # expires inside the margin
+    assert cache.get("documents", "a.pdf", 600) == "https://signed/a"
+    assert cache.get("documents", "a.pdf", 3600) is None
+    assert cache.get("documents", "short.pdf", 30) is None
+
+    now[0] += 540
+    assert cache.get("documents", "a.pdf", 600) is None
+
+
+def test_parse_document_reads_storage_path(storage, monkeypatch):
+    _, client = storage
+    monkeypatch.setattr("api.v1.parse.get_storage", lambda: client)
+    seen = []
+
+    def ocr(data, content_type=None, deadline_at=None, count_cache=True):
+        seen.append(data)
+        return {"text": "BILL OF LADING NO COSU123456789", "pages": [], "partial": False, "skipped_pages": []}
+
+    monkeypatch.setattr("api.v1.parse.ocr_document", ocr)
+
+    payload = {"document_id": "test-123", "storage_path": "shipments/bl 1.pdf", "hint": "BL"}
+    resp = TestClient(app).post("/api/v1/parse/document", json=payload, headers=HEADERS)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["extraction"]["bl_number"] == "COSU123456789"
+    assert seen == [b"%PDF-1.4 stand-in"]
+
+
+def test_storage_path_without_storage_settings_is_a_server_error(monkeypatch):
+    import dataclasses
+
+    from core.config import Settings
+
+    monkeypatch.setattr("core.storage.Settings", lambda: dataclasses.replace(Settings(), SUPABASE_URL=""))
+
+    payload = {"document_id": "test-123", "storage_path": "shipments/bl 1.pdf", "hint": "BL"}
+    resp = TestClient(app).post("/api/v1/parse/document", json=payload, headers=HEADERS)
+    assert resp.status_code == 500
+    assert resp.json()["detail"] == "Document storage is not configured"
+
+
+def test_document_input_requires_exactly_one_source():
+    api = TestClient(app)
+    both = {"document_id": "test-123", "file_url": "https://example.com/a.pdf", "storage_path": "a.pdf"}
+    neither = {"document_id": "test-123", "hint": "BL"}
+    assert api.post("/api/v1/parse/document", json=both, headers=HEADERS).status_code == 422
+    assert api.post("/api/v1/parse/document", json=neither, headers=HEADERS).status_code == 422
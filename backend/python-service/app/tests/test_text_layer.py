@@ -0,0 +1,89 @@
+import dataclasses
+import io
+import subprocess
+
+from reportlab.pdfgen import canvas
+
+from core.config import Settings
+from services import ocr_service, text_layer
+
+
+def _text_pdf(*pages):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf)
+    for line in pages:
+        c.drawString(72, 720, line)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_pdftotext_splits_pages_on_form_feeds(monkeypatch):
+    calls = []
+
+    def run(args, capture_output, check, timeout):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout=b"B/L NO MEDUH9024256\f\fPAGE 3\f")
+
+    monkeypatch.setattr(text_layer.subprocess, "run", run)
+
+    pages = text_layer.PdftotextBackend().extract_pages(b"%PDF-1.4", max_pages=3)
+
+    assert pages == ["B/L NO MEDUH9024256", "", "PAGE 3"]
+    assert calls[0][:2] == ["pdftotext", "-layout"]
+    assert calls[0][-1] == "-" and "-l" in calls[0]
+
+
+def test_pdftotext_failure_returns_none(monkeypatch):
+    def run(args, capture_output, check, timeout):
+        raise subprocess.CalledProcessError(1, args)
+
+    monkeypatch.setattr(text_layer.subprocess, "run", run)
+
+    assert text_layer.PdftotextBackend().extract_pages(b"not a pdf") is None
+
+
+def test_unknown_or_missing_backend_falls_back_to_pypdf2(monkeypatch):
+    monkeypatch.setattr(text_layer, "_backends", {})
+    monkeypatch.setattr(text_layer.shutil, "which", lambda name: None)
+
+    assert text_layer.get_text_backend("auto").name == "pypdf2"
+    assert text_layer.get_text_backend("pdftotext").name == "pypdf2"
+    assert text_layer.get_text_backend("nope").name == "pypdf2"
+
+
+def test_pdftotext_is_opt_in_even_when_installed(monkeypatch):
+    monkeypatch.setattr(text_layer, "_backends", {})
+    monkeypatch.setattr(text_layer.shutil, "which", lambda name: "/usr/bin/" + name)
+
+    assert text_layer.get_text_backend(Settings().TEXT_LAYER_BACKEND).name == "pypdf2"
+    assert text_layer.get_text_backend().name == "pypdf2"
+    assert text_layer.get_text_backend("auto").name == "pdftotext"
+
+
+def test_pure_python_backends_read_every_page():
+    data = _text_pdf("B/L NO MEDUH9024256", "VESSEL MSC AURORA")
+
+    backends = [text_layer.PyPDF2Backend()]
+    if text_layer.pdfplumber is not None:
+        backends.append(text_layer.PdfplumberBackend())
+    for backend in backends:
+        pages = backend.extract_pages(data)
+        assert len(pages) == 2
+        assert "MEDUH9024256" in pages[0]
+        assert backend.extract_pages(data, max_pages=1) == pages[:1]
+
+
+def test_text_layer_reports_use_configured_backend(monkeypatch):
+    class Backend:
+        name = "fake"
+
+        def extract_pages(self, pdf_bytes, max_pages=None):
+            return [" first ", "second"]
+
+    monkeypatch.setattr(ocr_service, "Settings", lambda: dataclasses.replace(Settings(), TEXT_LAYER_BACKEND="fake"))
+    monkeypatch.setattr(ocr_service, "get_text_backend", lambda name: Backend())
+
+    pages = ocr_service._read_text_layer(b"%PDF-1.4")
+
+    assert [(p["page"], p["text"]) for p in pages] == [(1, "first"), (2, "second")]
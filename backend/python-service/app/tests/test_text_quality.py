@@ -0,0 +1,62 @@
+import dataclasses
+
+from PIL import Image
+
+from core.config import Settings
+from services import ocr_service
+from services.text_quality import score_text
+
+BL_PAGE = "\n".join([
+    "BILL OF LADING No. MEDUH9024256",
+    "SHIPPER: ACME TRADING LTD, 12 HARBOUR ROAD",
+    "CONSIGNEE: MKC LOGISTICS, POINTE NOIRE, CONGO",
+    "VESSEL: MSC AURORA    VOYAGE NO: FA412R",
+    "PORT OF LOADING: ANTWERP    PORT OF DISCHARGE: POINTE NOIRE",
+])
+
+
+def test_real_text_layers_score_high():
+    assert score_text(BL_PAGE).score == 1.0
+    assert score_text("EXPÉDITEUR: SOCIÉTÉ ACME\nDESTINATAIRE: MKC\nNAVIRE: MSC AURORA").score == 1.0
+    assert score_text("Please find attached the shipping documents for the following containers").score == 1.0
+
+
+def test_garbage_text_layers_score_low_whatever_their_length():
+    glyph_ids = "(cid:38)(cid:72)(cid:85)(cid:87) " * 200
+    mojibake = "EXPÉDITEUR SOCIÉTÉ DÉCHARGÉ ".encode("utf-8").decode("cp1252") * 50
+    shifted = "Xq7 Lkzv Wpq Mnbv 88812 Qrrt " * 50
+
+    for text in (glyph_ids, mojibake, shifted, " " * 100):
+        assert len(text) > 50
+        assert score_text(text).score < 0.5
+    assert score_text(mojibake).printable < 0.9
+
+
+def test_short_footer_is_not_a_text_layer():
+    assert score_text("Page 2 of 3").score == 0.0
+    assert score_text("").score == 0.0
+
+
+def test_garbage_text_layer_pages_are_ocred(monkeypatch):
+    layer = [
+        {"page": 1, "source": "text", "text": BL_PAGE, "passes": []},
+        {"page": 2, "source": "text", "text": "(cid:38)(cid:72)(cid:85) " * 100, "passes": []},
+    ]
+    rendered = []
+
+    def convert_from_path(path, dpi, fmt, first_page, last_page, grayscale=False):
+        rendered.extend(range(first_page, last_page + 1))
+        return [Image.new("L", (10, 10), 255) for _ in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(ocr_service, "Settings", lambda: dataclasses.replace(Settings(), OCR_PAGE_WORKERS=1))
+    monkeypatch.setattr(ocr_service, "_read_text_layer", lambda data: [dict(p) for p in layer])
+    monkeypatch.setattr(ocr_service, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(
+        ocr_service, "_ocr_image_detailed",
+        lambda img, dpi=300, deadline=None: {"text": "OCR TEXT", "conf": 95.0, "dpi": dpi, "passes": []},
+    )
+
+    pages = ocr_service._extract_pdf_pages(b"%PDF-garbage")
+
+    assert rendered == [2]
+    assert [(p["page"], p["source"]) for p in pages] == [(1, "text"), (2, "ocr")]
@@ -0,0 +1,107 @@
+"""Shared fixtures for the OCR benchmarks.
+
+Benchmarks are plain scripts, run from `backend/python-service`:
+
+    python benchmarks/bench_ocr_pool.py
+
+They need the same system binaries as the service (tesseract, poppler).
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+# Settings are read from the environment; benchmarks do not need a real key.
+os.environ.setdefault("PYTHON_SERVICE_API_KEY", "bench")
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+SAMPLE_PDFS = sorted(REPO_ROOT.glob("*.pdf"))
+
+BL_LINES = [
+    "MEDITERRANEAN SHIPPING COMPANY S.A.",
+    "BILL OF LADING No. MEDUH9024256",
+    "SHIPPER: ACME TRADING LTD, 12 HARBOUR ROAD",
+    "CONSIGNEE: MKC LOGISTICS, POINTE NOIRE, CONGO",
+    "VESSEL: MSC AURORA    VOYAGE NO: FA412R",
+    "PORT OF LOADING: ANTWERP    PORT OF DISCHARGE: POINTE NOIRE",
+    "CONTAINER NUMBERS: MSCU1234565  SEAL NUMBER: EU26752001",
+    "GROSS WEIGHT 18000.000 KGS",
+    "DESCRIPTION OF GOODS: 1 X 20' CONTAINER SAID TO CONTAIN",
+    "FREIGHT PREPAID AS ARRANGED",
+]
+
+
+def tesseract_available() -> bool:
+    return shutil.which("tesseract") is not None
+
+
+def poppler_available() -> bool:
+    return shutil.which("pdftoppm") is not None
+
+
+def synthetic_page(seed: int = 0, dpi: int = 300):
+    """Render an A4 page of BL-like text as a grayscale PIL image."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=max(12, dpi // 8))
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    y = dpi // 2
+    line_h = dpi // 5
+    i = seed
+    while y < height - dpi // 2:
+        draw.text((dpi // 2, y), BL_LINES[i % len(BL_LINES)], fill=0, font=font)
+        y += line_h
+        i += 1
+    return img
+
+
+def synthetic_pdf(pages: int, dpi: int = 150) -> bytes:
+    """Return a scanned-style PDF (one raster image per page, no text layer)."""
+    import io
+
+    imgs = [synthetic_page(seed=i, dpi=dpi).convert("RGB") for i in range(pages)]
+    buf = io.BytesIO()
+    imgs[0].save(buf, format="PDF", save_all=True, append_images=imgs[1:], resolution=dpi)
+    return buf.getvalue()
+
+
+def noisy_ocr_text(size: int, seed: int = 0) -> str:
+    """About `size` characters of uppercase OCR-like BL text: the BL lines,
+    labelled values, broken codes, long numbers and stray label words, the
+    kind of token soup that gives pick_best_bl hundreds of candidates."""
+    import random
+
+    rnd = random.Random(seed)
+    labels = ["SHIPPER", "CONSIGNEE", "B/L NO", "BOOKING NO", "SEAL", "CONTAINER", "VESSEL", "VOYAGE NO",
+              "PORT OF LOADING", "TAX ID", "VAT", "KGS", "BILL OF LADING", "MEDU", "MAEU", "DRAFT BILL", "B L"]
+    letters, alnum = "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-/"
+    lines, n = [], 0
+    while n < size:
+        r = rnd.random()
+        if r < 0.3:
+            line = rnd.choice(BL_LINES)
+        elif r < 0.55:
+            prefix = "".join(rnd.choice(letters) for _ in range(rnd.randint(2, 4)))
+            line = f"{rnd.choice(labels)}: {prefix}{rnd.randint(10**5, 10**11)}"
+        elif r < 0.7:
+            line = "".join(rnd.choice(alnum) for _ in range(rnd.randint(6, 18)))
+        elif r < 0.8:
+            line = str(rnd.randint(10**7, 10**13))
+        else:
+            line = " ".join(rnd.choice(labels) for _ in range(rnd.randint(1, 5)))
+        lines.append(line)
+        n += len(line) + 1
+    return "\n".join(lines)
+
+
+def fmt_row(cells, widths):
+    return "  ".join(str(c).rjust(w) for c, w in zip(cells, widths))
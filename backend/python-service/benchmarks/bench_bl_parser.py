@@ -0,0 +1,88 @@
+"""pick_best_bl context lookups on 10-100 KB OCR texts.
+
+    python benchmarks/bench_bl_parser.py [--sizes 10,30,100] [--repeat 3]
+
+For every candidate of a synthetic noisy OCR text (`_samples.noisy_ocr_text`)
+the bl_parser context helpers are run twice:
+
+- "per call": given the text, so each call uppercases the whole document
+  and searches it again (the previous cost);
+- "shared": given one DocumentIndex built for the document
+  (`bl_parser.index_document`, labels found by one keyword-scanner pass).
+
+The last columns time full pick_best_bl runs, which share one index:
+scoring every candidate ("exhaustive", `top_k=None`) and through the
+bounded cascade (the default).
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+
+import _samples  # noqa: F401  (sets up sys.path)
+from _samples import fmt_row, noisy_ocr_text
+
+
+def _helpers():
+    from services import bl_parser as p
+
+    return [
+        lambda t, c: p.has_explicit_bl_label_near(t, c),
+        lambda t, c: p.is_seal_number_context(t, c),
+        lambda t, c: p.is_tax_or_fiscal_context(t, c),
+        lambda t, c: p.is_in_port_or_voyage_context(t, c),
+        lambda t, c: p.is_in_forbidden_bl_context(t, c),
+        lambda t, c: p.candidate_near_phrase(t, c, "B/L NO", window=30),
+        lambda t, c: p.candidate_near_bl_keyword(t, c, window=150),
+        lambda t, c: p.is_within_container_section(t, c),
+    ]
+
+
+def _timed(fn, repeat):
+    times = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), result
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="10,30,100", help="text sizes in KB")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    # the parser logs every candidate; keep that out of the timings
+    logging.disable(logging.CRITICAL)
+    from services.bl_parser import extract_bl_candidates, index_document, pick_best_bl
+
+    helpers = _helpers()
+    widths = [6, 11, 13, 11, 8, 15, 12, 14]
+    print(fmt_row(
+        ["KB", "candidates", "per call ms", "shared ms", "speedup", "exhaustive ms", "cascade ms", "B/L"], widths,
+    ))
+    for kb in (int(x) for x in args.sizes.split(",")):
+        text = noisy_ocr_text(kb * 1024, seed=kb)
+        candidates = extract_bl_candidates(text)
+
+        def battery(source):
+            doc = source()
+            return [h(doc, c) for c in candidates for h in helpers]
+
+        per_call_ms, expected = _timed(lambda: battery(lambda: text), args.repeat)
+        shared_ms, got = _timed(lambda: battery(lambda: index_document(text)), args.repeat)
+        assert got == expected, "shared index changed a helper answer"
+        full_ms, expected = _timed(lambda: pick_best_bl(text, top_k=None), args.repeat)
+        pick_ms, found = _timed(lambda: pick_best_bl(text), args.repeat)
+        assert found == expected, "cascade changed the pick_best_bl result"
+        print(fmt_row([
+            kb, len(candidates), f"{per_call_ms:.1f}", f"{shared_ms:.1f}", f"{per_call_ms / max(shared_ms, 1e-6):.1f}x",
+            f"{full_ms:.1f}", f"{pick_ms:.1f}", (found or {}).get("bl_number") or "-",
+        ], widths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
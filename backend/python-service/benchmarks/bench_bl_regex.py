@@ -0,0 +1,112 @@
+"""bl_parser regex micro-benchmarks: per-call patterns vs compiled / merged ones.
+
+    python benchmarks/bench_bl_regex.py [--sizes 10,30,100] [--repeat 5]
+
+On synthetic noisy OCR texts (`_samples.noisy_ocr_text`), each case runs the
+previous code path ("before") and the current one ("after"), checks that
+they produce the same result and reports the speedup:
+
+- "explicit": the 3 label-value patterns and the 8 labelled BL_REGEXES, one
+  case-insensitive `finditer` each, vs one `EXPLICIT_PATTERNS.scan` of the
+  uppercased text;
+- "format": the 7 format BL_REGEXES through `re.findall(rx, text, re.I)` vs
+  the precompiled patterns on the uppercased text (kept as separate passes:
+  their matches are too dense for a merged scan to pay off);
+- "footer": for every candidate, `re.search(rf'B/L\\s*:\\s*{token}', text, re.I)`
+  vs the label end offsets collected once and a `startswith` per candidate.
+
+The exit status is 1 when a case disagrees or its speedup on the largest
+text falls below MIN_SPEEDUP, so the script can guard the speedup in CI.
+"""
+import argparse
+import logging
+import re
+import statistics
+import sys
+import time
+
+import _samples  # noqa: F401  (sets up sys.path)
+from _samples import fmt_row, noisy_ocr_text
+
+# lowest accepted speedup per case on the largest text (measured: about 3x,
+# 1.2x and three orders of magnitude at 100 KB)
+MIN_SPEEDUP = {"explicit": 2.0, "format": 1.0, "footer": 20.0}
+
+
+def _timed(fn, repeat):
+    times = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), result
+
+
+def _cases(text):
+    from services import bl_parser as p
+
+    upper = text.upper()
+    explicit = p.BL_LABEL_VALUE_REGEXES + p.EXPLICIT_BL_REGEXES
+    formats = p.BL_REGEXES[len(p.EXPLICIT_BL_REGEXES):]
+    tokens = p.extract_bl_candidates(text)
+
+    def explicit_before():
+        return sorted(
+            (k, m.start(), m.group(1).upper())
+            for k, rx in enumerate(explicit)
+            for m in re.finditer(rx, text, flags=re.IGNORECASE)
+        )
+
+    def explicit_after():
+        return sorted((m.index, m.start, m.value) for m in p.EXPLICIT_PATTERNS.scan(upper))
+
+    def format_before():
+        return [v.upper() for rx in formats for v in re.findall(rx, text, flags=re.IGNORECASE)]
+
+    def format_after():
+        return [v for rx in p._FORMAT_BL_RXS for v in rx.findall(upper)]
+
+    def footer_before():
+        return [t for t in tokens if re.search(rf"B/L\s*:\s*{re.escape(t)}", text, flags=re.IGNORECASE)]
+
+    def footer_after():
+        ends = [m.end() for m in p._FOOTER_BL_LABEL_RX.finditer(upper)]
+        return [t for t in tokens if any(upper.startswith(t.upper(), e) for e in ends)]
+
+    return [
+        ("explicit", explicit_before, explicit_after),
+        ("format", format_before, format_after),
+        ("footer", footer_before, footer_after),
+    ]
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="10,30,100", help="text sizes in KB")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    sizes = [int(x) for x in args.sizes.split(",")]
+    widths = [6, 10, 12, 12, 10, 8]
+    print(fmt_row(["KB", "case", "before ms", "after ms", "speedup", "same"], widths))
+    failures = []
+    for kb in sizes:
+        text = noisy_ocr_text(kb * 1024, seed=kb)
+        for name, before, after in _cases(text):
+            before_ms, expected = _timed(before, args.repeat)
+            after_ms, got = _timed(after, args.repeat)
+            speedup = before_ms / max(after_ms, 1e-6)
+            same = got == expected
+            print(fmt_row([kb, name, f"{before_ms:.2f}", f"{after_ms:.2f}", f"{speedup:.1f}x", same], widths))
+            if not same:
+                failures.append(f"{name} @ {kb} KB: results differ")
+            elif kb == max(sizes) and speedup < MIN_SPEEDUP[name]:
+                failures.append(f"{name} @ {kb} KB: {speedup:.2f}x < {MIN_SPEEDUP[name]}x")
+    for f in failures:
+        print("FAIL", f)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Embedded scan image vs poppler rendering, on the sample PDFs of the repo root.
+
+    python benchmarks/bench_embedded_images.py [--scan-dpi 200] [--render-dpi 300] [--ocr]
+
+The samples are digital PDFs (text layer + logos), so first their pages are
+classified as they are; then a scanned copy of each is made the way a
+scanner would (pages rendered at --scan-dpi and wrapped as one JPEG per
+page) and each page of that copy is read both ways:
+
+- "embedded": `pdf_images.page_scan_image`, the JPEG at its native dpi;
+- "render": `ocr_service._render_page` at --render-dpi (the previous path).
+
+With --ocr (needs tesseract) both images are OCRed and the B/L number found
+by pick_best_bl is reported.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import _samples
+from _samples import SAMPLE_PDFS, fmt_row, poppler_available, tesseract_available
+
+
+def _scanned_copy(pdf_path: str, dpi: int) -> bytes:
+    from pdf2image import convert_from_path
+
+    pages = [img.convert("RGB") for img in convert_from_path(pdf_path, dpi=dpi)]
+    buf = io.BytesIO()
+    pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=dpi, quality=85)
+    return buf.getvalue()
+
+
+def _ocr_bl(img, dpi: int) -> str:
+    from services import ocr_service
+    from services.bl_parser import pick_best_bl
+
+    text = ocr_service._normalize_ocr_text(ocr_service._ocr_image_detailed(img, dpi=dpi)["text"])
+    found = pick_best_bl(text)
+    return (found or {}).get("bl_number") or "-"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--scan-dpi", type=int, default=200)
+    ap.add_argument("--render-dpi", type=int, default=300)
+    ap.add_argument("--ocr", action="store_true")
+    args = ap.parse_args(argv)
+
+    if not SAMPLE_PDFS:
+        print("no sample PDFs in the repo root; skipping benchmark")
+        return 0
+    if not poppler_available():
+        print("poppler binaries not found; skipping benchmark")
+        return 0
+    do_ocr = args.ocr and tesseract_available()
+
+    from PyPDF2 import PdfReader
+
+    from services import ocr_service
+    from services.pdf_images import page_scan_dpi, page_scan_image
+
+    for sample in SAMPLE_PDFS:
+        reader = PdfReader(str(sample))
+        kinds = ["scan@%d" % d if d else "composite" for d in (page_scan_dpi(p) for p in reader.pages)]
+        print(f"{sample.name}: original pages {kinds}")
+
+        widths = [5, 10, 12, 12, 12, 16, 16]
+        print(fmt_row(["page", "dpi", "embed ms", "render ms", "speedup", "embed B/L", "render B/L"], widths))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scanned.pdf")
+            with open(path, "wb") as f:
+                f.write(_scanned_copy(str(sample), args.scan_dpi))
+            scanned = PdfReader(path)
+            embed_ms, render_ms = [], []
+            for n, page in enumerate(scanned.pages, start=1):
+                t0 = time.perf_counter()
+                found = page_scan_image(page)
+                if found is None:
+                    print(fmt_row([n, "-", "not a scan page", "", "", "", ""], widths))
+                    continue
+                img, dpi = found
+                img.load()
+                t1 = time.perf_counter()
+                rendered = ocr_service._render_page(path, n, args.render_dpi)
+                rendered.load()
+                t2 = time.perf_counter()
+                embed_ms.append((t1 - t0) * 1000)
+                render_ms.append((t2 - t1) * 1000)
+                bls = [_ocr_bl(img, dpi), _ocr_bl(rendered, args.render_dpi)] if do_ocr else ["", ""]
+                print(fmt_row([
+                    n, dpi, f"{embed_ms[-1]:.1f}", f"{render_ms[-1]:.1f}",
+                    f"{render_ms[-1] / max(embed_ms[-1], 1e-6):.1f}x", *bls,
+                ], widths))
+            if embed_ms:
+                print(fmt_row([
+                    "med", "", f"{statistics.median(embed_ms):.1f}", f"{statistics.median(render_ms):.1f}",
+                    f"{statistics.median(render_ms) / max(statistics.median(embed_ms), 1e-6):.1f}x", "", "",
+                ], widths))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Label keyword scan: one Aho-Corasick pass vs one `str.find` sweep per keyword.
+
+    python benchmarks/bench_keyword_scan.py [--sizes 10,100] [--extra 0,100,400]
+
+The vocabulary is bl_parser.LABEL_CLASSES plus --extra made-up keywords (to
+show how each approach scales with vocabulary size). Engines:
+
+- "find": every occurrence of each keyword with repeated `str.find`, the
+  way the index collected positions before the scanner;
+- "python": the pure-Python automaton of services/keyword_scanner.py;
+- "native": pyahocorasick, when installed.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import _samples  # noqa: F401  (sets up sys.path)
+from _samples import fmt_row, noisy_ocr_text
+
+
+def _find_sweep(text, keywords):
+    hits = {}
+    for k in keywords:
+        found, i = [], text.find(k)
+        while i != -1:
+            found.append(i)
+            i = text.find(k, i + 1)
+        hits[k] = found
+    return hits
+
+
+def _timed(fn, repeat):
+    times = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), result
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="10,100", help="text sizes in KB")
+    ap.add_argument("--extra", default="0,100,400", help="made-up keywords added to the vocabulary")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    from services import keyword_scanner
+    from services.bl_parser import LABEL_CLASSES
+    from services.keyword_scanner import KeywordScanner
+
+    rnd = random.Random(0)
+    engines = ["find", "python"] + (["native"] if keyword_scanner.ahocorasick is not None else [])
+    widths = [5, 9, 9] + [11] * len(engines)
+    print(fmt_row(["KB", "extra", "keywords"] + [f"{e} ms" for e in engines], widths))
+    for kb in (int(x) for x in args.sizes.split(",")):
+        text = noisy_ocr_text(kb * 1024, seed=kb).upper()
+        for extra in (int(x) for x in args.extra.split(",")):
+            classes = dict(LABEL_CLASSES)
+            classes["extra"] = [
+                "".join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ ") for _ in range(rnd.randint(4, 14))).strip() or "X"
+                for _ in range(extra)
+            ]
+            scanners = {"python": KeywordScanner(classes, native=False)}
+            if "native" in engines:
+                scanners["native"] = KeywordScanner(classes)
+            keywords = sorted(scanners["python"].keywords)
+
+            row, expected = [kb, extra, len(keywords)], None
+            for engine in engines:
+                if engine == "find":
+                    ms, hits = _timed(lambda: _find_sweep(text, keywords), args.repeat)
+                else:
+                    ms, hits = _timed(lambda: scanners[engine].scan(text), args.repeat)
+                expected = expected or hits
+                assert hits == expected, f"{engine} disagrees"
+                row.append(f"{ms:.2f}")
+            print(fmt_row(row, widths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Per-page OCR latency: pytesseract (process per call) vs tesserocr (warm engine).
+
+    python benchmarks/bench_ocr_backends.py [--pages 3] [--mode exhaustive]
+
+The first page of each backend includes its warm-up (tesserocr loads the
+traineddata once; pytesseract pays it on every call).
+"""
+import argparse
+import dataclasses
+import statistics
+import sys
+import time
+
+import _samples
+from _samples import fmt_row, synthetic_page, tesseract_available
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--mode", choices=["exhaustive", "adaptive"], default="exhaustive")
+    args = ap.parse_args(argv)
+
+    if not tesseract_available():
+        print("tesseract binary not found; skipping benchmark")
+        return 0
+
+    from core.config import Settings
+    from services import ocr_service
+    from services.ocr_engines import available_backends
+
+    backends = available_backends()
+    if "tesserocr" not in backends:
+        print("tesserocr not installed; only the pytesseract backend is measured")
+
+    images = [synthetic_page(seed=i) for i in range(args.pages)]
+    widths = [12, 6, 7, 10]
+    print(fmt_row(["backend", "page", "passes", "wall_s"], widths))
+    for name in backends:
+        ocr_service.Settings = lambda: dataclasses.replace(
+            Settings(), OCR_BACKEND=name, OCR_PSM_MODE=args.mode
+        )
+        times = []
+        for i, img in enumerate(images):
+            t0 = time.perf_counter()
+            res = ocr_service._ocr_image_detailed(img)
+            dt = time.perf_counter() - t0
+            times.append(dt)
+            print(fmt_row([name, i + 1, len(res["passes"]), f"{dt:.2f}"], widths))
+        warm = times[1:] or times
+        print(fmt_row([name, "warm", "", f"{statistics.median(warm):.2f}"], widths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Wall-clock time of page OCR against page count and OCR_PAGE_WORKERS.
+
+    python benchmarks/bench_ocr_pool.py [--pages 1,2,4,6] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import _samples
+from _samples import fmt_row, poppler_available, synthetic_pdf, tesseract_available
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", default="1,2,4,6")
+    ap.add_argument("--workers", default="1,2,4,%d" % (os.cpu_count() or 1))
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    if not (tesseract_available() and poppler_available()):
+        print("tesseract/poppler binaries not found; skipping benchmark")
+        return 0
+
+    from services import ocr_service
+
+    page_counts = [int(x) for x in args.pages.split(",")]
+    worker_counts = sorted({int(x) for x in args.workers.split(",")})
+    tmp = tempfile.TemporaryDirectory()
+    paths = {}
+    for n in page_counts:
+        paths[n] = os.path.join(tmp.name, f"scan_{n}.pdf")
+        with open(paths[n], "wb") as f:
+            f.write(synthetic_pdf(n))
+
+    # one page pool at a time (it is replaced when the size changes), so
+    # measure worker count by worker count
+    timings = {}
+    for w in worker_counts:
+        if w > 1:
+            # start and warm all w processes so start-up is not billed to the first row
+            pool = ocr_service._get_page_pool(w)
+            list(pool.map(time.sleep, [0.05] * w))
+        for n in page_counts:
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                texts = ocr_service._ocr_pdf_pages(paths[n], list(range(1, n + 1)), workers=w)
+                dt = time.perf_counter() - t0
+                best = dt if best is None else min(best, dt)
+            assert len(texts) == n
+            timings[n, w] = best
+    ocr_service.shutdown_page_pool()
+
+    widths = [6] + [10] * len(worker_counts)
+    print(f"cpu_count={os.cpu_count()}  (seconds, best of {args.repeat})")
+    print(fmt_row(["pages"] + [f"w={w}" for w in worker_counts], widths))
+    for n in page_counts:
+        print(fmt_row([n] + [f"{timings[n, w]:.2f}" for w in worker_counts], widths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Per-page preprocessing cost by OCR_PREPROCESS mode (no tesseract needed).
+
+    python benchmarks/bench_preprocess.py [--pages 3] [--skew 2.0] [--repeat 3]
+
+Pages are synthetic A4 scans at 300 dpi, rotated by --skew degrees, with a
+dark scanner margin. `gray` is the time until the grayscale variant is
+ready, `binary` the extra time to build the binarized one (built once and
+reused by every PSM pass). `skew` is the correction that was applied.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import _samples  # noqa: F401  (puts app/ on sys.path)
+from _samples import fmt_row, synthetic_page
+
+
+def _scan(seed: int, skew: float):
+    from PIL import ImageDraw
+
+    img = synthetic_page(seed=seed).rotate(-skew, fillcolor=255)
+    ImageDraw.Draw(img).rectangle((0, 0, img.width - 1, 40), fill=0)
+    return img
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--skew", type=float, default=2.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    from services.image_preprocess import PREPROCESS_MODES, prepare_image
+
+    pages = [_scan(i, args.skew) for i in range(args.pages)]
+    widths = [10, 10, 11, 8]
+    print(f"{args.pages} pages, skew {args.skew} deg, median of {args.repeat} runs")
+    print(fmt_row(["mode", "gray ms", "binary ms", "skew"], widths))
+    for mode in PREPROCESS_MODES:
+        gray_ms, binary_ms, skews = [], [], []
+        for _ in range(args.repeat):
+            for img in pages:
+                t0 = time.perf_counter()
+                page = prepare_image(img, mode)
+                t1 = time.perf_counter()
+                page.binary
+                t2 = time.perf_counter()
+                gray_ms.append((t1 - t0) * 1000)
+                binary_ms.append((t2 - t1) * 1000)
+                skews.append(page.skew)
+        print(fmt_row([
+            mode,
+            f"{statistics.median(gray_ms):.1f}",
+            f"{statistics.median(binary_ms):.1f}",
+            f"{statistics.median(skews):.2f}",
+        ], widths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Tesseract passes and CPU time per page: exhaustive vs adaptive PSM cascade.
+
+    python benchmarks/bench_psm_cascade.py [--pages 3]
+"""
+import argparse
+import dataclasses
+import sys
+import time
+
+import _samples
+from _samples import fmt_row, synthetic_page, tesseract_available
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    if not tesseract_available():
+        print("tesseract binary not found; skipping benchmark")
+        return 0
+
+    from core.config import Settings
+    from services import ocr_service
+
+    images = [synthetic_page(seed=i) for i in range(args.pages)]
+    widths = [12, 6, 14, 10]
+    print(fmt_row(["mode", "page", "passes", "cpu_s"], widths))
+    for mode in ("exhaustive", "adaptive"):
+        ocr_service.Settings = lambda: dataclasses.replace(Settings(), OCR_PSM_MODE=mode)
+        total = 0.0
+        for i, img in enumerate(images):
+            # tesseract runs in a child process: count its CPU time as well
+            t0 = time.process_time()
+            c0 = _children_cpu()
+            res = ocr_service._ocr_image_detailed(img)
+            dt = (time.process_time() - t0) + (_children_cpu() - c0)
+            total += dt
+            passes = ",".join(f"{p['variant'][0]}{p['psm']}" for p in res["passes"])
+            print(fmt_row([mode, i + 1, passes, f"{dt:.2f}"], widths))
+        print(fmt_row([mode, "all", "", f"{total:.2f}"], widths))
+    return 0
+
+
+def _children_cpu() -> float:
+    import resource
+
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+if __name__ == "__main__":
+    sys.exit(main())
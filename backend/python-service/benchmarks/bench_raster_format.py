@@ -0,0 +1,92 @@
+"""Per-page rasterization cost: PNG round trip vs raw grayscale PGM.
+
+    python benchmarks/bench_raster_format.py [--pages 4] [--dpi 300] [--repeat 3]
+
+"png" is the previous path (poppler PNG-encodes, PIL decodes, OCR converts
+RGB -> L); "gray" is `ocr_service._rasterize` (poppler writes raw PGM that
+PIL maps straight into an "L" image). Both are timed up to the image OCR
+receives. Allocation volume is the poppler output handed to Python
+(tracemalloc peak, includes the stdout buffer) plus every pixel buffer
+materialized on the way (decoded image, converted copy).
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import _samples  # noqa: F401  (puts app/ on sys.path)
+from _samples import fmt_row, poppler_available, synthetic_pdf
+
+
+def _pixels(img) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def _png_path(pdf_path: str, dpi: int, page: int):
+    from pdf2image import convert_from_path
+
+    img = convert_from_path(pdf_path, dpi=dpi, fmt="png", first_page=page, last_page=page)[0]
+    img.load()
+    decoded = _pixels(img)
+    gray = img.convert("L")
+    return gray, decoded + _pixels(gray)
+
+
+def _gray_path(pdf_path: str, dpi: int, page: int):
+    from services import ocr_service
+
+    img = ocr_service._rasterize(pdf_path, dpi, page, page)[0]
+    img.load()
+    assert img.mode == "L"
+    return img, _pixels(img)
+
+
+def _measure(fn, pdf_path: str, dpi: int, pages: int, repeat: int):
+    times, py_peaks, pixel_bytes = [], [], []
+    for _ in range(repeat):
+        for page in range(1, pages + 1):
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            img, pixels = fn(pdf_path, dpi, page)
+            times.append(time.perf_counter() - t0)
+            py_peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            pixel_bytes.append(pixels)
+            del img
+    mib = 1024.0 * 1024.0
+    return statistics.median(times) * 1000, statistics.median(py_peaks) / mib, statistics.median(pixel_bytes) / mib
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=4)
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    if not poppler_available():
+        print("poppler binaries not found; skipping benchmark")
+        return 0
+
+    widths = [6, 12, 16, 14, 14]
+    print(f"per-page rasterization, {args.pages} pages at {args.dpi} dpi (median of {args.repeat} runs)")
+    print(fmt_row(["path", "ms/page", "poppler out MiB", "pixels MiB", "total MiB"], widths))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.pdf")
+        with open(path, "wb") as f:
+            f.write(synthetic_pdf(args.pages))
+        rows = {}
+        for name, fn in (("png", _png_path), ("gray", _gray_path)):
+            ms, py_mib, px_mib = _measure(fn, path, args.dpi, args.pages, args.repeat)
+            rows[name] = ms
+            print(fmt_row([name, f"{ms:.1f}", f"{py_mib:.1f}", f"{px_mib:.1f}", f"{py_mib + px_mib:.1f}"], widths))
+
+    print(f"speedup: {rows['png'] / rows['gray']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
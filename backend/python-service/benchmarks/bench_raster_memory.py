@@ -0,0 +1,92 @@
+"""Peak RSS of PDF rasterization: eager convert_from_bytes vs streaming windows.
+
+    python benchmarks/bench_raster_memory.py [--pages 2,10,20] [--ceiling-mb 160]
+
+Each measurement runs in a fresh interpreter so ru_maxrss is not polluted by
+earlier runs. Exits with status 1 when the streaming rasterizer exceeds the
+ceiling or its peak grows with the page count.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import _samples
+from _samples import fmt_row, poppler_available, synthetic_pdf
+
+
+def _child(mode: str, pdf_path: str, window: int) -> None:
+    import resource
+
+    from pdf2image import convert_from_bytes
+
+    from services import ocr_service
+
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if mode == "eager":
+        for img in convert_from_bytes(pdf_bytes, dpi=300, fmt="png"):
+            img.load()
+    else:
+        pages = list(range(1, ocr_service._pdf_page_count(pdf_path) + 1))
+        for _, img in ocr_service._iter_pdf_images(pdf_path, pages, dpi=300, window=window):
+            img.load()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print((peak - base) / 1024.0)  # ru_maxrss is in KiB on Linux
+
+
+def _measure(mode: str, pdf_path: str, window: int) -> float:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, pdf_path, str(window)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", default="2,10,20")
+    ap.add_argument("--window", type=int, default=1)
+    ap.add_argument("--ceiling-mb", type=float, default=160.0)
+    ap.add_argument("--child", nargs=3, metavar=("MODE", "PDF", "WINDOW"))
+    args = ap.parse_args(argv)
+
+    if args.child:
+        _child(args.child[0], args.child[1], int(args.child[2]))
+        return 0
+
+    if not poppler_available():
+        print("poppler binaries not found; skipping benchmark")
+        return 0
+
+    page_counts = [int(x) for x in args.pages.split(",")]
+    widths = [6, 12, 12]
+    print(f"peak RSS growth in MiB (300 dpi, window={args.window})")
+    print(fmt_row(["pages", "eager", "streaming"], widths))
+    streaming = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in page_counts:
+            path = os.path.join(tmp, f"scan_{n}.pdf")
+            with open(path, "wb") as f:
+                f.write(synthetic_pdf(n))
+            eager = _measure("eager", path, args.window)
+            stream = _measure("stream", path, args.window)
+            streaming.append(stream)
+            print(fmt_row([n, f"{eager:.0f}", f"{stream:.0f}"], widths))
+
+    failures = []
+    if max(streaming) > args.ceiling_mb:
+        failures.append(f"streaming peak {max(streaming):.0f} MiB > ceiling {args.ceiling_mb:.0f} MiB")
+    if streaming[-1] > 1.5 * streaming[0] + 16:
+        failures.append("streaming peak grows with the page count")
+    for msg in failures:
+        print("FAIL:", msg)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
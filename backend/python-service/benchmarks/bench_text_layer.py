@@ -0,0 +1,62 @@
+"""Text-layer backends compared on the sample PDFs of the repo root.
+
+    python benchmarks/bench_text_layer.py [--repeat 5]
+
+Each available backend (`services.text_layer.available_backends()`) reads
+every sample; the median wall time and the B/L number pick_best_bl finds in
+the extracted text are reported. When the sample's file name contains a B/L
+number it is used as the expected value.
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+
+import _samples  # noqa: F401  (sets up sys.path)
+from _samples import SAMPLE_PDFS, fmt_row
+
+_EXPECTED_RE = re.compile(r"[A-Z]{4,5}\d{6,10}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    if not SAMPLE_PDFS:
+        print("no sample PDFs in the repo root; skipping benchmark")
+        return 0
+
+    from services import ocr_service
+    from services.bl_parser import pick_best_bl
+    from services.text_layer import available_backends, get_text_backend
+
+    backends = available_backends()
+    print(f"backends: {', '.join(backends)}")
+    widths = [36, 11, 6, 10, 16, 4]
+    print(fmt_row(["sample", "backend", "pages", "median ms", "B/L", "ok"], widths))
+    for sample in SAMPLE_PDFS:
+        data = sample.read_bytes()
+        m = _EXPECTED_RE.search(sample.stem.upper())
+        expected = m.group(0) if m else None
+        for name in backends:
+            backend = get_text_backend(name)
+            times = []
+            pages = None
+            for _ in range(max(1, args.repeat)):
+                t0 = time.perf_counter()
+                pages = backend.extract_pages(data)
+                times.append((time.perf_counter() - t0) * 1000)
+            if pages is None:
+                print(fmt_row([sample.name[:36], name, "-", "failed", "", ""], widths))
+                continue
+            found = pick_best_bl(ocr_service._normalize_ocr_text("\n".join(pages)))
+            bl = (found or {}).get("bl_number") or "-"
+            ok = "" if expected is None else ("yes" if bl == expected else "no")
+            print(fmt_row([sample.name[:36], name, len(pages), f"{statistics.median(times):.1f}", bl, ok], widths))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
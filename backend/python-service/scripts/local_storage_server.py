@@ -0,0 +1,140 @@
+"""Local stand-in for the Supabase Storage REST API (offline testing).
+
+Serves files from a directory as objects of one bucket. The service only
+uses the authenticated download route:
+
+    GET  /storage/v1/object/authenticated/<bucket>/<path>   (Bearer key)
+
+The signing routes are kept so signed `file_url`s can be exercised offline
+too:
+
+    POST /storage/v1/object/sign/<bucket>/<path>            (Bearer key) -> {"signedURL": ...}
+    GET  /storage/v1/object/sign/<bucket>/<path>?token=...
+
+Run it and point the service at it:
+
+    python scripts/local_storage_server.py --root ./fixtures --port 54321 --key local-key
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=local-key uvicorn main:app
+
+`serve(root, key)` starts it in a background thread (used by the tests).
+"""
+import argparse
+import json
+import mimetypes
+import os
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+PREFIX = "/storage/v1/object/"
+
+
+def make_handler(root: str, key: str, bucket: str):
+    tokens = {}
+    stats = {"downloads": 0, "signs": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # keep test output quiet
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, obj):
+            self._send(status, json.dumps(obj).encode())
+
+        def _route(self):
+            url = urlparse(self.path)
+            if not url.path.startswith(PREFIX):
+                return None, None, url
+            kind, _, rest = url.path[len(PREFIX):].partition("/")
+            req_bucket, _, obj = rest.partition("/")
+            if req_bucket != bucket:
+                return kind, None, url
+            return kind, unquote(obj), url
+
+        def _authorized(self) -> bool:
+            return self.headers.get("Authorization") == f"Bearer {key}"
+
+        def _file(self, obj: str):
+            path = os.path.realpath(os.path.join(root, obj))
+            if not path.startswith(os.path.realpath(root) + os.sep) or not os.path.isfile(path):
+                return None
+            return path
+
+        def _serve_file(self, path: str):
+            with open(path, "rb") as f:
+                data = f.read()
+            stats["downloads"] += 1
+            ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            self._send(200, data, ctype)
+
+        def do_GET(self):
+            kind, obj, url = self._route()
+            if obj is None:
+                return self._json(404, {"error": "not_found"})
+            if kind == "authenticated":
+                if not self._authorized():
+                    return self._json(401, {"error": "unauthorized"})
+            elif kind == "sign":
+                token = parse_qs(url.query).get("token", [""])[0]
+                if tokens.get(token) != obj:
+                    return self._json(400, {"error": "invalid_signature"})
+            else:
+                return self._json(404, {"error": "not_found"})
+            path = self._file(obj)
+            if path is None:
+                return self._json(404, {"error": "not_found"})
+            self._serve_file(path)
+
+        def do_POST(self):
+            kind, obj, _ = self._route()
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if kind != "sign" or obj is None:
+                return self._json(404, {"error": "not_found"})
+            if not self._authorized():
+                return self._json(401, {"error": "unauthorized"})
+            if self._file(obj) is None:
+                return self._json(404, {"error": "not_found"})
+            token = secrets.token_urlsafe(16)
+            tokens[token] = obj
+            stats["signs"] += 1
+            self._json(200, {"signedURL": f"/object/sign/{bucket}/{obj}?token={token}"})
+
+    Handler.stats = stats
+    return Handler
+
+
+def serve(root: str, key: str = "local-key", bucket: str = "documents", port: int = 0):
+    """Start the server in a daemon thread; returns (server, base_url)."""
+    handler = make_handler(root, key, bucket)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.stats = handler.stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--root", default=".")
+    ap.add_argument("--port", type=int, default=54321)
+    ap.add_argument("--key", default="local-key")
+    ap.add_argument("--bucket", default="documents")
+    args = ap.parse_args(argv)
+
+    server, base_url = serve(args.root, args.key, args.bucket, args.port)
+    print(f"serving {os.path.abspath(args.root)} as bucket '{args.bucket}' on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())